@@ -1,3 +1,3 @@
-"""
-Main application package
-"""
+"""
+Main application package
+"""
@@ -1,82 +1,149 @@
-"""
-FastAPI Application Factory with Vertical Feature Architecture
-"""
-
-from fastapi import FastAPI
-from fastapi.middleware.cors import CORSMiddleware
-from contextlib import asynccontextmanager
-from app.core.config import settings
-from app.core.database import init_db, close_db
-from app.core.config.observability_config import initialize_observability, shutdown_observability
-from app.middleware import AuthMiddleware
-from app.features import (
-    auth_router,
-    users_router,
-    chat_router,
-    documents_router,
-)
-from app.core.utils import get_logger
-
-logger = get_logger(__name__)
-
-
-@asynccontextmanager
-async def lifespan(app: FastAPI):
-    """Application lifespan context manager."""
-    # Startup
-    logger.info(f"Starting {settings.app_name}")
-    
-    # Initialize database
-    init_db()
-    
-    # Initialize observability (Phoenix + OpenTelemetry)
-    initialize_observability()
-
-    yield
-
-    # Shutdown
-    logger.info(f"Shutting down {settings.app_name}")
-    
-    # Shutdown observability
-    shutdown_observability()
-    
-    # Close database
-    close_db()
-
-
-def create_app() -> FastAPI:
-    """
-    Create and configure FastAPI application.
-
-    Returns:
-        Configured FastAPI instance
-    """
-    app = FastAPI(
-        title=settings.api_title,
-        description=settings.api_description,
-        version=settings.app_version,
-        debug=settings.debug,
-        lifespan=lifespan,
-    )
-
-    # Add CORS middleware
-    app.add_middleware(
-        CORSMiddleware,
-        allow_origins=["*"],
-        allow_credentials=True,
-        allow_methods=["*"],
-        allow_headers=["*"],
-        expose_headers=["*"]
-    )
-
-    # Add authentication middleware
-    app.add_middleware(AuthMiddleware)
-
-    # Include routers
-    app.include_router(auth_router, prefix=settings.api_prefix)
-    app.include_router(users_router, prefix=settings.api_prefix)
-    app.include_router(chat_router, prefix=settings.api_prefix)
-    app.include_router(documents_router, prefix=settings.api_prefix)
-
-    logger.info("FastAPI application created successfully")
-    return app
+"""
+FastAPI Application Factory with Vertical Feature Architecture
+"""
+
+import math
+from fastapi import FastAPI, Request
+from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
+from contextlib import asynccontextmanager
+from app.core.config import settings
+from app.core.database import init_db, close_db, close_async_db, async_unit_of_work
+from app.core.config.observability_config import initialize_observability, shutdown_observability
+from app.middleware import AuthMiddleware, UnitOfWorkMiddleware
+from app.features import (
+    auth_router,
+    users_router,
+    chat_router,
+    documents_router,
+)
+from app.features.chat.chat_repository import ChatRepository
+from app.llm_functions.Checkpointer import init_checkpointer, close_checkpointer
+from app.llm_functions.AgentLLM import warmup_agent_llms
+from app.llm_functions.MCPManager import init_mcp_manager, close_mcp_manager
+from app.llm_functions.ToolCache import init_tool_cache, close_tool_cache
+from app.llm_functions.GuardrailCache import init_guardrail_cache, close_guardrail_cache
+from app.llm_functions.GuardrailClassifier import init_guardrail_classifier
+from app.llm_functions.GuardrailBatcher import init_guardrail_batcher
+from app.core.utils import get_logger, init_http_pool, close_http_pool, OverloadedException
+
+logger = get_logger(__name__)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Application lifespan context manager."""
+    # Startup
+    logger.info(f"Starting {settings.app_name}")
+    
+    # Initialize database
+    init_db()
+
+    # Build chat_sessions for chats created before the table existed
+    async with async_unit_of_work():
+        await ChatRepository().backfill_chat_sessions()
+
+    # Open the shared outbound HTTP connection pool
+    init_http_pool()
+
+    # Open the LangGraph checkpointer
+    await init_checkpointer()
+
+    # Open the tool result and guardrail verdict caches
+    await init_tool_cache()
+    await init_guardrail_cache()
+
+    # Decide confident guardrail cases locally, batch the rest
+    init_guardrail_classifier()
+    init_guardrail_batcher()
+
+    # Build the agent's chat model clients once, before the first request
+    warmup_agent_llms()
+
+    # Start the MCP servers once and keep their sessions open
+    if settings.mcp_enabled:
+        try:
+            await init_mcp_manager()
+        except Exception as e:
+            logger.error(f"Failed to start MCP connection manager: {str(e)}", exc_info=True)
+    
+    # Initialize observability (Phoenix + OpenTelemetry)
+    initialize_observability()
+
+    yield
+
+    # Shutdown
+    logger.info(f"Shutting down {settings.app_name}")
+    
+    # Shutdown observability
+    shutdown_observability()
+    
+    # Close checkpointer
+    await close_checkpointer()
+    
+    # Stop MCP sessions and server processes
+    await close_mcp_manager()
+
+    # Close the tool result and guardrail verdict caches
+    await close_tool_cache()
+    await close_guardrail_cache()
+    
+    # Close outbound HTTP connections
+    await close_http_pool()
+    
+    # Close database
+    await close_async_db()
+    close_db()
+
+
+async def overloaded_handler(request: Request, exc: OverloadedException) -> JSONResponse:
+    """Shed requests with 503 and a Retry-After hint."""
+    return JSONResponse(
+        status_code=exc.status_code,
+        content={"detail": exc.message},
+        headers={"Retry-After": str(math.ceil(exc.retry_after))}
+    )
+
+
+def create_app() -> FastAPI:
+    """
+    Create and configure FastAPI application.
+
+    Returns:
+        Configured FastAPI instance
+    """
+    app = FastAPI(
+        title=settings.api_title,
+        description=settings.api_description,
+        version=settings.app_version,
+        debug=settings.debug,
+        lifespan=lifespan,
+    )
+
+    # Add CORS middleware
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=["*"],
+        allow_credentials=True,
+        allow_methods=["*"],
+        allow_headers=["*"],
+        expose_headers=["*"]
+    )
+
+    # Add authentication middleware
+    app.add_middleware(AuthMiddleware)
+
+    # Add unit of work middleware (outermost, so auth shares the request's session)
+    app.add_middleware(UnitOfWorkMiddleware)
+
+    # Requests shed by admission control
+    app.add_exception_handler(OverloadedException, overloaded_handler)
+
+    # Include routers
+    app.include_router(auth_router, prefix=settings.api_prefix)
+    app.include_router(users_router, prefix=settings.api_prefix)
+    app.include_router(chat_router, prefix=settings.api_prefix)
+    app.include_router(documents_router, prefix=settings.api_prefix)
+
+    logger.info("FastAPI application created successfully")
+    return app
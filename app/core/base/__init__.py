@@ -1,8 +1,18 @@
-"""
-Core Base Module - Base classes for entities and repositories
-"""
-
-from .entity import Base, BaseEntity
-from .repository import BaseRepository
-
-__all__ = ["Base", "BaseEntity", "BaseRepository"]
+"""
+Core Base Module - Base classes for entities and repositories
+"""
+
+from .entity import Base, BaseEntity
+from .repository import BaseRepository, AsyncBaseRepository
+from .sequence import IdSequence, SequenceAllocator, get_sequence, next_id
+
+__all__ = [
+    "Base",
+    "BaseEntity",
+    "BaseRepository",
+    "AsyncBaseRepository",
+    "IdSequence",
+    "SequenceAllocator",
+    "get_sequence",
+    "next_id",
+]
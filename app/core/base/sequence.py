@@ -0,0 +1,120 @@
+"""
+Sequence Allocator - Collision-free integer IDs shared across workers
+"""
+
+import asyncio
+from typing import Awaitable, Callable, Dict, Optional
+from sqlalchemy import Column, String, BigInteger, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.base.entity import Base
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.core.utils import get_logger
+
+logger = get_logger(__name__)
+
+
+class IdSequence(Base):
+    """Named sequence row: next_value is the first ID not yet handed out."""
+
+    __tablename__ = "id_sequences"
+
+    name = Column(String(100), primary_key=True)
+    next_value = Column(BigInteger, nullable=False)
+
+    def __repr__(self):
+        return f"<IdSequence(name={self.name}, next_value={self.next_value})>"
+
+
+class SequenceAllocator:
+    """
+    Hands out unique, increasing integer IDs for one named sequence.
+
+    IDs are reserved from the id_sequences table in blocks (hi/lo): a single
+    atomic UPDATE ... RETURNING reserves block_size IDs, which are then served
+    from memory. Every reservation is one row-level atomic update, so any
+    number of workers or hosts sharing the database never get the same ID.
+    IDs left in a block when a process exits are skipped, never reused.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        block_size: Optional[int] = None,
+        seed: Optional[Callable[[AsyncSession], Awaitable[Optional[int]]]] = None
+    ):
+        """
+        Args:
+            name: Sequence name
+            block_size: IDs reserved per database round trip
+            seed: Returns the highest ID already in use; only called when the
+                sequence row does not exist yet (e.g. migrating existing data)
+        """
+        self.name = name
+        self.block_size = block_size or settings.id_sequence_block_size
+        self.seed = seed
+        self._next = 0
+        self._limit = 0
+        self._lock = asyncio.Lock()
+
+    async def next_id(self) -> int:
+        """Get the next ID of the sequence."""
+        async with self._lock:
+            if self._next >= self._limit:
+                self._next, self._limit = await self._reserve_block()
+            value = self._next
+            self._next += 1
+            return value
+
+    async def _reserve_block(self) -> tuple[int, int]:
+        """Reserve the next block of IDs, creating the sequence row on first use."""
+        async with AsyncSessionLocal() as db:
+            while True:
+                limit = await db.scalar(
+                    update(IdSequence)
+                    .where(IdSequence.name == self.name)
+                    .values(next_value=IdSequence.next_value + self.block_size)
+                    .returning(IdSequence.next_value)
+                    .execution_options(synchronize_session=False)
+                )
+                if limit is not None:
+                    await db.commit()
+                    return limit - self.block_size, limit
+
+                await db.rollback()
+                start = ((await self.seed(db)) or 0) + 1 if self.seed else 1
+                db.add(IdSequence(name=self.name, next_value=start))
+                try:
+                    await db.commit()
+                    logger.info(f"Created id sequence '{self.name}' starting at {start}")
+                except IntegrityError:
+                    # Another worker created it first; reserve from its row
+                    await db.rollback()
+
+
+_sequences: Dict[str, SequenceAllocator] = {}
+
+
+def get_sequence(
+    name: str,
+    seed: Optional[Callable[[AsyncSession], Awaitable[Optional[int]]]] = None
+) -> SequenceAllocator:
+    """
+    Get the process-wide allocator for a named sequence.
+
+    Args:
+        name: Sequence name
+        seed: See SequenceAllocator
+
+    Returns:
+        SequenceAllocator
+    """
+    if name not in _sequences:
+        _sequences[name] = SequenceAllocator(name, seed=seed)
+    return _sequences[name]
+
+
+async def next_id(name: str) -> int:
+    """Mint the next ID of a named sequence."""
+    return await get_sequence(name).next_id()
@@ -1,9 +1,9 @@
-"""
-Core Config Module
-"""
-
-from .settings import Settings
-
-settings = Settings()
-
-__all__ = ["settings"]
+"""
+Core Config Module
+"""
+
+from .settings import Settings
+
+settings = Settings()
+
+__all__ = ["settings"]
@@ -1,91 +1,175 @@
-"""
-Application settings and configuration
-"""
-
-from pydantic_settings import BaseSettings
-from typing import Optional
-import os
-
-
-class Settings(BaseSettings):
-    """Application configuration settings."""
-
-    # Application settings
-    app_name: str = "Chat Application"
-    app_version: str = "0.1.0"
-    debug: bool = True
-    environment: str = "development"
-
-    # API settings
-    api_prefix: str = "/api/v1"
-    api_title: str = "Chat Application API"
-    api_description: str = "FastAPI Chat Application with Agent Pipeline"
-
-    # Database settings
-    database_url: str = ""
-    echo_sql: bool = False
-
-    # LLM settings
-    API_ENDPOINT: str = ""
-    API_KEY: str = ""
-    MODEL_CHAT_BASIC: str = ""
-    MODEL_CHAT_MOD: str = ""
-    MODEL_CHAT_OPEN: str = ""
-    MODEL_REASONING: str = ""
-    MODEL_VISION: str = ""
-    MODEL_EMBEDDING: str = ""
-    MODEL_AUDIO: str = ""
-
-    # Embedding settings
-    embedding_provider: str = "openai"
-    embedding_model: str = "text-embedding-3-small"
-
-    # Authentication settings
-    secret_key: str = ""
-    algorithm: str = "HS256"
-    access_token_expire_minutes: int = 30
-
-    # LangGraph settings
-    max_iterations: int = 10
-    timeout: int = 300
-
-    # File upload settings
-    upload_directory: str = "./uploads"
-    max_upload_size: int = 10 * 1024 * 1024  # 10MB
-    allowed_file_types: list = [".pdf", ".txt", ".doc", ".docx"]
-
-    # Logging settings
-    log_directory: str = "./logs"
-    log_level: str = "INFO"
-
-
-    # CORS settings
-    cors_origins: list = ["*"]
-    cors_credentials: bool = True
-    cors_methods: list = ["*"]
-    cors_headers: list = ["*"]
-
-    # Excluded routes from authentication
-    auth_excluded_routes: list = ["/health", "/api/v1/auth/login","/api/v1/chat/ws"]
-
-    # Observability settings
-    enable_observability: bool = True
-    phoenix_host: str = "localhost"
-    phoenix_port: int = 6006
-    trace_retention_days: int = 7
-    enable_pii_redaction: bool = False  # Set to True in production
-    observability_sample_rate: float = 1.0  # 1.0 = 100% of requests
-    phoenix_collector_endpoint: str = "http://localhost:6006"
-    SERPER_API_KEY:str=""
-    class Config:
-        env_file = ".env"
-        env_file_encoding = "utf-8"
-        case_sensitive = False
-
-
-# Global settings instance
-settings = Settings()
-
-# Ensure directories exist
-os.makedirs(settings.log_directory, exist_ok=True)
-os.makedirs(settings.upload_directory, exist_ok=True)
+"""
+Application settings and configuration
+"""
+
+from pydantic_settings import BaseSettings
+from typing import Optional
+import os
+
+
+class Settings(BaseSettings):
+    """Application configuration settings."""
+
+    # Application settings
+    app_name: str = "Chat Application"
+    app_version: str = "0.1.0"
+    debug: bool = True
+    environment: str = "development"
+
+    # API settings
+    api_prefix: str = "/api/v1"
+    api_title: str = "Chat Application API"
+    api_description: str = "FastAPI Chat Application with Agent Pipeline"
+
+    # Database settings
+    database_url: str = ""
+    echo_sql: bool = False
+    id_sequence_block_size: int = 20  # IDs reserved per sequence round trip
+    chat_history_stream_batch_size: int = 500  # Rows fetched per query when streaming history
+
+    # LLM settings
+    API_ENDPOINT: str = ""
+    API_KEY: str = ""
+    MODEL_CHAT_BASIC: str = ""
+    MODEL_CHAT_MOD: str = ""
+    MODEL_CHAT_OPEN: str = ""
+    MODEL_REASONING: str = ""
+    MODEL_VISION: str = ""
+    MODEL_EMBEDDING: str = ""
+    MODEL_AUDIO: str = ""
+
+    # Outbound HTTP pool settings (shared by LLM providers, embeddings and tools)
+    http_max_connections: int = 100
+    http_max_keepalive_connections: int = 20
+    http_keepalive_expiry: float = 30.0  # Seconds an idle connection is kept open
+    http_http2: bool = True  # Only used if the 'h2' package is installed
+    http_timeout: float = 60.0
+    http_connect_timeout: float = 5.0
+    http_host_timeouts: dict = {"google.serper.dev": 10.0}  # Per-host overrides, in seconds
+    http_verify_ssl: bool = True  # Set False only to opt out explicitly (e.g. a local proxy with a self-signed cert)
+
+    # Embedding settings
+    embedding_provider: str = "openai"
+    embedding_model: str = "text-embedding-3-small"
+
+    # Authentication settings
+    secret_key: str = ""
+    algorithm: str = "HS256"
+    access_token_expire_minutes: int = 30
+
+    # LangGraph settings
+    max_iterations: int = 10  # Model turns of a tool-calling loop (and steps of the agent graph)
+    timeout: int = 300  # Deadline of one agent run in seconds, shared by all its LLM and tool calls
+    speculative_synthesis: bool = False  # Start synthesis concurrently with the guardrail, released on "pass"
+    tool_timeout_seconds: float = 30.0  # Per tool call, unless the tool sets its own "timeout"
+    tool_output_token_budget: int = 1000  # Tool output sent to the model, unless the tool sets "token_budget"
+    tool_cache_enabled: bool = True  # Cache results of tools with a "cache_ttl" in toolsConfig
+    tool_cache_max_entries: int = 1024  # In-memory LRU tier
+    tool_cache_sqlite_path: str = "./tool_cache.db"  # Persistent tier; empty disables it
+
+    # MCP settings (persistent server sessions, see MCPManager)
+    mcp_enabled: bool = False  # No agent node calls MCP tools yet; enable when one does
+    mcp_config_path: str = "./app/llm_functions/mcp_config.json"
+    mcp_startup_timeout_seconds: float = 15.0
+    mcp_tool_wait_timeout_seconds: float = 2.0  # Wait for a restarting server before skipping its tools
+    mcp_health_check_interval_seconds: float = 30.0
+    mcp_health_check_timeout_seconds: float = 5.0
+    mcp_restart_backoff_seconds: float = 1.0
+    mcp_restart_backoff_max_seconds: float = 60.0
+    mcp_shutdown_timeout_seconds: float = 5.0
+    mcp_config_poll_interval_seconds: float = 5.0  # 0 disables reloading mcp_config_path on change
+    mcp_reload_drain_seconds: float = 10.0  # Replaced sessions stay open this long for in-flight calls
+
+    checkpoint_backend: str = "sqlite"  # "sqlite" or "memory"
+    checkpoint_sqlite_path: str = "./checkpoints.db"
+    checkpoint_memory_max_threads: int = 1000  # Threads kept by the memory backend (LRU)
+    checkpoint_ttl_seconds: int = 7 * 24 * 3600  # Idle threads older than this are pruned
+    checkpoint_prune_interval_seconds: int = 600
+    checkpoint_compress_min_bytes: int = 1024  # Checkpoint payloads above this are zlib-compressed
+
+    # Response cache (exact + semantic, see ResponseCache)
+    response_cache_enabled: bool = False  # Opt-in: answers are shared between users asking in identical conversations
+    response_cache_ttl_seconds: int = 900
+    response_cache_max_entries: int = 2048
+    response_cache_semantic_enabled: bool = True
+    response_cache_similarity_threshold: float = 0.95  # Cosine similarity needed to reuse an answer (if the query passes the guardrail)
+    response_cache_semantic_max_entries: int = 1024
+    response_cache_embedding_retry_seconds: float = 300.0  # Semantic tier pause after an embeddings failure
+
+    # Guardrail verdict cache (see GuardrailCache)
+    guardrail_cache_enabled: bool = True
+    guardrail_cache_ttl_seconds: int = 24 * 3600
+    guardrail_cache_max_entries: int = 4096
+    guardrail_cache_sqlite_path: str = "./guardrail_cache.db"  # Persistent tier; empty disables it
+
+    # Local guardrail classifier (see GuardrailClassifier)
+    guardrail_local_enabled: bool = True
+    guardrail_max_query_chars: int = 8000  # Longer inputs fail without asking the model
+    guardrail_blocklist: list = [
+        r"ignore (all |any )?(previous|prior|above) instructions",
+        r"disregard (the |your )?system prompt",
+        r"reveal (the |your )?system prompt",
+        r"\bdrop\s+table\b"
+    ]
+    guardrail_knn_neighbors: int = 5
+    guardrail_knn_min_similarity: float = 0.9  # Neighbours below this similarity do not vote
+    guardrail_knn_min_votes: int = 2  # Close neighbours needed (all failed) for a "fail" hint; the model still decides
+    guardrail_knn_max_examples: int = 5000
+    guardrail_shadow_rate: float = 0.05  # Share of local decisions re-checked by the model
+    guardrail_batch_enabled: bool = False  # Coalesce concurrent guardrail checks; each query keeps its own prompt (see GuardrailBatcher)
+    guardrail_batch_window_ms: float = 15.0  # Longest a check waits for others to join its batch
+    guardrail_batch_max_size: int = 16
+
+    # Admission control for agent runs (see AdmissionControl)
+    admission_max_concurrent: int = 16  # Agent runs executing at once
+    admission_max_queue: int = 64  # Runs waiting for a slot; more are rejected at once
+    admission_per_user_limit: int = 2  # Running + queued runs per user
+    admission_queue_timeout_seconds: float = 10.0  # Longest wait for a slot before rejecting
+
+    # Context window settings (prompt token budget per ModelCapability value)
+    context_token_budgets: dict = {"basic": 8000, "moderate": 16000, "reasoning": 16000, "high_perf": 32000, "vision": 16000}
+    context_token_budget_default: int = 8000
+    context_target_ratio: float = 0.6  # Window size kept after summarizing, as a share of the budget
+    context_summary_max_tokens: int = 400
+    context_history_max_messages: int = 100  # Messages read to hydrate a cold thread
+
+    # File upload settings
+    upload_directory: str = "./uploads"
+    max_upload_size: int = 10 * 1024 * 1024  # 10MB
+    allowed_file_types: list = [".pdf", ".txt", ".doc", ".docx"]
+
+    # Logging settings
+    log_directory: str = "./logs"
+    log_level: str = "INFO"
+
+
+    # CORS settings
+    cors_origins: list = ["*"]
+    cors_credentials: bool = True
+    cors_methods: list = ["*"]
+    cors_headers: list = ["*"]
+
+    # Excluded routes from authentication
+    auth_excluded_routes: list = ["/health", "/api/v1/auth/login","/api/v1/chat/ws"]
+
+    # Observability settings
+    enable_observability: bool = True
+    phoenix_host: str = "localhost"
+    phoenix_port: int = 6006
+    trace_retention_days: int = 7
+    enable_pii_redaction: bool = False  # Set to True in production
+    observability_sample_rate: float = 1.0  # 1.0 = 100% of requests
+    phoenix_collector_endpoint: str = "http://localhost:6006"
+    SERPER_API_KEY:str=""
+    class Config:
+        env_file = ".env"
+        env_file_encoding = "utf-8"
+        case_sensitive = False
+
+
+# Global settings instance
+settings = Settings()
+
+# Ensure directories exist
+os.makedirs(settings.log_directory, exist_ok=True)
+os.makedirs(settings.upload_directory, exist_ok=True)
@@ -1,7 +1,34 @@
-"""
-Database module initialization
-"""
-
-from .database import get_db, init_db, close_db, engine, SessionLocal
-
-__all__ = ["get_db", "init_db", "close_db", "engine", "SessionLocal"]
+"""
+Database module initialization
+"""
+
+from .database import (
+    get_db,
+    get_async_db,
+    init_db,
+    upgrade_schema,
+    close_db,
+    close_async_db,
+    engine,
+    async_engine,
+    SessionLocal,
+    AsyncSessionLocal,
+)
+from .unit_of_work import UnitOfWork, unit_of_work, async_unit_of_work, current_unit_of_work
+
+__all__ = [
+    "get_db",
+    "get_async_db",
+    "init_db",
+    "upgrade_schema",
+    "close_db",
+    "close_async_db",
+    "engine",
+    "async_engine",
+    "SessionLocal",
+    "AsyncSessionLocal",
+    "UnitOfWork",
+    "unit_of_work",
+    "async_unit_of_work",
+    "current_unit_of_work",
+]
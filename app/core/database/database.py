@@ -1,50 +1,133 @@
-"""
-Database initialization and session management
-"""
-
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker, Session
-from app.core.config import settings
-from app.core.utils import get_logger
-
-logger = get_logger(__name__)
-
-# Create engine
-engine = create_engine(
-    settings.database_url,
-    connect_args={"check_same_thread": False} if "sqlite" in settings.database_url else {},
-    echo=settings.echo_sql,
-)
-
-# Create session factory
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
-
-
-def get_db() -> Session:
-    """
-    Get database session.
-
-    Yields:
-        Database session
-    """
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
-
-
-def init_db():
-    """Initialize database, creating all tables."""
-    from app.core.base.entity import Base
-
-    logger.info("Initializing database...")
-    Base.metadata.create_all(bind=engine)
-    logger.info("Database initialized")
-
-
-def close_db():
-    """Close database connections."""
-    logger.info("Closing database connections...")
-    engine.dispose()
-    logger.info("Database connections closed")
+"""
+Database initialization and session management
+"""
+
+from sqlalchemy import create_engine, inspect
+from sqlalchemy.orm import sessionmaker, Session
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
+from app.core.config import settings
+from app.core.utils import get_logger
+
+logger = get_logger(__name__)
+
+# Async drivers used for each sync database URL scheme
+ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "postgresql": "postgresql+asyncpg",
+    "postgres": "postgresql+asyncpg",
+    "mysql": "mysql+aiomysql",
+}
+
+
+def get_async_database_url(database_url: str) -> str:
+    """
+    Map a sync database URL onto its async driver.
+
+    Args:
+        database_url: Database URL (e.g. sqlite:///./app.db)
+
+    Returns:
+        Database URL using the async driver (e.g. sqlite+aiosqlite:///./app.db)
+    """
+    scheme, sep, rest = database_url.partition("://")
+    if not sep:
+        return database_url
+    dialect = scheme.split("+")[0]
+    return f"{ASYNC_DRIVERS.get(dialect, scheme)}://{rest}"
+
+
+# Create engine
+engine = create_engine(
+    settings.database_url,
+    connect_args={"check_same_thread": False} if "sqlite" in settings.database_url else {},
+    echo=settings.echo_sql,
+)
+
+# Create session factory
+# expire_on_commit=True: committed objects are reloaded on next access instead of
+# pinning stale state in a shared (request-scoped) session
+SessionLocal = sessionmaker(autocommit=False, autoflush=False, expire_on_commit=True, bind=engine)
+
+# Create async engine (used by request paths running on the event loop)
+async_engine = create_async_engine(
+    get_async_database_url(settings.database_url),
+    echo=settings.echo_sql,
+)
+
+# Create async session factory
+# expire_on_commit=False: expired attributes would trigger implicit IO on access
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine,
+    class_=AsyncSession,
+    autoflush=False,
+    expire_on_commit=False,
+)
+
+
+def get_db() -> Session:
+    """
+    Get database session.
+
+    Yields:
+        Database session
+    """
+    db = SessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+async def get_async_db() -> AsyncSession:
+    """
+    Get async database session.
+
+    Yields:
+        Async database session
+    """
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+def init_db():
+    """Initialize database, creating all tables."""
+    from app.core.base.entity import Base
+
+    logger.info("Initializing database...")
+    Base.metadata.create_all(bind=engine)
+    upgrade_schema()
+    logger.info("Database initialized")
+
+
+def upgrade_schema():
+    """
+    Create indexes declared on entities that an existing database lacks.
+
+    create_all only creates missing tables, so indexes added to an entity
+    after its table was first created would never reach existing databases.
+    """
+    from app.core.base.entity import Base
+
+    inspector = inspect(engine)
+    for table in Base.metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
+        existing = {index["name"] for index in inspector.get_indexes(table.name)}
+        for index in table.indexes:
+            if index.name not in existing:
+                logger.info(f"Creating missing index {index.name} on {table.name}")
+                index.create(bind=engine)
+
+
+def close_db():
+    """Close database connections."""
+    logger.info("Closing database connections...")
+    engine.dispose()
+    logger.info("Database connections closed")
+
+
+async def close_async_db():
+    """Close async database connections."""
+    logger.info("Closing async database connections...")
+    await async_engine.dispose()
+    logger.info("Async database connections closed")
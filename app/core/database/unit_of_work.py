@@ -0,0 +1,121 @@
+"""
+Unit of work - request-scoped database sessions
+
+A unit of work shares one session between every repository used within its
+scope (one HTTP request, one WebSocket message) and closes it
+deterministically when the scope ends. Sessions are created lazily, so
+scopes that never touch the database never open one.
+"""
+
+from contextlib import contextmanager, asynccontextmanager
+from contextvars import ContextVar
+from typing import Optional
+from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.database.database import SessionLocal, AsyncSessionLocal
+
+
+class UnitOfWork:
+    """Lazily created sync and async sessions shared within one scope."""
+
+    def __init__(self):
+        self._session: Optional[Session] = None
+        self._async_session: Optional[AsyncSession] = None
+
+    @property
+    def session(self) -> Session:
+        """Get or create the scope's sync session."""
+        if self._session is None:
+            self._session = SessionLocal()
+        return self._session
+
+    @property
+    def async_session(self) -> AsyncSession:
+        """Get or create the scope's async session."""
+        if self._async_session is None:
+            self._async_session = AsyncSessionLocal()
+        return self._async_session
+
+    def rollback(self):
+        """Roll back the sync session if one was opened."""
+        if self._session is not None:
+            self._session.rollback()
+
+    async def arollback(self):
+        """Roll back both sessions if they were opened."""
+        self.rollback()
+        if self._async_session is not None:
+            await self._async_session.rollback()
+
+    def close(self):
+        """Close the sync session if one was opened."""
+        if self._session is not None:
+            self._session.close()
+            self._session = None
+
+    async def aclose(self):
+        """Close both sessions if they were opened."""
+        self.close()
+        if self._async_session is not None:
+            await self._async_session.close()
+            self._async_session = None
+
+
+_current_uow: ContextVar[Optional[UnitOfWork]] = ContextVar("current_unit_of_work", default=None)
+
+
+def current_unit_of_work() -> Optional[UnitOfWork]:
+    """Get the unit of work of the current scope, if any."""
+    return _current_uow.get()
+
+
+@contextmanager
+def unit_of_work():
+    """
+    Open a sync unit of work for the current scope.
+    Nested scopes reuse the outer unit of work.
+
+    Yields:
+        UnitOfWork
+    """
+    existing = _current_uow.get()
+    if existing is not None:
+        yield existing
+        return
+
+    uow = UnitOfWork()
+    token = _current_uow.set(uow)
+    try:
+        yield uow
+    except Exception:
+        uow.rollback()
+        raise
+    finally:
+        _current_uow.reset(token)
+        uow.close()
+
+
+@asynccontextmanager
+async def async_unit_of_work():
+    """
+    Open a unit of work for the current async scope (sync and async sessions).
+    Nested scopes reuse the outer unit of work.
+
+    Yields:
+        UnitOfWork
+    """
+    existing = _current_uow.get()
+    if existing is not None:
+        yield existing
+        return
+
+    uow = UnitOfWork()
+    token = _current_uow.set(uow)
+    try:
+        yield uow
+    except BaseException:
+        await uow.arollback()
+        raise
+    finally:
+        _current_uow.reset(token)
+        await uow.aclose()
@@ -1,35 +1,51 @@
-"""
-Utilities module
-"""
-
-from .logger import get_logger
-from .exceptions import (
-    AppException,
-    ValidationException,
-    DatabaseException,
-    LLMException,
-    AgentException,
-    NotFoundException,
-)
-from .observability import (
-    trace_llm_operation,
-    trace_llm_call,
-    add_span_attributes,
-    record_llm_metrics,
-    obs_manager,
-)
-
-__all__ = [
-    "get_logger",
-    "AppException",
-    "ValidationException",
-    "DatabaseException",
-    "LLMException",
-    "AgentException",
-    "NotFoundException",
-    "trace_llm_operation",
-    "trace_llm_call",
-    "add_span_attributes",
-    "record_llm_metrics",
-    "obs_manager",
-]
+"""
+Utilities module
+"""
+
+from .logger import get_logger
+from .exceptions import (
+    AppException,
+    ValidationException,
+    DatabaseException,
+    LLMException,
+    AgentException,
+    NotFoundException,
+    DeadlineExceededException,
+    OverloadedException,
+)
+from .observability import (
+    trace_llm_operation,
+    trace_llm_call,
+    add_span_attributes,
+    record_llm_metrics,
+    obs_manager,
+)
+from .http_pool import (
+    get_async_http_client,
+    get_http_client,
+    init_http_pool,
+    close_http_pool,
+    get_http_pool_stats,
+)
+
+__all__ = [
+    "get_logger",
+    "AppException",
+    "ValidationException",
+    "DatabaseException",
+    "LLMException",
+    "AgentException",
+    "NotFoundException",
+    "DeadlineExceededException",
+    "OverloadedException",
+    "trace_llm_operation",
+    "trace_llm_call",
+    "add_span_attributes",
+    "record_llm_metrics",
+    "obs_manager",
+    "get_async_http_client",
+    "get_http_client",
+    "init_http_pool",
+    "close_http_pool",
+    "get_http_pool_stats",
+]
@@ -0,0 +1,150 @@
+"""
+Two-tier TTL cache: an in-memory LRU in front of an optional SQLite table.
+
+The memory tier answers repeated lookups within the process; the SQLite
+tier survives restarts and is shared by every worker using the same file.
+Values must be JSON-serializable. Entries expire after their own TTL in
+both tiers, and a disk hit is promoted to memory for its remaining TTL.
+"""
+
+import json
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Optional
+import aiosqlite
+from app.core.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# Returned by get() when a key is absent or expired (None is a valid value)
+MISSING = object()
+
+
+class TTLCache:
+    """In-memory LRU cache with a per-entry expiry time."""
+
+    def __init__(self, max_entries: int = 1024):
+        self.max_entries = max_entries
+        self._entries: OrderedDict = OrderedDict()
+
+    def get(self, key: str) -> Any:
+        entry = self._entries.get(key)
+        if entry is None:
+            return MISSING
+        value, expires_at = entry
+        if expires_at <= time.time():
+            del self._entries[key]
+            return MISSING
+        self._entries.move_to_end(key)
+        return value
+
+    def set(self, key: str, value: Any, ttl: float, expires_at: Optional[float] = None) -> None:
+        self._entries[key] = (value, expires_at if expires_at is not None else time.time() + ttl)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class SqliteCache:
+    """Persistent TTL cache table in a SQLite file."""
+
+    def __init__(self, path: str, table: str = "cache"):
+        self.path = path
+        self.table = table
+        self._conn: Optional[aiosqlite.Connection] = None
+
+    async def open(self) -> None:
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = await aiosqlite.connect(self.path)
+        await self._conn.execute("PRAGMA journal_mode=WAL")
+        await self._conn.execute(
+            f"CREATE TABLE IF NOT EXISTS {self.table} "
+            "(key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)"
+        )
+        await self._conn.commit()
+
+    async def close(self) -> None:
+        if self._conn is not None:
+            await self._conn.close()
+            self._conn = None
+
+    async def get(self, key: str):
+        """(value, expires_at) for a live entry, or MISSING."""
+        async with self._conn.execute(
+            f"SELECT value, expires_at FROM {self.table} WHERE key = ? AND expires_at > ?",
+            (key, time.time())
+        ) as cursor:
+            row = await cursor.fetchone()
+        if row is None:
+            return MISSING
+        return json.loads(row[0]), row[1]
+
+    async def set(self, key: str, value: Any, ttl: float) -> None:
+        await self._conn.execute(
+            f"INSERT OR REPLACE INTO {self.table} (key, value, expires_at) VALUES (?, ?, ?)",
+            (key, json.dumps(value), time.time() + ttl)
+        )
+        await self._conn.commit()
+
+    async def prune_expired(self) -> int:
+        cursor = await self._conn.execute(f"DELETE FROM {self.table} WHERE expires_at <= ?", (time.time(),))
+        await self._conn.commit()
+        return cursor.rowcount
+
+
+class TieredCache:
+    """Memory tier in front of an optional SQLite tier, with hit counters."""
+
+    def __init__(self, memory: TTLCache, disk: Optional[SqliteCache] = None):
+        self.memory = memory
+        self.disk = disk
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    async def get(self, key: str) -> Any:
+        value = self.memory.get(key)
+        if value is not MISSING:
+            self.memory_hits += 1
+            return value
+        if self.disk is not None:
+            try:
+                entry = await self.disk.get(key)
+            except Exception as e:
+                logger.warning(f"Cache disk tier read failed: {str(e)}")
+                entry = MISSING
+            if entry is not MISSING:
+                value, expires_at = entry
+                self.memory.set(key, value, 0, expires_at=expires_at)
+                self.disk_hits += 1
+                return value
+        self.misses += 1
+        return MISSING
+
+    async def set(self, key: str, value: Any, ttl: float) -> None:
+        self.memory.set(key, value, ttl)
+        if self.disk is not None:
+            try:
+                await self.disk.set(key, value, ttl)
+            except Exception as e:
+                logger.warning(f"Cache disk tier write failed: {str(e)}")
+
+    def stats(self) -> dict:
+        lookups = self.memory_hits + self.disk_hits + self.misses
+        return {
+            "entries": len(self.memory),
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": round((self.memory_hits + self.disk_hits) / lookups, 4) if lookups else 0.0,
+            "persistent": self.disk is not None
+        }
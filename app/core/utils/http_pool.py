@@ -0,0 +1,196 @@
+"""
+Shared HTTP connection pool for outbound traffic (LLM providers, embeddings, tools).
+
+One httpx.AsyncClient (plus a sync httpx.Client for SDKs that require one)
+is opened at application startup and reused by every caller, so TCP/TLS
+connections are kept alive between requests instead of being set up per
+call. Requests go through a metered transport that applies per-host
+timeouts and counts requests, errors and in-flight calls.
+"""
+
+import importlib.util
+import time
+from typing import Optional
+import httpx
+from app.core.config import settings
+from app.core.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+class PoolMetrics:
+    """Counters shared by the sync and async transports."""
+
+    def __init__(self):
+        self.requests = 0
+        self.errors = 0
+        self.in_flight = 0
+        self.total_duration_ms = 0.0
+        self.by_host = {}
+
+    def start(self, request: httpx.Request) -> float:
+        self.requests += 1
+        self.in_flight += 1
+        host = request.url.host
+        self.by_host[host] = self.by_host.get(host, 0) + 1
+        return time.perf_counter()
+
+    def finish(self, started: float, failed: bool) -> None:
+        self.in_flight -= 1
+        self.total_duration_ms += (time.perf_counter() - started) * 1000
+        if failed:
+            self.errors += 1
+
+    def as_dict(self) -> dict:
+        completed = self.requests - self.in_flight
+        return {
+            "requests": self.requests,
+            "errors": self.errors,
+            "in_flight": self.in_flight,
+            "avg_duration_ms": round(self.total_duration_ms / completed, 2) if completed else 0.0,
+            "by_host": dict(self.by_host)
+        }
+
+
+def _host_timeouts() -> dict:
+    """Per-host timeout overrides from settings.http_host_timeouts (host -> seconds)."""
+    return {
+        host: httpx.Timeout(seconds, connect=settings.http_connect_timeout).as_dict()
+        for host, seconds in settings.http_host_timeouts.items()
+    }
+
+
+class MeteredAsyncTransport(httpx.AsyncBaseTransport):
+    """Async transport applying per-host timeouts and recording pool metrics."""
+
+    def __init__(self, transport: httpx.AsyncHTTPTransport, metrics: PoolMetrics, host_timeouts: dict):
+        self._transport = transport
+        self._metrics = metrics
+        self._host_timeouts = host_timeouts
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        timeout = self._host_timeouts.get(request.url.host)
+        if timeout is not None:
+            request.extensions["timeout"] = timeout
+        started = self._metrics.start(request)
+        failed = True
+        try:
+            response = await self._transport.handle_async_request(request)
+            failed = response.status_code >= 500
+            return response
+        finally:
+            self._metrics.finish(started, failed)
+
+    async def aclose(self) -> None:
+        await self._transport.aclose()
+
+
+class MeteredTransport(httpx.BaseTransport):
+    """Sync counterpart of MeteredAsyncTransport."""
+
+    def __init__(self, transport: httpx.HTTPTransport, metrics: PoolMetrics, host_timeouts: dict):
+        self._transport = transport
+        self._metrics = metrics
+        self._host_timeouts = host_timeouts
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        timeout = self._host_timeouts.get(request.url.host)
+        if timeout is not None:
+            request.extensions["timeout"] = timeout
+        started = self._metrics.start(request)
+        failed = True
+        try:
+            response = self._transport.handle_request(request)
+            failed = response.status_code >= 500
+            return response
+        finally:
+            self._metrics.finish(started, failed)
+
+    def close(self) -> None:
+        self._transport.close()
+
+
+_async_client: Optional[httpx.AsyncClient] = None
+_sync_client: Optional[httpx.Client] = None
+_metrics = PoolMetrics()
+
+
+def _http2_enabled() -> bool:
+    """HTTP/2 needs the optional 'h2' package; fall back to HTTP/1.1 without it."""
+    return settings.http_http2 and importlib.util.find_spec("h2") is not None
+
+
+def _client_options() -> dict:
+    return {
+        "limits": httpx.Limits(
+            max_connections=settings.http_max_connections,
+            max_keepalive_connections=settings.http_max_keepalive_connections,
+            keepalive_expiry=settings.http_keepalive_expiry
+        ),
+        "verify": settings.http_verify_ssl,
+        "http2": _http2_enabled()
+    }
+
+
+def get_async_http_client() -> httpx.AsyncClient:
+    """Get the shared async client (created on first use if the lifespan has not run)."""
+    global _async_client
+    if _async_client is None or _async_client.is_closed:
+        _async_client = httpx.AsyncClient(
+            transport=MeteredAsyncTransport(httpx.AsyncHTTPTransport(**_client_options()), _metrics, _host_timeouts()),
+            timeout=httpx.Timeout(settings.http_timeout, connect=settings.http_connect_timeout)
+        )
+    return _async_client
+
+
+def get_http_client() -> httpx.Client:
+    """Get the shared sync client, for SDKs that only accept a sync httpx.Client."""
+    global _sync_client
+    if _sync_client is None or _sync_client.is_closed:
+        _sync_client = httpx.Client(
+            transport=MeteredTransport(httpx.HTTPTransport(**_client_options()), _metrics, _host_timeouts()),
+            timeout=httpx.Timeout(settings.http_timeout, connect=settings.http_connect_timeout)
+        )
+    return _sync_client
+
+
+def init_http_pool() -> None:
+    """Open the shared HTTP clients."""
+    if settings.http_http2 and not _http2_enabled():
+        logger.warning("HTTP/2 requested but the 'h2' package is not installed, using HTTP/1.1")
+    get_async_http_client()
+    get_http_client()
+    logger.info(
+        f"HTTP pool initialized (max_connections={settings.http_max_connections}, "
+        f"http2={_http2_enabled()})"
+    )
+
+
+async def close_http_pool() -> None:
+    """Close the shared HTTP clients and their connections."""
+    global _async_client, _sync_client
+    if _async_client is not None:
+        await _async_client.aclose()
+        _async_client = None
+    if _sync_client is not None:
+        _sync_client.close()
+        _sync_client = None
+
+
+def _connection_counts(client) -> dict:
+    pool = getattr(getattr(client._transport, "_transport", None), "_pool", None) if client else None
+    connections = list(getattr(pool, "connections", []) or [])
+    return {
+        "connections": len(connections),
+        "idle_connections": sum(1 for c in connections if c.is_idle())
+    }
+
+
+def get_http_pool_stats() -> dict:
+    """Request counters and open/idle connections of the shared pool."""
+    return {
+        **_metrics.as_dict(),
+        "async_pool": _connection_counts(_async_client),
+        "sync_pool": _connection_counts(_sync_client),
+        "http2": _http2_enabled()
+    }
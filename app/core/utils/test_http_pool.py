@@ -0,0 +1,34 @@
+# tests for the shared outbound HTTP pool
+import httpx
+import pytest
+from app.core.utils.http_pool import MeteredAsyncTransport, PoolMetrics
+
+
+# ----------------------------------------------------
+# Test Case 1: Per-host timeouts are applied and requests are metered
+# ----------------------------------------------------
+@pytest.mark.asyncio
+async def test_metered_transport_applies_host_timeouts():
+    seen = {}
+
+    def handler(request):
+        seen[request.url.host] = request.extensions["timeout"]
+        return httpx.Response(503 if request.url.path == "/down" else 200)
+
+    metrics = PoolMetrics()
+    host_timeouts = {"search.example": httpx.Timeout(2.0).as_dict()}
+    async with httpx.AsyncClient(
+        transport=MeteredAsyncTransport(httpx.MockTransport(handler), metrics, host_timeouts),
+        timeout=30.0
+    ) as client:
+        await client.get("https://search.example/q")
+        await client.get("https://llm.example/v1")
+        await client.get("https://llm.example/down")
+
+    # ASSERT 1: the override only applies to its host
+    assert seen["search.example"]["read"] == 2.0
+    assert seen["llm.example"]["read"] == 30.0
+    # ASSERT 2: requests, 5xx errors and hosts are counted
+    stats = metrics.as_dict()
+    assert stats["requests"] == 3 and stats["errors"] == 1 and stats["in_flight"] == 0
+    assert stats["by_host"] == {"search.example": 1, "llm.example": 2}
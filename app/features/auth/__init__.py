@@ -1,8 +1,8 @@
-"""
-Auth Feature - Authentication (JWT, login, register, password utilities)
-"""
-
-from .jwt import create_access_token, verify_token, get_user_id_from_token
-from .auth_route import router
-
-__all__ = ["router", "create_access_token", "verify_token", "get_user_id_from_token"]
+"""
+Auth Feature - Authentication (JWT, login, register, password utilities)
+"""
+
+from .jwt import create_access_token, verify_token, get_user_id_from_token
+from .auth_route import router
+
+__all__ = ["router", "create_access_token", "verify_token", "get_user_id_from_token"]
@@ -1,46 +1,46 @@
-"""
-Authentication utilities
-"""
-
-import bcrypt
-from fastapi import HTTPException, status, Request
-from app.core.utils import get_logger
-
-logger = get_logger(__name__)
-
-
-def get_current_user(request: Request):
-    """Get the current user from the request state."""
-    user = getattr(request.state, "user", None)
-    if not user:
-        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Not authenticated")
-    return user
-
-
-def hash_password(password: str) -> str:
-    """
-    Hash a password using bcrypt.
-    
-    Args:
-        password: Plain text password
-        
-    Returns:
-        Hashed password
-    """
-    salt = bcrypt.gensalt()
-    hashed = bcrypt.hashpw(password.encode('utf-8'), salt)
-    return hashed.decode('utf-8')
-
-
-def verify_password(plain_password: str, hashed_password: str) -> bool:
-    """
-    Verify a password against its hash.
-    
-    Args:
-        plain_password: Plain text password to verify
-        hashed_password: Hashed password to check against
-        
-    Returns:
-        True if password matches, False otherwise
-    """
-    return bcrypt.checkpw(plain_password.encode('utf-8'), hashed_password.encode('utf-8'))
+"""
+Authentication utilities
+"""
+
+import bcrypt
+from fastapi import HTTPException, status, Request
+from app.core.utils import get_logger
+
+logger = get_logger(__name__)
+
+
+def get_current_user(request: Request):
+    """Get the current user from the request state."""
+    user = getattr(request.state, "user", None)
+    if not user:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Not authenticated")
+    return user
+
+
+def hash_password(password: str) -> str:
+    """
+    Hash a password using bcrypt.
+    
+    Args:
+        password: Plain text password
+        
+    Returns:
+        Hashed password
+    """
+    salt = bcrypt.gensalt()
+    hashed = bcrypt.hashpw(password.encode('utf-8'), salt)
+    return hashed.decode('utf-8')
+
+
+def verify_password(plain_password: str, hashed_password: str) -> bool:
+    """
+    Verify a password against its hash.
+    
+    Args:
+        plain_password: Plain text password to verify
+        hashed_password: Hashed password to check against
+        
+    Returns:
+        True if password matches, False otherwise
+    """
+    return bcrypt.checkpw(plain_password.encode('utf-8'), hashed_password.encode('utf-8'))
@@ -1,82 +1,82 @@
-"""
-JWT and authentication utilities
-"""
-
-from datetime import datetime, timedelta
-from typing import Optional
-import jwt
-from app.core.config import settings
-from app.core.utils import get_logger
-
-logger = get_logger(__name__)
-
-
-def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
-    """
-    Create JWT access token.
-
-    Args:
-        data: Data to encode in token
-        expires_delta: Token expiration time
-
-    Returns:
-        Encoded JWT token
-    """
-    to_encode = data.copy()
-    
-    if expires_delta:
-        expire = datetime.utcnow() + expires_delta
-    else:
-        expire = datetime.utcnow() + timedelta(minutes=settings.access_token_expire_minutes)
-
-    to_encode.update({"exp": expire})
-
-    encoded_jwt = jwt.encode(
-        to_encode,
-        settings.secret_key,
-        algorithm=settings.algorithm
-    )
-    
-    logger.info(f"Created access token for user: {data.get('sub')}")
-    return encoded_jwt
-
-
-def verify_token(token: str) -> Optional[dict]:
-    """
-    Verify and decode JWT token.
-
-    Args:
-        token: JWT token to verify
-
-    Returns:
-        Decoded token data or None if invalid
-    """
-    try:
-        payload = jwt.decode(
-            token,
-            settings.secret_key,
-            algorithms=[settings.algorithm]
-        )
-        return payload
-    except jwt.ExpiredSignatureError:
-        logger.warning("Token expired")
-        return None
-    except jwt.InvalidTokenError as e:
-        logger.warning(f"Invalid token: {str(e)}")
-        return None
-
-
-def get_user_id_from_token(token: str) -> Optional[int]:
-    """
-    Extract user ID from token.
-
-    Args:
-        token: JWT token
-
-    Returns:
-        User ID or None
-    """
-    payload = verify_token(token)
-    if payload:
-        return payload.get("sub")
-    return None
+"""
+JWT and authentication utilities
+"""
+
+from datetime import datetime, timedelta
+from typing import Optional
+import jwt
+from app.core.config import settings
+from app.core.utils import get_logger
+
+logger = get_logger(__name__)
+
+
+def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
+    """
+    Create JWT access token.
+
+    Args:
+        data: Data to encode in token
+        expires_delta: Token expiration time
+
+    Returns:
+        Encoded JWT token
+    """
+    to_encode = data.copy()
+    
+    if expires_delta:
+        expire = datetime.utcnow() + expires_delta
+    else:
+        expire = datetime.utcnow() + timedelta(minutes=settings.access_token_expire_minutes)
+
+    to_encode.update({"exp": expire})
+
+    encoded_jwt = jwt.encode(
+        to_encode,
+        settings.secret_key,
+        algorithm=settings.algorithm
+    )
+    
+    logger.info(f"Created access token for user: {data.get('sub')}")
+    return encoded_jwt
+
+
+def verify_token(token: str) -> Optional[dict]:
+    """
+    Verify and decode JWT token.
+
+    Args:
+        token: JWT token to verify
+
+    Returns:
+        Decoded token data or None if invalid
+    """
+    try:
+        payload = jwt.decode(
+            token,
+            settings.secret_key,
+            algorithms=[settings.algorithm]
+        )
+        return payload
+    except jwt.ExpiredSignatureError:
+        logger.warning("Token expired")
+        return None
+    except jwt.InvalidTokenError as e:
+        logger.warning(f"Invalid token: {str(e)}")
+        return None
+
+
+def get_user_id_from_token(token: str) -> Optional[int]:
+    """
+    Extract user ID from token.
+
+    Args:
+        token: JWT token
+
+    Returns:
+        User ID or None
+    """
+    payload = verify_token(token)
+    if payload:
+        return payload.get("sub")
+    return None
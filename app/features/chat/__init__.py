@@ -1,3 +1,3 @@
-from app.features.chat.chat_route import router as chat_router
-
-__all__ = ["chat_router"]
+from app.features.chat.chat_route import router as chat_router
+
+__all__ = ["chat_router"]
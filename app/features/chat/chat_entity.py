@@ -1,25 +1,53 @@
-"""
-Chat entity model
-"""
-
-from sqlalchemy import Column, Integer, String, Text, DateTime, JSON
-from app.core.base import BaseEntity
-from datetime import datetime
-
-class ChatMessage(BaseEntity):
-    """
-    Chat message entity.
-    Stores all messages for all chats.
-    chat_id groups messages into conversations.
-    """
-    __tablename__ = "chat_messages"
-
-    id = Column(Integer, primary_key=True, index=True)
-    chat_id = Column(Integer, index=True, nullable=False)
-    user_id = Column(Integer, nullable=False, index=True)  # No ForeignKey, just storing the ID
-    message_type = Column(String(50), nullable=False)  # user, bot, system, error
-    content = Column(Text, nullable=False)
-    metadata_info = Column(JSON, nullable=True)
-
-    def __repr__(self):
-        return f"<ChatMessage(id={self.id}, chat_id={self.chat_id}, type={self.message_type})>"
+"""
+Chat entity model
+"""
+
+from sqlalchemy import Column, Integer, String, Text, DateTime, JSON, Index
+from app.core.base import BaseEntity
+from datetime import datetime
+
+class ChatMessage(BaseEntity):
+    """
+    Chat message entity.
+    Stores all messages for all chats.
+    chat_id groups messages into conversations.
+    """
+    __tablename__ = "chat_messages"
+    __table_args__ = (
+        # Hot paths filter by chat/user and order by time; the composite
+        # indexes also cover plain chat_id/user_id lookups (leftmost prefix)
+        Index("ix_chat_messages_chat_id_created_at", "chat_id", "created_at"),
+        Index("ix_chat_messages_user_id_created_at", "user_id", "created_at"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    chat_id = Column(Integer, nullable=False)
+    user_id = Column(Integer, nullable=False)  # No ForeignKey, just storing the ID
+    message_type = Column(String(50), nullable=False)  # user, bot, system, error
+    content = Column(Text, nullable=False)
+    metadata_info = Column(JSON, nullable=True)
+
+    def __repr__(self):
+        return f"<ChatMessage(id={self.id}, chat_id={self.chat_id}, type={self.message_type})>"
+
+
+class ChatSession(BaseEntity):
+    """
+    Chat session entity.
+    One row per chat, maintained incrementally by ChatRepository.save_message
+    so the sessions sidebar never has to aggregate chat_messages.
+    """
+    __tablename__ = "chat_sessions"
+    __table_args__ = (
+        # Serves "sessions of a user, most recent first" including the keyset cursor
+        Index("ix_chat_sessions_user_id_last_update", "user_id", "last_update", "chat_id"),
+    )
+
+    chat_id = Column(Integer, primary_key=True, autoincrement=False)
+    user_id = Column(Integer, nullable=False)  # No ForeignKey, just storing the ID
+    preview = Column(String(50), nullable=False, default="")  # Start of the first message
+    message_count = Column(Integer, nullable=False, default=0)
+    last_update = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+    def __repr__(self):
+        return f"<ChatSession(chat_id={self.chat_id}, user_id={self.user_id}, messages={self.message_count})>"
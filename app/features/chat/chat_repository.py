@@ -1,206 +1,497 @@
-"""
-Chat repository implementation
-"""
-
-from typing import List, Optional, Dict, Any
-from sqlalchemy import func, distinct, desc
-from app.core.base import BaseRepository
-from app.features.chat.chat_entity import ChatMessage
-from app.core.utils import get_logger, NotFoundException
-from app.llm_functions.LLMCall import CallAgentGraph
-
-logger = get_logger(__name__)
-
-class ChatRepository(BaseRepository[ChatMessage]):
-    """Repository for ChatMessage entity with bot logic."""
-
-    def __init__(self):
-        super().__init__(ChatMessage)
-
-    def create_new_chat_id(self, user_id: int) -> int:
-        """Generate a new chat_id for the user."""
-        db = self._get_db()
-        # Find the max chat_id across the system or per user? 
-        # Usually chat_ids should be unique across system if we want simple /chat/{id}
-        # Let's make them unique across system for simplicity
-        max_id = db.query(func.max(ChatMessage.chat_id)).scalar()
-        return (max_id or 0) + 1
-
-    def verify_chat_ownership(self, chat_id: int, user_id: int) -> bool:
-        """Check if the chat belongs to the user."""
-        db = self._get_db()
-        # Check if there are any messages with this chat_id and user_id
-        # If no messages exist for this chat_id at all, it's valid (new chat potentially)
-        # But if messages exist, they must match user_id
-        
-        first_msg = db.query(ChatMessage).filter(ChatMessage.chat_id == chat_id).first()
-        if not first_msg:
-            return True # Chat doesn't exist yet, so ownership is fine (will be created)
-            
-        return first_msg.user_id == user_id
-
-    def save_message(self, chat_id: int, user_id: int, message_type: str, content: str, metadata_info: Dict = None) -> ChatMessage:
-        """Save a message to the database."""
-        db = self._get_db()
-        message = ChatMessage(
-            chat_id=chat_id,
-            user_id=user_id,
-            message_type=message_type,
-            content=content,
-            metadata_info=metadata_info or {}
-        )
-        db.add(message)
-        db.commit()
-        db.refresh(message)
-        return message
-
-    def get_chat_messages(self, chat_id: int, user_id: int, limit: int = 100) -> List[ChatMessage]:
-        """Get messages for a specific chat."""
-        if not self.verify_chat_ownership(chat_id, user_id):
-            raise NotFoundException(f"Chat {chat_id} not found or access denied")
-            
-        db = self._get_db()
-        return db.query(ChatMessage)\
-            .filter(ChatMessage.chat_id == chat_id)\
-            .order_by(ChatMessage.created_at.asc())\
-            .limit(limit)\
-            .all()
-
-    def get_user_chats(self, user_id: int) -> List[Dict[str, Any]]:
-        """Get all chat sessions for a user."""
-        db = self._get_db()
-        
-        # Get distinct chat_ids for the user
-        # This is a bit complex with SQLAlchemy to get the latest message for each chat
-        # Simplified: Get distinct chat_ids and their first message creation time
-        
-        subquery = db.query(
-            ChatMessage.chat_id,
-            func.max(ChatMessage.created_at).label('last_update')
-        ).filter(ChatMessage.user_id == user_id)\
-         .group_by(ChatMessage.chat_id)\
-         .subquery()
-         
-        results = db.query(subquery.c.chat_id, subquery.c.last_update)\
-            .order_by(subquery.c.last_update.desc())\
-            .all()
-            
-        chats = []
-        for r in results:
-            # Get the first message to use as title/preview
-            first_msg = db.query(ChatMessage)\
-                .filter(ChatMessage.chat_id == r.chat_id)\
-                .order_by(ChatMessage.created_at.asc())\
-                .first()
-                
-            chats.append({
-                "chat_id": r.chat_id,
-                "last_update": r.last_update,
-                "preview": first_msg.content[:50] + "..." if first_msg else "Empty chat"
-            })
-            
-        return chats
-
-    def delete_chat(self, chat_id: int, user_id: int):
-        """Delete all messages in a chat."""
-        if not self.verify_chat_ownership(chat_id, user_id):
-            raise NotFoundException(f"Chat {chat_id} not found or access denied")
-            
-        db = self._get_db()
-        db.query(ChatMessage).filter(ChatMessage.chat_id == chat_id).delete()
-        db.commit()
-
-    async def process_user_message(self, chat_id: int, user_id: int, content: str) -> ChatMessage:
-        """
-        Process a user message:
-        1. Save user message
-        2. Retrieve chat history
-        3. Convert to LangChain messages
-        4. Call LLM with history and chat_id
-        5. Save and return bot response
-        """
-        from app.core.utils import trace_llm_operation, add_span_attributes
-        from langchain_core.messages import HumanMessage, AIMessage
-        
-        with trace_llm_operation(
-            "chat.process_message",
-            attributes={
-                "chat.id": chat_id,
-                "chat.user_id": user_id,
-                "chat.message_length": len(content)
-            }
-        ):
-            # 1. Save user message
-            self.save_message(chat_id, user_id, "user", content)
-            
-            add_span_attributes({
-                "chat.step": "user_message_saved"
-            })
-            
-            try:
-                # 2. Retrieve recent chat history (last 20 messages for context)
-                db = self._get_db()
-                recent_messages = db.query(ChatMessage)\
-                    .filter(ChatMessage.chat_id == chat_id)\
-                    .order_by(ChatMessage.created_at.desc())\
-                    .limit(20)\
-                    .all()
-                
-                # 3. Convert DB messages to LangChain message format
-                history = []
-                for msg in recent_messages[:-1]:  # Exclude the just-saved user message
-                    if msg.message_type == "human":
-                        history.append(HumanMessage(content=msg.content))
-                    elif msg.message_type == "bot":
-                        history.append(AIMessage(content=msg.content))
-                    # Skip error messages in history
-                
-                add_span_attributes({
-                    "chat.step": "history_retrieved",
-                    "chat.history_size": len(history)
-                })
-                
-                # 4. Call LLM (Agent Graph) with chat_id and history
-                bot_response_text = await CallAgentGraph(
-                    query=content,
-                    chat_id=chat_id,
-                    history=history if history else None
-                )
-                
-                add_span_attributes({
-                    "chat.bot_response_length": len(bot_response_text),
-                    "chat.step": "llm_response_received"
-                })
-                
-                # 5. Save bot response
-                bot_message = self.save_message(
-                    chat_id, 
-                    user_id, 
-                    "bot", 
-                    bot_response_text
-                )
-                
-                add_span_attributes({
-                    "chat.step": "bot_message_saved",
-                    "chat.status": "success"
-                })
-                
-                return bot_message
-                
-            except Exception as e:
-                logger.error(f"Error in bot processing: {str(e)}", exc_info=True)
-                
-                add_span_attributes({
-                    "chat.step": "error",
-                    "chat.status": "error",
-                    "chat.error": str(e)
-                })
-                
-                # Save error message
-                error_msg = self.save_message(
-                    chat_id,
-                    user_id,
-                    "error",
-                    f"I encountered an error: {str(e)}"
-                )
-                return error_msg
+"""
+Chat repository implementation
+"""
+
+from datetime import datetime
+from functools import partial
+from typing import AsyncIterator, List, Optional, Dict, Any
+from sqlalchemy import func, distinct, desc, select, delete, update, insert, tuple_
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.exc import IntegrityError
+from app.core.base import AsyncBaseRepository, get_sequence
+from app.features.chat.chat_entity import ChatMessage, ChatSession
+from app.core.config import settings
+from app.core.utils import get_logger, NotFoundException
+from app.llm_functions.LLMCall import CallAgentGraph, StreamAgentGraph
+from app.llm_functions.AdmissionControl import get_admission_controller
+from app.llm_functions.Checkpointer import get_checkpointer
+
+logger = get_logger(__name__)
+
+# Dialects with INSERT ... ON CONFLICT DO UPDATE
+UPSERT_INSERTS = {"sqlite": sqlite_insert, "postgresql": postgresql_insert}
+
+
+async def _max_chat_id(db) -> Optional[int]:
+    """Highest chat_id in use, seeds the chat_id sequence on first use."""
+    return await db.scalar(select(func.max(ChatMessage.chat_id)))
+
+
+class ChatRepository(AsyncBaseRepository[ChatMessage]):
+    """Repository for ChatMessage entity with bot logic."""
+
+    def __init__(self):
+        super().__init__(ChatMessage)
+
+    async def create_new_chat_id(self, user_id: int) -> int:
+        """Generate a new chat_id for the user."""
+        # chat_ids are unique across the system (simple /chat/{id}) and come from
+        # a shared sequence, so concurrent connects and workers never collide
+        return await get_sequence("chat_id", seed=_max_chat_id).next_id()
+
+    async def verify_chat_ownership(self, chat_id: int, user_id: int) -> bool:
+        """Check if the chat belongs to the user."""
+        db = self._get_db()
+        # If the chat has no session row yet, it's valid (new chat potentially)
+        # But if it exists, it must belong to user_id
+        # (primary key lookup on chat_sessions instead of a chat_messages scan)
+        owner_id = await db.scalar(select(ChatSession.user_id).filter(ChatSession.chat_id == chat_id))
+        if owner_id is None:
+            return True # Chat doesn't exist yet, so ownership is fine (will be created)
+            
+        return owner_id == user_id
+
+    async def save_message(self, chat_id: int, user_id: int, message_type: str, content: str, metadata_info: Dict = None) -> ChatMessage:
+        """Save a message to the database and update its chat session in the same transaction."""
+        db = self._get_db()
+        now = datetime.utcnow()
+        message = ChatMessage(
+            chat_id=chat_id,
+            user_id=user_id,
+            message_type=message_type,
+            content=content,
+            metadata_info=metadata_info or {},
+            created_at=now,
+            updated_at=now
+        )
+        db.add(message)
+        await self._touch_chat_session(chat_id, user_id, content, now)
+        await db.commit()
+        await db.refresh(message)
+        return message
+
+    async def _touch_chat_session(self, chat_id: int, user_id: int, content: str, now: datetime):
+        """Increment the chat session's counters, creating it on the first message."""
+        db = self._get_db()
+        new_session = dict(
+            chat_id=chat_id,
+            user_id=user_id,
+            preview=content[:50],
+            message_count=1,
+            last_update=now,
+            created_at=now,
+            updated_at=now
+        )
+        # Atomic increment so concurrent writers never lose an update
+        increment = dict(
+            message_count=ChatSession.message_count + 1,
+            last_update=now,
+            updated_at=now
+        )
+        
+        # Single upsert: concurrent first messages of a chat cannot both insert
+        upsert = UPSERT_INSERTS.get(db.get_bind().dialect.name)
+        if upsert is not None:
+            await db.execute(
+                upsert(ChatSession)
+                .values(**new_session)
+                .on_conflict_do_update(index_elements=[ChatSession.chat_id], set_=increment)
+            )
+            return
+        
+        result = await db.execute(update(ChatSession).where(ChatSession.chat_id == chat_id).values(**increment))
+        if result.rowcount == 0:
+            try:
+                async with db.begin_nested():
+                    await db.execute(insert(ChatSession).values(**new_session))
+            except IntegrityError:
+                # Another writer created the session first
+                await db.execute(update(ChatSession).where(ChatSession.chat_id == chat_id).values(**increment))
+
+    async def _message_position(self, chat_id: int, message_id: int) -> tuple:
+        """Keyset position (created_at, id) of a message, used as a pagination cursor."""
+        db = self._get_db()
+        created_at = await db.scalar(
+            select(ChatMessage.created_at)
+            .filter(ChatMessage.id == message_id, ChatMessage.chat_id == chat_id)
+        )
+        if created_at is None:
+            raise NotFoundException(f"Message {message_id} not found in chat {chat_id}")
+        return created_at, message_id
+
+    async def get_chat_messages(
+        self,
+        chat_id: int,
+        user_id: int,
+        limit: int = 100,
+        before_id: Optional[int] = None,
+        after_id: Optional[int] = None
+    ) -> List[ChatMessage]:
+        """
+        Get a page of messages for a specific chat, oldest first.
+        
+        Keyset pagination on (created_at, id), served by the (chat_id, created_at) index:
+        - after_id: the `limit` messages following that message
+        - before_id: the `limit` messages preceding that message
+        - neither: the first `limit` messages of the chat
+        """
+        if not await self.verify_chat_ownership(chat_id, user_id):
+            raise NotFoundException(f"Chat {chat_id} not found or access denied")
+            
+        db = self._get_db()
+        position = tuple_(ChatMessage.created_at, ChatMessage.id)
+        query = select(ChatMessage).filter(ChatMessage.chat_id == chat_id)
+        if after_id is not None:
+            query = query.filter(position > tuple_(*await self._message_position(chat_id, after_id)))
+        if before_id is not None:
+            query = query.filter(position < tuple_(*await self._message_position(chat_id, before_id)))
+        
+        if before_id is not None and after_id is None:
+            # Walk backwards from the cursor, then restore chronological order
+            result = await db.scalars(
+                query.order_by(ChatMessage.created_at.desc(), ChatMessage.id.desc()).limit(limit)
+            )
+            return list(reversed(result.all()))
+        
+        result = await db.scalars(
+            query.order_by(ChatMessage.created_at.asc(), ChatMessage.id.asc()).limit(limit)
+        )
+        return list(result.all())
+
+    async def iter_chat_messages(
+        self,
+        chat_id: int,
+        user_id: int,
+        limit: Optional[int] = None,
+        before_id: Optional[int] = None,
+        after_id: Optional[int] = None,
+        batch_size: Optional[int] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Stream messages of a chat oldest first, between the optional cursors.
+        
+        Ownership and cursors are checked before this returns, so errors surface
+        before a response starts. The returned iterator fetches keyset batches
+        of plain column rows: nothing accumulates in the session, so memory
+        stays bounded by batch_size however long the chat is.
+        
+        Returns:
+            Async iterator of message dictionaries
+        """
+        if not await self.verify_chat_ownership(chat_id, user_id):
+            raise NotFoundException(f"Chat {chat_id} not found or access denied")
+        
+        lower = await self._message_position(chat_id, after_id) if after_id is not None else None
+        upper = await self._message_position(chat_id, before_id) if before_id is not None else None
+        return self._iter_message_batches(
+            chat_id, lower, upper, limit, batch_size or settings.chat_history_stream_batch_size
+        )
+
+    async def _iter_message_batches(
+        self,
+        chat_id: int,
+        lower: Optional[tuple],
+        upper: Optional[tuple],
+        limit: Optional[int],
+        batch_size: int
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Yield messages in (created_at, id) order, one keyset batch per query."""
+        db = self._get_db()
+        position = tuple_(ChatMessage.created_at, ChatMessage.id)
+        remaining = limit
+        
+        while remaining is None or remaining > 0:
+            size = batch_size if remaining is None else min(batch_size, remaining)
+            query = select(
+                ChatMessage.id,
+                ChatMessage.chat_id,
+                ChatMessage.message_type,
+                ChatMessage.content,
+                ChatMessage.created_at,
+                ChatMessage.metadata_info
+            ).filter(ChatMessage.chat_id == chat_id)
+            if lower is not None:
+                query = query.filter(position > tuple_(*lower))
+            if upper is not None:
+                query = query.filter(position < tuple_(*upper))
+            
+            rows = (await db.execute(
+                query.order_by(ChatMessage.created_at.asc(), ChatMessage.id.asc()).limit(size)
+            )).all()
+            for row in rows:
+                yield dict(row._mapping)
+            
+            if len(rows) < size:
+                return
+            lower = (rows[-1].created_at, rows[-1].id)
+            if remaining is not None:
+                remaining -= len(rows)
+
+    async def get_user_chats(
+        self,
+        user_id: int,
+        limit: int = 50,
+        before_update: Optional[datetime] = None,
+        before_chat_id: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Get chat sessions for a user, most recent first.
+        
+        Keyset pagination: pass the last_update and chat_id of the last item of
+        the previous page as before_update and before_chat_id.
+        """
+        db = self._get_db()
+        
+        query = select(ChatSession).filter(ChatSession.user_id == user_id)
+        if before_update is not None:
+            if before_chat_id is not None:
+                query = query.filter(
+                    tuple_(ChatSession.last_update, ChatSession.chat_id) < tuple_(before_update, before_chat_id)
+                )
+            else:
+                query = query.filter(ChatSession.last_update < before_update)
+        
+        sessions = (await db.scalars(
+            query
+            .order_by(ChatSession.last_update.desc(), ChatSession.chat_id.desc())
+            .limit(limit)
+        )).all()
+        
+        return [
+            {
+                "chat_id": session.chat_id,
+                "last_update": session.last_update,
+                "preview": session.preview + "..." if session.preview else "Empty chat",
+                "message_count": session.message_count
+            }
+            for session in sessions
+        ]
+
+    async def backfill_chat_sessions(self) -> int:
+        """
+        Build chat_sessions rows for chats that predate the table.
+        Only runs when chat_sessions is empty, so it is a no-op after the first start.
+        
+        Returns:
+            Number of sessions created
+        """
+        db = self._get_db()
+        if await db.scalar(select(ChatSession.chat_id).limit(1)) is not None:
+            return 0
+        
+        messages = ChatMessage.__table__.alias("m")
+        # Preview is the start of the chat's first message
+        preview = select(func.substr(ChatMessage.content, 1, 50))\
+            .filter(ChatMessage.chat_id == messages.c.chat_id)\
+            .order_by(ChatMessage.created_at.asc())\
+            .limit(1)\
+            .scalar_subquery()
+        
+        result = await db.execute(
+            insert(ChatSession).from_select(
+                ["chat_id", "user_id", "preview", "message_count", "last_update", "created_at", "updated_at"],
+                select(
+                    messages.c.chat_id,
+                    func.min(messages.c.user_id),
+                    preview,
+                    func.count(),
+                    func.max(messages.c.created_at),
+                    func.min(messages.c.created_at),
+                    func.max(messages.c.created_at)
+                ).group_by(messages.c.chat_id)
+            )
+        )
+        await db.commit()
+        logger.info(f"Backfilled {result.rowcount} chat sessions")
+        return result.rowcount
+
+    async def delete_chat(self, chat_id: int, user_id: int):
+        """Delete all messages in a chat, and the agent's checkpointed thread state."""
+        if not await self.verify_chat_ownership(chat_id, user_id):
+            raise NotFoundException(f"Chat {chat_id} not found or access denied")
+            
+        db = self._get_db()
+        await db.execute(delete(ChatMessage).filter(ChatMessage.chat_id == chat_id))
+        await db.execute(delete(ChatSession).filter(ChatSession.chat_id == chat_id))
+        await db.commit()
+        # Otherwise the graph would still see the deleted conversation if the id is reused
+        await get_checkpointer().adelete_thread(str(chat_id))
+
+    async def _load_history(self, chat_id: int) -> list:
+        """
+        Load recent chat history as LangChain messages, oldest first, trimmed
+        to the synthesis model's token budget. The just-saved user message
+        is excluded.
+        
+        Only used to hydrate a cold agent thread; warm threads already hold
+        the conversation in their checkpoint.
+        """
+        from langchain_core.messages import HumanMessage, AIMessage
+        from app.llm_functions.ContextWindow import get_token_budget, trim_to_budget
+        from app.llm_functions.LLMDefination import ModelCapability
+        
+        db = self._get_db()
+        # Only the columns needed for the prompt; walks (chat_id, created_at) backwards
+        recent_messages = (await db.execute(
+            select(ChatMessage.message_type, ChatMessage.content)
+            .filter(ChatMessage.chat_id == chat_id)
+            .order_by(ChatMessage.created_at.desc(), ChatMessage.id.desc())
+            .limit(settings.context_history_max_messages + 1)
+        )).all()
+        
+        history = []
+        for msg in reversed(recent_messages[1:]):  # Exclude the just-saved user message
+            if msg.message_type == "user":
+                history.append(HumanMessage(content=msg.content))
+            elif msg.message_type == "bot":
+                history.append(AIMessage(content=msg.content))
+            # Skip error messages in history
+        return trim_to_budget(history, get_token_budget(ModelCapability.BASIC))
+
+    async def process_user_message(self, chat_id: int, user_id: int, content: str, use_cache: bool = True) -> ChatMessage:
+        """
+        Process a user message:
+        1. Save user message
+        2. Retrieve chat history (only if the agent thread is cold)
+        3. Convert to LangChain messages
+        4. Call LLM with the new message and chat_id (repeated questions are
+           answered from the response cache unless use_cache is False)
+        5. Save and return bot response
+        
+        Runs under the agent admission limits: raises OverloadedException
+        (nothing is saved) when no execution slot can be had.
+        """
+        from app.core.utils import trace_llm_operation, add_span_attributes
+        
+        with trace_llm_operation(
+            "chat.process_message",
+            attributes={
+                "chat.id": chat_id,
+                "chat.user_id": user_id,
+                "chat.message_length": len(content)
+            }
+        ):
+            # Wait for an execution slot (OverloadedException when at capacity)
+            async with get_admission_controller().admit(user_id):
+                # 1. Save user message
+                await self.save_message(chat_id, user_id, "user", content)
+            
+                add_span_attributes({
+                    "chat.step": "user_message_saved"
+                })
+            
+                try:
+                    # 2-4. Call LLM (Agent Graph) with chat_id; recent history is
+                    # only loaded when the chat's thread has no checkpoint yet
+                    bot_response_text = await CallAgentGraph(
+                        query=content,
+                        chat_id=chat_id,
+                        history_loader=partial(self._load_history, chat_id),
+                        use_cache=use_cache
+                    )
+                
+                    add_span_attributes({
+                        "chat.bot_response_length": len(bot_response_text),
+                        "chat.step": "llm_response_received"
+                    })
+                
+                    # 5. Save bot response
+                    bot_message = await self.save_message(
+                        chat_id, 
+                        user_id, 
+                        "bot", 
+                        bot_response_text
+                    )
+                
+                    add_span_attributes({
+                        "chat.step": "bot_message_saved",
+                        "chat.status": "success"
+                    })
+                
+                    return bot_message
+                
+                except Exception as e:
+                    logger.error(f"Error in bot processing: {str(e)}", exc_info=True)
+                
+                    add_span_attributes({
+                        "chat.step": "error",
+                        "chat.status": "error",
+                        "chat.error": str(e)
+                    })
+                
+                    # Save error message
+                    error_msg = await self.save_message(
+                        chat_id,
+                        user_id,
+                        "error",
+                        f"I encountered an error: {str(e)}"
+                    )
+                    return error_msg
+
+    async def stream_user_message(self, chat_id: int, user_id: int, content: str, use_cache: bool = True) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Streaming variant of process_user_message.
+        
+        Yields:
+            ``{"type": "delta", "content": ...}`` for every token chunk of the
+            bot response, then ``{"type": "response", "message": ChatMessage}``
+            once the full response (or error message) has been saved
+        """
+        from app.core.utils import trace_llm_operation, add_span_attributes
+        
+        with trace_llm_operation(
+            "chat.stream_message",
+            attributes={
+                "chat.id": chat_id,
+                "chat.user_id": user_id,
+                "chat.message_length": len(content)
+            }
+        ):
+            # Wait for an execution slot (OverloadedException when at capacity)
+            async with get_admission_controller().admit(user_id):
+                await self.save_message(chat_id, user_id, "user", content)
+            
+                try:
+                    bot_response_text = ""
+                    async for event in StreamAgentGraph(
+                        query=content,
+                        chat_id=chat_id,
+                        history_loader=partial(self._load_history, chat_id),
+                        use_cache=use_cache
+                    ):
+                        if event["type"] == "delta":
+                            yield event
+                        else:
+                            bot_response_text = event["content"]
+                
+                    bot_message = await self.save_message(
+                        chat_id,
+                        user_id,
+                        "bot",
+                        bot_response_text
+                    )
+                
+                    add_span_attributes({
+                        "chat.bot_response_length": len(bot_response_text),
+                        "chat.step": "bot_message_saved",
+                        "chat.status": "success"
+                    })
+                
+                except Exception as e:
+                    logger.error(f"Error in bot processing: {str(e)}", exc_info=True)
+                
+                    add_span_attributes({
+                        "chat.step": "error",
+                        "chat.status": "error",
+                        "chat.error": str(e)
+                    })
+                
+                    bot_message = await self.save_message(
+                        chat_id,
+                        user_id,
+                        "error",
+                        f"I encountered an error: {str(e)}"
+                    )
+            
+                yield {"type": "response", "message": bot_message}
@@ -1,198 +1,360 @@
-"""
-Chat API endpoints - WebSocket and REST
-"""
-
-from fastapi import APIRouter, status, WebSocket, WebSocketDisconnect, Query, Depends
-from fastapi.responses import JSONResponse
-from typing import List
-from app.features.chat.chat_schemas import (
-    WSMessageRequest, 
-    WSMessageResponse, 
-    ChatSessionPreview, 
-    ChatHistoryResponse,
-    ChatMessageResponse
-)
-from app.features.chat.chat_repository import ChatRepository
-from app.core.utils import get_logger
-import json
-
-logger = get_logger(__name__)
-
-router = APIRouter(prefix="/chat", tags=["chat"])
-
-# WebSocket Endpoint
-@router.websocket("/ws/{user_id}/{chat_id}")
-async def chat_websocket(websocket: WebSocket, chat_id: int, user_id: int):
-    """
-    WebSocket endpoint for real-time chat.
-    
-    Args:
-        chat_id: 0 for new chat, >0 for existing chat
-        user_id: User ID (passed as query param since WS doesn't support headers easily in all clients)
-    """
-    await websocket.accept()
-    repo = ChatRepository()
-    
-    try:
-        # Initialize Chat
-        current_chat_id = chat_id
-        
-        if current_chat_id == 0:
-            # Create new chat
-            current_chat_id = repo.create_new_chat_id(user_id)
-            await websocket.send_text(WSMessageResponse(
-                type="chat_created",
-                content="New chat session created",
-                chat_id=current_chat_id
-            ).model_dump_json())
-            logger.info(f"New chat created: {current_chat_id} for user {user_id}")
-        else:
-            # Verify existing chat
-            if not repo.verify_chat_ownership(current_chat_id, user_id):
-                await websocket.send_text(WSMessageResponse(
-                    type="error",
-                    content="Chat not found or access denied",
-                    chat_id=current_chat_id
-                ).model_dump_json())
-                await websocket.close()
-                return
-                
-            await websocket.send_text(WSMessageResponse(
-                type="chat_loaded",
-                content=f"Joined chat {current_chat_id}",
-                chat_id=current_chat_id
-            ).model_dump_json())
-            logger.info(f"User {user_id} joined chat {current_chat_id}")
-
-        # Message Loop
-        while True:
-            data = await websocket.receive_text()
-            
-            try:
-                # Parse message
-                message_data = json.loads(data)
-                request = WSMessageRequest(**message_data)
-                
-                if request.type == "ping":
-                    await websocket.send_text(WSMessageResponse(
-                        type="pong",
-                        content="pong",
-                        chat_id=current_chat_id
-                    ).model_dump_json())
-                    continue
-                
-                # Process User Message
-                # 1. Save & Process
-                bot_message = await repo.process_user_message(
-                    current_chat_id, 
-                    user_id, 
-                    request.content
-                )
-                
-                # 2. Send Response
-                await websocket.send_text(WSMessageResponse(
-                    type="response",
-                    content=bot_message.content,
-                    chat_id=current_chat_id,
-                    message_id=bot_message.id
-                ).model_dump_json())
-                
-            except json.JSONDecodeError:
-                await websocket.send_text(WSMessageResponse(
-                    type="error",
-                    content="Invalid JSON format",
-                    chat_id=current_chat_id
-                ).model_dump_json())
-            except Exception as e:
-                logger.error(f"Error processing message: {str(e)}", exc_info=True)
-                await websocket.send_text(WSMessageResponse(
-                    type="error",
-                    content=f"Error: {str(e)}",
-                    chat_id=current_chat_id
-                ).model_dump_json())
-
-    except WebSocketDisconnect:
-        logger.info(f"WebSocket disconnected for chat {chat_id}")
-    except Exception as e:
-        logger.error(f"WebSocket error: {str(e)}", exc_info=True)
-        try:
-            await websocket.close()
-        except:
-            pass
-
-
-# REST Endpoints
-
-@router.get("/sessions", response_model=List[ChatSessionPreview])
-def get_user_sessions(user_id: int = Query(...)):
-    """Get all chat sessions for a user."""
-    try:
-        repo = ChatRepository()
-        sessions = repo.get_user_chats(user_id)
-        return JSONResponse(
-            status_code=status.HTTP_200_OK,
-            content=[
-                ChatSessionPreview(
-                    chat_id=s["chat_id"],
-                    last_update=s["last_update"],
-                    preview=s["preview"]
-                ).model_dump(mode="json") 
-                for s in sessions
-            ]
-        )
-    except Exception as e:
-        logger.error(f"Error fetching sessions: {str(e)}", exc_info=True)
-        return JSONResponse(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            content={"detail": "Error fetching chat sessions"}
-        )
-
-
-@router.get("/{chat_id}/history", response_model=ChatHistoryResponse)
-def get_chat_history(chat_id: int, user_id: int = Query(...)):
-    """Get full history of a chat session."""
-    try:
-        repo = ChatRepository()
-        messages = repo.get_chat_messages(chat_id, user_id)
-        
-        return JSONResponse(
-            status_code=status.HTTP_200_OK,
-            content=ChatHistoryResponse(
-                chat_id=chat_id,
-                messages=[ChatMessageResponse.model_validate(m) for m in messages]
-            ).model_dump(mode="json")
-        )
-    except Exception as e:
-        logger.error(f"Error fetching history: {str(e)}", exc_info=True)
-        return JSONResponse(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            content={"detail": str(e)}
-        )
-
-
-@router.delete("/{chat_id}")
-def delete_chat(chat_id: int, user_id: int = Query(...)):
-    """Delete a chat session."""
-    try:
-        repo = ChatRepository()
-        repo.delete_chat(chat_id, user_id)
-        return JSONResponse(
-            status_code=status.HTTP_200_OK,
-            content={"detail": "Chat deleted successfully"}
-        )
-    except Exception as e:
-        logger.error(f"Error deleting chat: {str(e)}", exc_info=True)
-        return JSONResponse(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            content={"detail": str(e)}
-        )
-
-
-@router.get("/health")
-def health_check():
-    """Health check endpoint for the chat service"""
-    logger.info("Chat service health check")
-    return JSONResponse(
-        status_code=status.HTTP_200_OK,
-        content={"status": "ok", "service": "chat_websocket"}
-    )
+"""
+Chat API endpoints - WebSocket and REST
+"""
+
+from fastapi import APIRouter, status, WebSocket, WebSocketDisconnect, Query, Depends
+from fastapi.responses import JSONResponse, StreamingResponse
+from typing import List, Optional
+from datetime import datetime
+from app.features.chat.chat_schemas import (
+    WSMessageRequest, 
+    WSMessageResponse, 
+    ChatSessionPreview, 
+    ChatHistoryResponse,
+    ChatMessageResponse
+)
+from app.features.chat.chat_repository import ChatRepository
+from app.core.database import async_unit_of_work
+from app.core.utils import get_logger, get_http_pool_stats, OverloadedException
+from app.llm_functions.LLMDefination import get_model_registry_stats
+from app.llm_functions.MCPManager import get_mcp_manager
+from app.llm_functions.ToolCache import get_tool_cache_stats
+from app.llm_functions.ToolOutputPruner import get_tool_pruning_stats
+from app.llm_functions.ResponseCache import get_response_cache_stats
+from app.llm_functions.GuardrailCache import get_guardrail_cache_stats
+from app.llm_functions.GuardrailClassifier import get_guardrail_classifier_stats
+from app.llm_functions.AgentGraph import get_speculation_stats
+from app.llm_functions.GuardrailBatcher import get_guardrail_batch_stats
+from app.llm_functions.AdmissionControl import get_admission_stats
+import asyncio
+import json
+
+logger = get_logger(__name__)
+
+router = APIRouter(prefix="/chat", tags=["chat"])
+
+# WebSocket Endpoint
+@router.websocket("/ws/{user_id}/{chat_id}")
+async def chat_websocket(websocket: WebSocket, chat_id: int, user_id: int):
+    """
+    WebSocket endpoint for real-time chat.
+    
+    Args:
+        chat_id: 0 for new chat, >0 for existing chat
+        user_id: User ID (passed as query param since WS doesn't support headers easily in all clients)
+    
+    Query params:
+        cache: "false" to always run the agent instead of reusing cached answers
+    
+    A message arriving while the agent is at capacity is answered with a
+    "busy" frame carrying retry_after (seconds) instead of being processed.
+    """
+    await websocket.accept()
+    repo = ChatRepository()
+    use_cache = websocket.query_params.get("cache", "true").lower() not in ("false", "0", "no")
+    
+    try:
+        # Initialize Chat
+        current_chat_id = chat_id
+        
+        # Each step gets its own unit of work so the connection never pins a session
+        async with async_unit_of_work():
+            if current_chat_id == 0:
+                # Create new chat
+                current_chat_id = await repo.create_new_chat_id(user_id)
+                await websocket.send_text(WSMessageResponse(
+                    type="chat_created",
+                    content="New chat session created",
+                    chat_id=current_chat_id
+                ).model_dump_json())
+                logger.info(f"New chat created: {current_chat_id} for user {user_id}")
+            else:
+                # Verify existing chat
+                if not await repo.verify_chat_ownership(current_chat_id, user_id):
+                    await websocket.send_text(WSMessageResponse(
+                        type="error",
+                        content="Chat not found or access denied",
+                        chat_id=current_chat_id
+                    ).model_dump_json())
+                    await websocket.close()
+                    return
+                
+                await websocket.send_text(WSMessageResponse(
+                    type="chat_loaded",
+                    content=f"Joined chat {current_chat_id}",
+                    chat_id=current_chat_id
+                ).model_dump_json())
+                logger.info(f"User {user_id} joined chat {current_chat_id}")
+
+        # Message Loop; the socket is read in the background so a disconnect
+        # is noticed mid-generation and the in-flight run is cancelled
+        incoming = asyncio.Queue()
+        reader = asyncio.create_task(_read_messages(websocket, incoming))
+        try:
+            while True:
+                data = await incoming.get()
+                if data is None:
+                    logger.info(f"WebSocket disconnected for chat {current_chat_id}")
+                    return
+                
+                try:
+                    # Parse message
+                    message_data = json.loads(data)
+                    request = WSMessageRequest(**message_data)
+                    
+                    if request.type == "ping":
+                        await websocket.send_text(WSMessageResponse(
+                            type="pong",
+                            content="pong",
+                            chat_id=current_chat_id
+                        ).model_dump_json())
+                        continue
+                    
+                    processing = asyncio.create_task(
+                        _respond(websocket, repo, current_chat_id, user_id, request, use_cache)
+                    )
+                    await asyncio.wait({processing, reader}, return_when=asyncio.FIRST_COMPLETED)
+                    if not processing.done():
+                        # Client went away: stop the run, nothing more is saved or sent
+                        processing.cancel()
+                        await asyncio.gather(processing, return_exceptions=True)
+                        logger.info(f"Client of chat {current_chat_id} disconnected, cancelled in-flight run")
+                        return
+                    await processing
+                    
+                except json.JSONDecodeError:
+                    await websocket.send_text(WSMessageResponse(
+                        type="error",
+                        content="Invalid JSON format",
+                        chat_id=current_chat_id
+                    ).model_dump_json())
+                except OverloadedException as e:
+                    # Shed load: the message was not saved, the client may resend it
+                    await websocket.send_text(WSMessageResponse(
+                        type="busy",
+                        content=e.message,
+                        chat_id=current_chat_id,
+                        retry_after=e.retry_after
+                    ).model_dump_json())
+                except Exception as e:
+                    logger.error(f"Error processing message: {str(e)}", exc_info=True)
+                    await websocket.send_text(WSMessageResponse(
+                        type="error",
+                        content=f"Error: {str(e)}",
+                        chat_id=current_chat_id
+                    ).model_dump_json())
+        finally:
+            reader.cancel()
+
+    except WebSocketDisconnect:
+        logger.info(f"WebSocket disconnected for chat {chat_id}")
+    except Exception as e:
+        logger.error(f"WebSocket error: {str(e)}", exc_info=True)
+        try:
+            await websocket.close()
+        except:
+            pass
+
+
+async def _read_messages(websocket: WebSocket, incoming: asyncio.Queue):
+    """Queue incoming frames; None marks the disconnect."""
+    try:
+        while True:
+            await incoming.put(await websocket.receive_text())
+    except WebSocketDisconnect:
+        pass
+    finally:
+        incoming.put_nowait(None)
+
+
+async def _respond(websocket: WebSocket, repo: ChatRepository, chat_id: int, user_id: int, request: WSMessageRequest, use_cache: bool):
+    """Process one user message and send the bot response (one unit of work per message)."""
+    async with async_unit_of_work():
+        # 1. Save & Process (streaming token deltas if requested)
+        if request.stream:
+            bot_message = None
+            async for event in repo.stream_user_message(
+                chat_id,
+                user_id,
+                request.content,
+                use_cache=use_cache
+            ):
+                if event["type"] == "delta":
+                    await websocket.send_text(WSMessageResponse(
+                        type="delta",
+                        content=event["content"],
+                        chat_id=chat_id
+                    ).model_dump_json())
+                else:
+                    bot_message = event["message"]
+        else:
+            bot_message = await repo.process_user_message(
+                chat_id, 
+                user_id, 
+                request.content,
+                use_cache=use_cache
+            )
+    
+        # 2. Send Response
+        await websocket.send_text(WSMessageResponse(
+            type="response",
+            content=bot_message.content,
+            chat_id=chat_id,
+            message_id=bot_message.id
+        ).model_dump_json())
+
+
+# REST Endpoints
+
+@router.get("/sessions", response_model=List[ChatSessionPreview])
+async def get_user_sessions(
+    user_id: int = Query(...),
+    limit: int = Query(50, ge=1, le=200),
+    before_update: Optional[datetime] = Query(None, description="last_update of the last session of the previous page"),
+    before_chat_id: Optional[int] = Query(None, description="chat_id of the last session of the previous page")
+):
+    """Get chat sessions for a user, most recent first (keyset paginated)."""
+    try:
+        repo = ChatRepository()
+        sessions = await repo.get_user_chats(
+            user_id,
+            limit=limit,
+            before_update=before_update,
+            before_chat_id=before_chat_id
+        )
+        return JSONResponse(
+            status_code=status.HTTP_200_OK,
+            content=[
+                ChatSessionPreview(
+                    chat_id=s["chat_id"],
+                    last_update=s["last_update"],
+                    preview=s["preview"],
+                    message_count=s["message_count"]
+                ).model_dump(mode="json") 
+                for s in sessions
+            ]
+        )
+    except Exception as e:
+        logger.error(f"Error fetching sessions: {str(e)}", exc_info=True)
+        return JSONResponse(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            content={"detail": "Error fetching chat sessions"}
+        )
+
+
+def _encode_message(message: dict) -> str:
+    """Serialize a streamed message row in the ChatMessageResponse JSON shape."""
+    return json.dumps(message, default=lambda value: value.isoformat())
+
+
+async def _stream_ndjson(messages):
+    """One JSON message per line."""
+    async for message in messages:
+        yield _encode_message(message) + "\n"
+
+
+async def _stream_json(chat_id: int, messages):
+    """A ChatHistoryResponse-shaped JSON document, written incrementally."""
+    yield f'{{"chat_id": {chat_id}, "messages": ['
+    separator = ""
+    async for message in messages:
+        yield separator + _encode_message(message)
+        separator = ","
+    yield "]}"
+
+
+@router.get("/{chat_id}/history", response_model=ChatHistoryResponse)
+async def get_chat_history(
+    chat_id: int,
+    user_id: int = Query(...),
+    limit: Optional[int] = Query(None, ge=1, description="Page size (default 100, unbounded when streaming)"),
+    before_id: Optional[int] = Query(None, description="Return messages before this message id"),
+    after_id: Optional[int] = Query(None, description="Return messages after this message id"),
+    stream: Optional[str] = Query(None, pattern="^(ndjson|json)$", description="Stream the history as NDJSON or as a JSON document")
+):
+    """
+    Get the history of a chat session, oldest first.
+    
+    Paginated with before_id/after_id cursors; in streaming mode messages are
+    read and written in batches so long chats are never loaded at once.
+    """
+    try:
+        repo = ChatRepository()
+        
+        if stream:
+            messages = await repo.iter_chat_messages(
+                chat_id,
+                user_id,
+                limit=limit,
+                before_id=before_id,
+                after_id=after_id
+            )
+            if stream == "ndjson":
+                return StreamingResponse(_stream_ndjson(messages), media_type="application/x-ndjson")
+            return StreamingResponse(_stream_json(chat_id, messages), media_type="application/json")
+        
+        messages = await repo.get_chat_messages(
+            chat_id,
+            user_id,
+            limit=limit or 100,
+            before_id=before_id,
+            after_id=after_id
+        )
+        
+        return JSONResponse(
+            status_code=status.HTTP_200_OK,
+            content=ChatHistoryResponse(
+                chat_id=chat_id,
+                messages=[ChatMessageResponse.model_validate(m) for m in messages],
+                next_before_id=messages[0].id if messages else None,
+                next_after_id=messages[-1].id if messages else None
+            ).model_dump(mode="json")
+        )
+    except Exception as e:
+        logger.error(f"Error fetching history: {str(e)}", exc_info=True)
+        return JSONResponse(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            content={"detail": str(e)}
+        )
+
+
+@router.delete("/{chat_id}")
+async def delete_chat(chat_id: int, user_id: int = Query(...)):
+    """Delete a chat session."""
+    try:
+        repo = ChatRepository()
+        await repo.delete_chat(chat_id, user_id)
+        return JSONResponse(
+            status_code=status.HTTP_200_OK,
+            content={"detail": "Chat deleted successfully"}
+        )
+    except Exception as e:
+        logger.error(f"Error deleting chat: {str(e)}", exc_info=True)
+        return JSONResponse(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            content={"detail": str(e)}
+        )
+
+
+@router.get("/health")
+def health_check():
+    """Health check endpoint for the chat service"""
+    logger.info("Chat service health check")
+    return JSONResponse(
+        status_code=status.HTTP_200_OK,
+        content={
+            "status": "ok",
+            "service": "chat_websocket",
+            "models": get_model_registry_stats(),
+            "http_pool": get_http_pool_stats(),
+            "mcp": get_mcp_manager().stats() if get_mcp_manager() else None,
+            "tool_cache": get_tool_cache_stats(),
+            "tool_pruning": get_tool_pruning_stats(),
+            "response_cache": get_response_cache_stats(),
+            "guardrail_cache": get_guardrail_cache_stats(),
+            "guardrail_classifier": get_guardrail_classifier_stats(),
+            "speculation": get_speculation_stats(),
+            "guardrail_batching": get_guardrail_batch_stats(),
+            "admission": get_admission_stats()
+        }
+    )
@@ -0,0 +1,292 @@
+# tests for the async chat repository
+import asyncio
+import pytest
+import pytest_asyncio
+from unittest.mock import patch
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
+from sqlalchemy.pool import StaticPool
+from langgraph.checkpoint.base import empty_checkpoint
+from langgraph.checkpoint.memory import InMemorySaver
+from app.features.chat.chat_repository import ChatRepository
+from app.core.utils import NotFoundException
+from app.core.base.entity import Base
+
+# Fixture to create an in-memory async SQLite database and tear it down
+@pytest_asyncio.fixture
+async def session_factory():
+    # StaticPool keeps the single in-memory connection alive for the whole test
+    engine = create_async_engine(
+        "sqlite+aiosqlite:///:memory:",
+        poolclass=StaticPool,
+    )
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+
+    yield async_sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
+
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+    await engine.dispose()
+
+
+# ----------------------------------------------------
+# Actual Test Cases
+# ----------------------------------------------------
+
+@pytest.mark.asyncio
+async def test_save_and_get_chat_messages(session_factory):
+    with patch('app.core.base.repository.AsyncSessionLocal', session_factory), \
+         patch('app.core.base.sequence.AsyncSessionLocal', session_factory), \
+         patch.dict('app.core.base.sequence._sequences', clear=True):
+        repo = ChatRepository()
+
+        chat_id = await repo.create_new_chat_id(user_id=1)
+        await repo.save_message(chat_id, 1, "user", "hello")
+        await repo.save_message(chat_id, 1, "bot", "hi there")
+
+        messages = await repo.get_chat_messages(chat_id, user_id=1)
+        assert [m.content for m in messages] == ["hello", "hi there"]
+
+        # ASSERT: the next chat gets a fresh id
+        assert await repo.create_new_chat_id(user_id=1) == chat_id + 1
+        await repo.close()
+
+
+@pytest.mark.asyncio
+async def test_chat_ownership_is_enforced(session_factory):
+    with patch('app.core.base.repository.AsyncSessionLocal', session_factory):
+        repo = ChatRepository()
+        await repo.save_message(7, 1, "user", "private")
+
+        assert await repo.verify_chat_ownership(7, 1) is True
+        assert await repo.verify_chat_ownership(7, 2) is False
+        with pytest.raises(NotFoundException):
+            await repo.get_chat_messages(7, user_id=2)
+        with pytest.raises(NotFoundException):
+            await repo.delete_chat(7, user_id=2)
+
+        checkpointer = InMemorySaver()
+        await checkpointer.aput(
+            {"configurable": {"thread_id": "7", "checkpoint_ns": ""}}, empty_checkpoint(), {}, {}
+        )
+        with patch('app.features.chat.chat_repository.get_checkpointer', return_value=checkpointer):
+            await repo.delete_chat(7, user_id=1)
+        assert await repo.get_chat_messages(7, user_id=1) == []
+        # the agent's thread state is deleted with the chat
+        assert await checkpointer.aget_tuple({"configurable": {"thread_id": "7"}}) is None
+        await repo.close()
+
+
+@pytest.mark.asyncio
+async def test_repositories_share_unit_of_work_session(session_factory):
+    from app.core.database import async_unit_of_work
+
+    with patch('app.core.database.unit_of_work.AsyncSessionLocal', session_factory):
+        async with async_unit_of_work() as uow:
+            first, second = ChatRepository(), ChatRepository()
+            await first.save_message(3, 1, "user", "hello")
+
+            # ASSERT 1: both repositories use the scope's session
+            assert first._get_db() is second._get_db() is uow.async_session
+            assert [m.content for m in await second.get_chat_messages(3, 1)] == ["hello"]
+
+        # ASSERT 2: the session is released when the scope ends
+        assert uow._async_session is None
+        assert first.db is None
+
+
+@pytest.mark.asyncio
+async def test_user_chats_are_served_from_chat_sessions(session_factory):
+    with patch('app.core.base.repository.AsyncSessionLocal', session_factory):
+        repo = ChatRepository()
+        for chat_id in (1, 2, 3):
+            await repo.save_message(chat_id, 1, "user", f"question {chat_id}")
+            await repo.save_message(chat_id, 1, "bot", "answer")
+        await repo.save_message(1, 1, "user", "follow up")
+        await repo.save_message(9, 2, "user", "someone else")
+
+        chats = await repo.get_user_chats(1)
+        # ASSERT 1: most recent first, counters maintained incrementally
+        assert [c["chat_id"] for c in chats] == [1, 3, 2]
+        assert chats[0]["message_count"] == 3
+        assert chats[0]["preview"] == "question 1..."
+
+        # ASSERT 2: keyset pagination continues after the last item
+        page = await repo.get_user_chats(1, limit=2)
+        last = page[-1]
+        rest = await repo.get_user_chats(
+            1, limit=2, before_update=last["last_update"], before_chat_id=last["chat_id"]
+        )
+        assert [c["chat_id"] for c in page + rest] == [1, 3, 2]
+
+        # ASSERT 3: deleting a chat removes its session
+        await repo.delete_chat(3, user_id=1)
+        assert [c["chat_id"] for c in await repo.get_user_chats(1)] == [1, 2]
+        await repo.close()
+
+
+@pytest.mark.asyncio
+async def test_backfill_chat_sessions(session_factory):
+    from sqlalchemy import delete
+    from app.features.chat.chat_entity import ChatSession
+
+    with patch('app.core.base.repository.AsyncSessionLocal', session_factory):
+        repo = ChatRepository()
+        await repo.save_message(4, 1, "user", "legacy chat")
+        await repo.save_message(4, 1, "bot", "legacy answer")
+        # Simulate a database created before chat_sessions existed
+        await repo._get_db().execute(delete(ChatSession))
+        await repo._get_db().commit()
+
+        assert await repo.backfill_chat_sessions() == 1
+        assert await repo.backfill_chat_sessions() == 0
+
+        chats = await repo.get_user_chats(1)
+        assert chats[0]["chat_id"] == 4
+        assert chats[0]["message_count"] == 2
+        assert chats[0]["preview"] == "legacy chat..."
+        await repo.close()
+
+
+@pytest.mark.asyncio
+async def test_chat_ids_are_unique_across_allocators(tmp_path):
+    import asyncio
+    from app.core.base import SequenceAllocator
+    from app.features.chat.chat_repository import _max_chat_id
+
+    # File database: every session gets its own connection, like separate workers
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'ids.db'}")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    session_factory = async_sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
+
+    with patch('app.core.base.repository.AsyncSessionLocal', session_factory), \
+         patch('app.core.base.sequence.AsyncSessionLocal', session_factory):
+        repo = ChatRepository()
+        await repo.save_message(41, 1, "user", "existing chat")
+        await repo.close()
+
+        # Two allocators on the same sequence simulate two uvicorn workers
+        worker_a = SequenceAllocator("chat_id", block_size=3, seed=_max_chat_id)
+        worker_b = SequenceAllocator("chat_id", block_size=3, seed=_max_chat_id)
+
+        ids = await asyncio.gather(*[
+            (worker_a if i % 2 else worker_b).next_id() for i in range(20)
+        ])
+
+    await engine.dispose()
+    # ASSERT: no collisions, and ids continue after the existing chats
+    assert len(set(ids)) == 20
+    assert min(ids) == 42
+
+
+@pytest.mark.asyncio
+async def test_concurrent_first_messages_share_one_session(tmp_path):
+    from app.features.chat.chat_entity import ChatSession
+
+    # File database: each repository gets its own connection, like concurrent requests
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'sessions.db'}")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    session_factory = async_sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
+
+    with patch('app.core.base.repository.AsyncSessionLocal', session_factory):
+        repos = [ChatRepository() for _ in range(4)]
+        await asyncio.gather(*(repo.save_message(50, 1, "user", f"first {i}") for i, repo in enumerate(repos)))
+        for repo in repos:
+            await repo.close()
+
+    async with session_factory() as db:
+        session = await db.get(ChatSession, 50)
+    await engine.dispose()
+    # ASSERT: one session row counting every message, no IntegrityError
+    assert session.message_count == 4
+
+
+def test_upgrade_schema_adds_missing_indexes(tmp_path):
+    from sqlalchemy import create_engine, inspect, text
+    from app.core.database import upgrade_schema
+
+    # A chat_messages table created before the composite indexes existed
+    engine = create_engine(f"sqlite:///{tmp_path / 'legacy.db'}")
+    with engine.begin() as conn:
+        conn.execute(text(
+            "CREATE TABLE chat_messages (id INTEGER PRIMARY KEY, chat_id INTEGER, user_id INTEGER, "
+            "message_type VARCHAR(50), content TEXT, metadata_info JSON, created_at DATETIME, updated_at DATETIME)"
+        ))
+        conn.execute(text("CREATE INDEX ix_chat_messages_chat_id ON chat_messages (chat_id)"))
+
+    with patch('app.core.database.database.engine', engine):
+        upgrade_schema()
+
+    indexes = {index["name"] for index in inspect(engine).get_indexes("chat_messages")}
+    assert "ix_chat_messages_chat_id_created_at" in indexes
+    assert "ix_chat_messages_user_id_created_at" in indexes
+    engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_chat_history_keyset_pagination_and_streaming(session_factory):
+    with patch('app.core.base.repository.AsyncSessionLocal', session_factory):
+        repo = ChatRepository()
+        ids = [(await repo.save_message(5, 1, "user", f"m{i}")).id for i in range(7)]
+
+        # ASSERT 1: pages walk forwards and backwards from a cursor
+        first = await repo.get_chat_messages(5, 1, limit=3)
+        assert [m.id for m in first] == ids[:3]
+        after = await repo.get_chat_messages(5, 1, limit=3, after_id=first[-1].id)
+        assert [m.id for m in after] == ids[3:6]
+        before = await repo.get_chat_messages(5, 1, limit=2, before_id=ids[4])
+        assert [m.id for m in before] == ids[2:4]
+
+        # ASSERT 2: streaming crosses batch boundaries and honours cursors/limit
+        streamed = await repo.iter_chat_messages(5, 1, batch_size=2)
+        assert [m["id"] async for m in streamed] == ids
+        streamed = await repo.iter_chat_messages(5, 1, after_id=ids[0], before_id=ids[6], limit=4, batch_size=3)
+        assert [m["content"] async for m in streamed] == ["m1", "m2", "m3", "m4"]
+
+        # ASSERT 3: unknown cursors are rejected before streaming starts
+        with pytest.raises(NotFoundException):
+            await repo.iter_chat_messages(5, 1, after_id=10_000)
+        await repo.close()
+
+
+@pytest.mark.asyncio
+async def test_load_history_for_cold_thread(session_factory):
+    with patch('app.core.base.repository.AsyncSessionLocal', session_factory):
+        repo = ChatRepository()
+        await repo.save_message(8, 1, "user", "first question")
+        await repo.save_message(8, 1, "bot", "first answer")
+        await repo.save_message(8, 1, "error", "I encountered an error")
+        await repo.save_message(8, 1, "user", "new question")
+
+        history = await repo._load_history(8)
+
+        # ASSERT: oldest first, errors skipped, the just-saved message excluded
+        assert [(m.type, m.content) for m in history] == [("human", "first question"), ("ai", "first answer")]
+        await repo.close()
+
+
+@pytest.mark.asyncio
+async def test_cancelled_run_saves_no_bot_message(session_factory):
+    started = asyncio.Event()
+
+    async def slow_agent(**kwargs):
+        started.set()
+        await asyncio.sleep(5)
+        return "too late"
+
+    with patch('app.core.base.repository.AsyncSessionLocal', session_factory), \
+         patch('app.features.chat.chat_repository.CallAgentGraph', side_effect=slow_agent):
+        repo = ChatRepository()
+        processing = asyncio.create_task(repo.process_user_message(9, 1, "hello?"))
+        await started.wait()
+        # The WebSocket handler cancels the run when the client disconnects
+        processing.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await processing
+
+        # ASSERT: only the user message was written, no bot or error message
+        messages = await repo.get_chat_messages(9, user_id=1)
+        assert [(m.message_type, m.content) for m in messages] == [("user", "hello?")]
+        await repo.close()
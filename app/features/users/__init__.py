@@ -1,7 +1,7 @@
-"""
-Users Feature - User management (CRUD operations)
-"""
-
-from app.features.users.users_route import router
-
-__all__ = ["router"]
+"""
+Users Feature - User management (CRUD operations)
+"""
+
+from app.features.users.users_route import router
+
+__all__ = ["router"]
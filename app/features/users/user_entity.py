@@ -1,24 +1,24 @@
-"""
-User entity model
-"""
-
-from sqlalchemy import Column, Integer, String, Boolean, DateTime
-from sqlalchemy.orm import relationship
-from app.core.base import BaseEntity
-from datetime import datetime
-
-
-class User(BaseEntity):
-    """User entity model."""
-
-    __tablename__ = "users"
-
-    id = Column(Integer, primary_key=True, index=True)
-    username = Column(String(255), unique=True, nullable=False, index=True)
-    password_hash = Column(String(255), nullable=False)
-    is_active = Column(Boolean, default=True, nullable=False)
-    role = Column(String(50), default="user", nullable=False)
-    last_login = Column(DateTime, nullable=True)
-
-    def __repr__(self):
-        return f"<User(id={self.id}, username={self.username})>"
+"""
+User entity model
+"""
+
+from sqlalchemy import Column, Integer, String, Boolean, DateTime
+from sqlalchemy.orm import relationship
+from app.core.base import BaseEntity
+from datetime import datetime
+
+
+class User(BaseEntity):
+    """User entity model."""
+
+    __tablename__ = "users"
+
+    id = Column(Integer, primary_key=True, index=True)
+    username = Column(String(255), unique=True, nullable=False, index=True)
+    password_hash = Column(String(255), nullable=False)
+    is_active = Column(Boolean, default=True, nullable=False)
+    role = Column(String(50), default="user", nullable=False)
+    last_login = Column(DateTime, nullable=True)
+
+    def __repr__(self):
+        return f"<User(id={self.id}, username={self.username})>"
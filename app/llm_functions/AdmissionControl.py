@@ -0,0 +1,192 @@
+"""
+Admission Control - Bounded concurrency in front of the agent graph
+
+At most ``admission_max_concurrent`` agent runs execute at once; further
+runs wait in a FIFO queue of ``admission_max_queue`` entries for up to
+``admission_queue_timeout_seconds``. Each user may hold at most
+``admission_per_user_limit`` running or queued runs, so one tenant cannot
+fill the queue. Requests that cannot be admitted fail fast with
+OverloadedException, carrying a Retry-After estimate from recent run times.
+"""
+
+import asyncio
+import math
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Deque, Dict, Hashable, Optional
+from app.core.config import settings
+from app.core.utils import get_logger, add_span_attributes, OverloadedException
+
+logger = get_logger(__name__)
+
+REJECT_REASONS = ("queue_full", "user_limit", "queue_timeout")
+
+# Queue waits kept for the wait-time percentiles
+WAIT_SAMPLES = 1000
+
+
+class AdmissionMetrics:
+    """Queue depth, wait times and admission outcomes."""
+
+    def __init__(self):
+        self.admitted = 0
+        self.queued = 0
+        self.rejected = {reason: 0 for reason in REJECT_REASONS}
+        self.max_queue_depth = 0
+        self.waits: Deque[float] = deque(maxlen=WAIT_SAMPLES)
+        self.avg_run_seconds: Optional[float] = None
+
+    def record_wait(self, seconds: float) -> None:
+        self.waits.append(seconds)
+
+    def record_run(self, seconds: float) -> None:
+        # Exponentially weighted, so the estimate follows current load
+        self.avg_run_seconds = seconds if self.avg_run_seconds is None else 0.8 * self.avg_run_seconds + 0.2 * seconds
+
+    def as_dict(self) -> dict:
+        waits = sorted(self.waits)
+        return {
+            "admitted": self.admitted,
+            "queued": self.queued,
+            "rejected": dict(self.rejected),
+            "max_queue_depth": self.max_queue_depth,
+            "avg_wait_ms": round(1000 * sum(waits) / len(waits), 2) if waits else 0.0,
+            "p95_wait_ms": round(1000 * waits[int(0.95 * (len(waits) - 1))], 2) if waits else 0.0,
+            "avg_run_seconds": round(self.avg_run_seconds, 3) if self.avg_run_seconds is not None else None
+        }
+
+
+class AdmissionController:
+    """Global concurrency limit with a bounded FIFO wait queue and per-user quotas."""
+
+    def __init__(self, max_concurrent: int, max_queue: int, per_user_limit: int, queue_timeout: float):
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.per_user_limit = per_user_limit
+        self.queue_timeout = queue_timeout
+        self.metrics = AdmissionMetrics()
+        self._active = 0
+        self._waiters: Deque[asyncio.Future] = deque()
+        self._per_user: Dict[Hashable, int] = {}
+
+    @asynccontextmanager
+    async def admit(self, user_id: Hashable):
+        """Hold an execution slot for ``user_id`` while the block runs."""
+        await self.acquire(user_id)
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.metrics.record_run(time.perf_counter() - started)
+            self.release(user_id)
+
+    async def acquire(self, user_id: Hashable) -> None:
+        """Take a slot, waiting in the queue if needed; raises OverloadedException."""
+        if self._per_user.get(user_id, 0) >= self.per_user_limit:
+            self._reject("user_limit", f"Too many requests in progress for this user (limit {self.per_user_limit})")
+        if self._active < self.max_concurrent and not self._waiters:
+            self._active += 1
+            self._count_user(user_id, 1)
+            self._admitted(0.0)
+            return
+        if len(self._waiters) >= self.max_queue:
+            self._reject("queue_full", "Server is busy, please retry shortly")
+
+        # Queued runs count towards the user's quota too
+        self._count_user(user_id, 1)
+        future = asyncio.get_running_loop().create_future()
+        self._waiters.append(future)
+        self.metrics.queued += 1
+        self.metrics.max_queue_depth = max(self.metrics.max_queue_depth, len(self._waiters))
+        started = time.perf_counter()
+        try:
+            await asyncio.wait({future}, timeout=self.queue_timeout)
+        except asyncio.CancelledError:
+            self._leave_queue(user_id, future)
+            raise
+        if not future.done():
+            self._leave_queue(user_id, future)
+            self._reject("queue_timeout", f"No capacity within {self.queue_timeout}s, please retry shortly")
+        self._admitted(time.perf_counter() - started)
+
+    def release(self, user_id: Hashable) -> None:
+        """Free the slot held by a run of ``user_id``."""
+        self._count_user(user_id, -1)
+        self._hand_off()
+
+    def retry_after(self) -> float:
+        """Seconds until a slot is likely free, from the queue length and recent run times."""
+        run = self.metrics.avg_run_seconds or 1.0
+        return float(max(1, math.ceil(run * (len(self._waiters) + 1) / self.max_concurrent)))
+
+    def _hand_off(self) -> None:
+        # The slot moves to the longest waiting run (_active is unchanged) or is freed
+        while self._waiters:
+            future = self._waiters.popleft()
+            if not future.done():
+                future.set_result(None)
+                return
+        self._active -= 1
+
+    def _leave_queue(self, user_id: Hashable, future: asyncio.Future) -> None:
+        self._count_user(user_id, -1)
+        if future.done() and not future.cancelled():
+            # Woken just as we gave up: pass the slot on instead of leaking it
+            self._hand_off()
+            return
+        future.cancel()
+        self._waiters.remove(future)
+
+    def _count_user(self, user_id: Hashable, delta: int) -> None:
+        count = self._per_user.get(user_id, 0) + delta
+        if count:
+            self._per_user[user_id] = count
+        else:
+            self._per_user.pop(user_id, None)
+
+    def _admitted(self, waited: float) -> None:
+        self.metrics.admitted += 1
+        self.metrics.record_wait(waited)
+        add_span_attributes({
+            "admission.wait_ms": round(waited * 1000, 2),
+            "admission.queue_depth": len(self._waiters),
+            "admission.active": self._active
+        })
+
+    def _reject(self, reason: str, message: str) -> None:
+        self.metrics.rejected[reason] += 1
+        retry_after = self.retry_after()
+        add_span_attributes({"admission.rejected": reason, "admission.queue_depth": len(self._waiters)})
+        logger.warning(f"Agent run rejected ({reason}), queue depth {len(self._waiters)}, retry after {retry_after}s")
+        raise OverloadedException(message, retry_after=retry_after)
+
+    def stats(self) -> dict:
+        return {
+            **self.metrics.as_dict(),
+            "active": self._active,
+            "queue_depth": len(self._waiters),
+            "max_concurrent": self.max_concurrent,
+            "max_queue": self.max_queue,
+            "per_user_limit": self.per_user_limit
+        }
+
+
+_admission: Optional[AdmissionController] = None
+
+
+def get_admission_controller() -> AdmissionController:
+    global _admission
+    if _admission is None:
+        _admission = AdmissionController(
+            settings.admission_max_concurrent,
+            settings.admission_max_queue,
+            settings.admission_per_user_limit,
+            settings.admission_queue_timeout_seconds
+        )
+    return _admission
+
+
+def get_admission_stats() -> dict:
+    """Active runs, queue depth, wait times and rejections of the agent limiter."""
+    return get_admission_controller().stats()
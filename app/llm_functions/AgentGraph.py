@@ -1,180 +1,449 @@
-"""
-Agent Graph - LangGraph workflow with two sample agents for testing
-1. Guardrail Agent - Validates and checks input constraints
-2. Synthesize Response Agent - Generates the final response
-Integrates with MCP tools for extended functionality
-"""
-
-from langgraph.graph import StateGraph, START, END
-from langgraph.checkpoint.memory import InMemorySaver
-from typing_extensions import Literal
-from langchain_core.messages import SystemMessage, HumanMessage, ToolMessage
-from app.llm_functions.AgentState import AgentState
-from app.llm_functions.AgentLLM import get_base_llm, get_reasoning_llm
-from app.core.utils import get_logger, trace_llm_operation, add_span_attributes
-from app.llm_functions.MCPHelper import GetMCPConfig,InvokeLLMWithMCP
-from app.llm_functions.ToolHelper import InvokeLLMWithTool
-logger = get_logger(__name__)
-
-
-async def guardrail_agent(state: AgentState) -> dict:
-    """
-    Guardrail Agent - Validates input and checks basic constraints.
-    This agent ensures the query is valid and safe to process.
-    """
-    with trace_llm_operation(
-        "agent.guardrail",
-        attributes={
-            "agent.name": "guardrail",
-            "agent.type": "validation",
-            "agent.chat_id": state.get("chat_id", "unknown")
-        }
-    ):
-        chat_id = state.get("chat_id", "unknown")
-        logger.info(f"--- Executing Guardrail Agent (chat_id: {chat_id}) ---")
-        messages = state["messages"]
-        
-        guardrail_prompt = SystemMessage(
-            content="""You are a guardrail agent. Your job is to validate the user's query.
-            Check if the query is:
-            1. Not empty or nonsensical
-            2. Safe to process
-            3. In a reasonable length
-            
-            Respond with ONLY one word: 'pass' if the query is valid and safe.
-            Respond with ONLY one word: 'fail' if the query is invalid, offensive, or unsafe."""
-        )
-        
-        latest_query = messages[-1]
-        validation_messages = [guardrail_prompt, latest_query]
-        
-        add_span_attributes({
-            "agent.query_content": str(latest_query.content)[:100],  # First 100 chars
-            "agent.message_count": len(messages)
-        })
-        
-        validation_result = get_reasoning_llm().invoke(validation_messages).content.strip().lower()
-        logger.info(f"Guardrail validation result: {validation_result}")
-        
-        add_span_attributes({
-            "agent.validation_result": validation_result,
-            "agent.status": "pass" if validation_result == "pass" else "fail"
-        })
-        
-        return {"guardrail_status": validation_result}
-
-
-async def route_guardrail(state: AgentState) -> Literal["synthesize", "reject"]:
-    """
-    Conditional Edge: Routes based on guardrail validation.
-    """
-    status = state.get("guardrail_status", "fail")
-    return "synthesize" if status == "pass" else "reject"
-
-
-async def synthesize_response_agent(state: AgentState) -> dict:
-    """
-    Synthesize Response Agent - Generates the final response to the user query.
-    This agent creates a comprehensive and helpful response.
-    May use MCP tools if needed.
-    """
-    with trace_llm_operation(
-        "agent.synthesize",
-        attributes={
-            "agent.name": "synthesize",
-            "agent.type": "response_generation",
-            "agent.chat_id": state.get("chat_id", "unknown")
-        }
-    ):
-        chat_id = state.get("chat_id", "unknown")
-        logger.info(f"--- Executing Synthesize Response Agent (chat_id: {chat_id}) ---")
-        messages = state["messages"]
-        mcpConfig=await GetMCPConfig()
-        synthesis_prompt = SystemMessage(
-            content="""You are a helpful response synthesis agent. Your job is to generate a clear, 
-            concise, and helpful response to the user's query. 
-            Keep the response professional and informative.
-            
-            If you need to access current date/time or database information, you can use available tools."""
-        )
-        
-        synthesis_messages = [synthesis_prompt] + messages
-        llm = get_base_llm()
-        llmcallinput=  {"messages": synthesis_messages}
-        
-        add_span_attributes({
-            "agent.message_count": len(synthesis_messages),
-            "agent.has_mcp_tools": True
-        })
-        
-        #if using MCP
-        # response =await InvokeLLMWithMCP(llm,llmcallinput,mcpConfig)
-        # if  isinstance(response,list):
-        #     response=response[0]['text']
-
-        response= await InvokeLLMWithTool(llm,messages,['CurrentDate','Search'])
-
-        #response = get_base_llm().invoke(synthesis_messages).content.strip()
-        logger.info(f"Generated response: {response}")
-        
-        add_span_attributes({
-            "agent.response_length": len(response),
-            "agent.status": "success"
-        })
-        
-        return {"messages": state["messages"] + [SystemMessage(content=response)]}
-
-
-async def reject_query(state: AgentState) -> dict:
-    """
-    Reject invalid or unsafe queries.
-    """
-    with trace_llm_operation(
-        "agent.reject",
-        attributes={
-            "agent.name": "reject",
-            "agent.type": "rejection",
-            "agent.chat_id": state.get("chat_id", "unknown")
-        }
-    ):
-        chat_id = state.get("chat_id", "unknown")
-        logger.info(f"--- Rejecting invalid query (chat_id: {chat_id}) ---")
-        reject_message = SystemMessage(
-            content="Your query did not pass validation. Please ensure your input is valid and try again."
-        )
-        
-        add_span_attributes({
-            "agent.status": "rejected"
-        })
-        
-        return {"messages": state["messages"] + [reject_message]}
-
-# Build the workflow
-workflow = StateGraph(AgentState)
-
-# Add nodes
-workflow.add_node("guardrail_agent", guardrail_agent)
-workflow.add_node("synthesize_response_agent", synthesize_response_agent)
-workflow.add_node("reject_query", reject_query)
-
-# Set start edge
-workflow.add_edge(START, "guardrail_agent")
-
-# Add conditional edges
-workflow.add_conditional_edges(
-    "guardrail_agent",
-    route_guardrail,
-    {
-        "synthesize": "synthesize_response_agent",
-        "reject": "reject_query",
-    }
-)
-
-# Add end edges
-workflow.add_edge("synthesize_response_agent", END)
-workflow.add_edge("reject_query", END)
-
-# Compile with checkpointer
-checkpointer = InMemorySaver()
-agentgraph = workflow.compile(checkpointer=checkpointer)
-
+"""
+Agent Graph - LangGraph workflow with two sample agents for testing
+1. Guardrail Agent - Validates and checks input constraints
+2. Synthesize Response Agent - Generates the final response
+Integrates with MCP tools for extended functionality
+"""
+
+import asyncio
+from typing import Optional, Tuple
+from langchain_core.callbacks import AsyncCallbackHandler
+from langgraph.config import get_stream_writer
+from langgraph.graph import StateGraph, START, END
+from typing_extensions import Literal
+from langchain_core.messages import SystemMessage, HumanMessage, AIMessage, ToolMessage
+from app.llm_functions.AgentState import AgentState
+from app.llm_functions.AgentLLM import get_base_llm, get_reasoning_llm, get_summary_llm
+from app.llm_functions.LLMDefination import ModelCapability
+from app.llm_functions.ContextWindow import ContextWindow, estimate_tokens
+from app.core.config import settings
+from app.core.utils import get_logger, trace_llm_operation, add_span_attributes
+from app.llm_functions.MCPHelper import GetMCPConfig,InvokeLLMWithMCP
+from app.llm_functions.ToolHelper import InvokeLLMWithTool
+from app.llm_functions.Checkpointer import get_checkpointer
+from app.llm_functions.GuardrailCache import get_guardrail_cache
+from app.llm_functions.GuardrailClassifier import get_guardrail_classifier
+from app.llm_functions.GuardrailBatcher import get_guardrail_batcher
+from app.llm_functions.Deadline import run_with_deadline
+logger = get_logger(__name__)
+
+# Tag attached to the synthesis LLM runs so streamed graph runs can forward
+# only the user-facing tokens (not guardrail verdicts or tool-call turns).
+SYNTHESIS_STREAM_TAG = "agent.synthesis"
+
+# Background guardrail shadow checks (kept referenced until they finish)
+_shadow_tasks = set()
+
+# Node that produces the answer, for writing cached turns into a thread
+RESPONSE_NODE = "synthesize_response_agent"
+SPECULATIVE_NODE = "speculative_agent"
+
+
+GUARDRAIL_PROMPT = """You are a guardrail agent. Your job is to validate the user's query.
+            Check if the query is:
+            1. Not empty or nonsensical
+            2. Safe to process
+            3. In a reasonable length
+            
+            Respond with ONLY one word: 'pass' if the query is valid and safe.
+            Respond with ONLY one word: 'fail' if the query is invalid, offensive, or unsafe."""
+
+
+async def check_guardrail(latest_query) -> Tuple[str, str]:
+    """
+    Guardrail verdict for a user message and the tier that decided it:
+    verdict cache, local classifier, then the reasoning model.
+    """
+    validation_messages = [SystemMessage(content=GUARDRAIL_PROMPT), latest_query]
+    verdicts = get_guardrail_cache()
+    classifier = get_guardrail_classifier()
+    query = str(latest_query.content)
+    validation_result = await verdicts.get(query) if verdicts is not None else None
+    tier = "cache" if validation_result is not None else None
+    if tier is None and classifier is not None:
+        validation_result, tier = classifier.classify(query)
+    if tier is None:
+        hint = classifier.hint(query) if classifier is not None else None
+        # Concurrent identical checks share one request when batching is on
+        batcher = get_guardrail_batcher()
+        if batcher is not None:
+            validation_result = await run_with_deadline(batcher.check(query, validation_messages), "Guardrail")
+        else:
+            validation_result = (await run_with_deadline(
+                get_reasoning_llm().ainvoke(validation_messages), "Guardrail"
+            )).content.strip().lower()
+        tier = "llm"
+        if classifier is not None:
+            if hint is not None:
+                classifier.metrics.record_hint(hint == validation_result)
+            classifier.learn(query, validation_result)
+    elif tier != "cache" and classifier.should_shadow():
+        # Re-check a sample of local decisions with the model, off the request path
+        task = asyncio.create_task(shadow_check(classifier, tier, validation_result, validation_messages))
+        _shadow_tasks.add(task)
+        task.add_done_callback(_shadow_tasks.discard)
+    if verdicts is not None and tier != "cache":
+        await verdicts.set(query, validation_result)
+    if classifier is not None:
+        classifier.metrics.record(tier)
+    return validation_result, tier
+
+
+async def guardrail_agent(state: AgentState) -> dict:
+    """
+    Guardrail Agent - Validates input and checks basic constraints.
+    This agent ensures the query is valid and safe to process.
+    """
+    with trace_llm_operation(
+        "agent.guardrail",
+        attributes={
+            "agent.name": "guardrail",
+            "agent.type": "validation",
+            "agent.chat_id": state.get("chat_id", "unknown")
+        }
+    ):
+        chat_id = state.get("chat_id", "unknown")
+        logger.info(f"--- Executing Guardrail Agent (chat_id: {chat_id}) ---")
+        messages = state["messages"]
+        latest_query = messages[-1]
+        
+        add_span_attributes({
+            "agent.query_content": str(latest_query.content)[:100],  # First 100 chars
+            "agent.message_count": len(messages)
+        })
+        
+        validation_result, tier = await check_guardrail(latest_query)
+        logger.info(f"Guardrail validation result: {validation_result} (tier: {tier})")
+        
+        verdicts = get_guardrail_cache()
+        if verdicts is not None:
+            stats = verdicts.stats()
+            add_span_attributes({
+                "guardrail.cache_hit": tier == "cache",
+                "guardrail.cache_hits": stats["memory_hits"] + stats["disk_hits"],
+                "guardrail.cache_misses": stats["misses"]
+            })
+        classifier = get_guardrail_classifier()
+        if classifier is not None:
+            stats = classifier.metrics.as_dict()
+            add_span_attributes({
+                "guardrail.tier": tier,
+                "guardrail.local_rate": stats["local_rate"],
+                **{f"guardrail.hit_rate.{name}": rate for name, rate in stats["hit_rates"].items()},
+                "guardrail.shadow_checks": stats["shadow_checks"]
+            })
+            if stats["agreement_rate"] is not None:
+                add_span_attributes({"guardrail.agreement_rate": stats["agreement_rate"]})
+            if stats["knn_hint_agreement_rate"] is not None:
+                add_span_attributes({"guardrail.knn_hint_agreement_rate": stats["knn_hint_agreement_rate"]})
+        
+        add_span_attributes({
+            "agent.validation_result": validation_result,
+            "agent.status": "pass" if validation_result == "pass" else "fail"
+        })
+        
+        return {"guardrail_status": validation_result}
+
+
+async def shadow_check(classifier, tier: str, verdict: str, validation_messages) -> None:
+    """Compare a local guardrail decision with the model's verdict."""
+    try:
+        model_verdict = (await get_reasoning_llm().ainvoke(validation_messages)).content.strip().lower()
+    except Exception as e:
+        logger.warning(f"Guardrail shadow check failed: {str(e)}")
+        return
+    classifier.metrics.record_agreement(tier, model_verdict == verdict)
+    if model_verdict != verdict:
+        logger.info(f"Guardrail {tier} tier disagreed with the model: {verdict} vs {model_verdict}")
+
+
+async def route_guardrail(state: AgentState) -> Literal["synthesize", "reject"]:
+    """
+    Conditional Edge: Routes based on guardrail validation.
+    """
+    status = state.get("guardrail_status", "fail")
+    return "synthesize" if status == "pass" else "reject"
+
+
+async def synthesize_response_agent(state: AgentState, llm_config: Optional[dict] = None) -> dict:
+    """
+    Synthesize Response Agent - Generates the final response to the user query.
+    This agent creates a comprehensive and helpful response.
+    May use MCP tools if needed.
+    
+    ``llm_config`` replaces the run config of the model calls (the
+    speculative agent uses it to buffer tokens instead of streaming them).
+    """
+    with trace_llm_operation(
+        "agent.synthesize",
+        attributes={
+            "agent.name": "synthesize",
+            "agent.type": "response_generation",
+            "agent.chat_id": state.get("chat_id", "unknown")
+        }
+    ):
+        chat_id = state.get("chat_id", "unknown")
+        logger.info(f"--- Executing Synthesize Response Agent (chat_id: {chat_id}) ---")
+        messages = state["messages"]
+        mcpConfig=await GetMCPConfig()
+        synthesis_prompt = SystemMessage(
+            content="""You are a helpful response synthesis agent. Your job is to generate a clear, 
+            concise, and helpful response to the user's query. 
+            Keep the response professional and informative.
+            
+            If you need to access current date/time or database information, you can use available tools."""
+        )
+        
+        # Fit the conversation into the model's token budget; older turns
+        # are folded into the running summary kept in the state
+        context = await ContextWindow(ModelCapability.BASIC, summarizer=get_summary_llm).fit(
+            messages,
+            summary=state.get("summary", ""),
+            summarized_count=state.get("summarized_count", 0)
+        )
+        
+        synthesis_messages = [synthesis_prompt] + context["messages"]
+        llm = get_base_llm()
+        llmcallinput=  {"messages": synthesis_messages}
+        
+        add_span_attributes({
+            "agent.message_count": len(synthesis_messages),
+            "agent.has_mcp_tools": True,
+            "context.tokens_total": context["tokens_total"],
+            "context.tokens_sent": context["tokens_sent"],
+            "context.tokens_saved": context["tokens_saved"],
+            "context.summarized_count": context["summarized_count"]
+        })
+        
+        #if using MCP
+        # response =await InvokeLLMWithMCP(llm,llmcallinput,mcpConfig)
+        # if  isinstance(response,list):
+        #     response=response[0]['text']
+
+        response= await InvokeLLMWithTool(
+            llm,
+            context["messages"],
+            ['CurrentDate','Search'],
+            config=llm_config or {"tags": [SYNTHESIS_STREAM_TAG]}
+        )
+
+        #response = get_base_llm().invoke(synthesis_messages).content.strip()
+        logger.info(f"Generated response: {response}")
+        
+        add_span_attributes({
+            "agent.response_length": len(response),
+            "agent.status": "success"
+        })
+        
+        # messages is append-only (operator.add): return only the new turn
+        return {
+            "messages": [AIMessage(content=response)],
+            "summary": context["summary"],
+            "summarized_count": context["summarized_count"]
+        }
+
+
+async def reject_query(state: AgentState) -> dict:
+    """
+    Reject invalid or unsafe queries.
+    """
+    with trace_llm_operation(
+        "agent.reject",
+        attributes={
+            "agent.name": "reject",
+            "agent.type": "rejection",
+            "agent.chat_id": state.get("chat_id", "unknown")
+        }
+    ):
+        chat_id = state.get("chat_id", "unknown")
+        logger.info(f"--- Rejecting invalid query (chat_id: {chat_id}) ---")
+        reject_message = AIMessage(
+            content="Your query did not pass validation. Please ensure your input is valid and try again."
+        )
+        
+        add_span_attributes({
+            "agent.status": "rejected"
+        })
+        
+        return {"messages": [reject_message]}
+
+class SpeculativeBuffer(AsyncCallbackHandler):
+    """
+    Holds the synthesis tokens of a speculative run until the guardrail
+    passes, then forwards them (and every later token) as custom stream
+    events. Tool calls wait for the verdict too: they can be paid (Search)
+    and their results are shared through the tool cache.
+    """
+
+    def __init__(self, writer):
+        self.writer = writer
+        self.chunks = []
+        self.passed = asyncio.Event()
+        self.usage_tokens = 0
+        self._in_flight = []
+
+    async def on_llm_new_token(self, token: str, *, chunk=None, **kwargs) -> None:
+        message = getattr(chunk, "message", None)
+        if not token or getattr(message, "tool_call_chunks", None):
+            return
+        self._in_flight.append(token)
+        if self.passed.is_set():
+            self.writer({"type": "delta", "content": token})
+        else:
+            self.chunks.append(token)
+
+    async def on_llm_end(self, response, **kwargs) -> None:
+        self._in_flight = []
+        for generations in response.generations:
+            for generation in generations:
+                usage = getattr(getattr(generation, "message", None), "usage_metadata", None)
+                if usage:
+                    self.usage_tokens += usage.get("total_tokens", 0)
+
+    async def on_tool_start(self, serialized, input_str: str, **kwargs) -> None:
+        await self.passed.wait()
+
+    def release(self) -> None:
+        self.passed.set()
+        if self.chunks:
+            self.writer({"type": "delta", "content": "".join(self.chunks)})
+
+    @property
+    def spent_tokens(self) -> int:
+        """Tokens of the finished model calls (usage metadata), plus an estimate for one cut off mid-stream."""
+        return self.usage_tokens + (estimate_tokens("".join(self._in_flight)) if self._in_flight else 0)
+
+
+class SpeculationMetrics:
+    """Speculative runs, how many were thrown away, and the tokens they cost."""
+
+    def __init__(self):
+        self.runs = 0
+        self.cancelled = 0
+        self.wasted_tokens = 0
+
+    def as_dict(self) -> dict:
+        return {"runs": self.runs, "cancelled": self.cancelled, "wasted_tokens": self.wasted_tokens}
+
+
+_speculation = SpeculationMetrics()
+
+
+async def speculative_agent(state: AgentState) -> dict:
+    """
+    Speculative Agent - Runs the guardrail and synthesis concurrently.
+    
+    Synthesis output is buffered and only released once the guardrail
+    passes, and tool calls are held until then; on "fail" the synthesis is
+    cancelled and its output dropped.
+    Latency on the common path is max(guardrail, synthesis) instead of
+    their sum.
+    """
+    with trace_llm_operation(
+        "agent.speculative",
+        attributes={
+            "agent.name": "speculative",
+            "agent.type": "speculative_execution",
+            "agent.chat_id": state.get("chat_id", "unknown")
+        }
+    ):
+        buffer = SpeculativeBuffer(get_stream_writer())
+        synthesis = asyncio.create_task(synthesize_response_agent(state, llm_config={"callbacks": [buffer]}))
+        _speculation.runs += 1
+        try:
+            verdict = await guardrail_agent(state)
+        except BaseException:
+            synthesis.cancel()
+            raise
+
+        if verdict["guardrail_status"] != "pass":
+            synthesis.cancel()
+            await asyncio.gather(synthesis, return_exceptions=True)
+            _speculation.cancelled += 1
+            _speculation.wasted_tokens += buffer.spent_tokens
+            add_span_attributes({
+                "speculative.cancelled": True,
+                "speculative.wasted_tokens": buffer.spent_tokens
+            })
+            return verdict
+
+        buffer.release()
+        result = await synthesis
+        add_span_attributes({"speculative.cancelled": False, "speculative.wasted_tokens": 0})
+        return {**verdict, **result}
+
+
+async def route_speculative(state: AgentState) -> Literal["done", "reject"]:
+    """
+    Conditional Edge: the speculative agent already answered passing queries.
+    """
+    return "done" if state.get("guardrail_status", "fail") == "pass" else "reject"
+
+
+def get_speculation_stats() -> dict:
+    """Speculative runs, cancellations and wasted synthesis tokens."""
+    return _speculation.as_dict()
+
+
+# Build the workflow
+workflow = StateGraph(AgentState)
+
+# Add nodes
+workflow.add_node("guardrail_agent", guardrail_agent)
+workflow.add_node("synthesize_response_agent", synthesize_response_agent)
+workflow.add_node("reject_query", reject_query)
+
+# Set start edge
+workflow.add_edge(START, "guardrail_agent")
+
+# Add conditional edges
+workflow.add_conditional_edges(
+    "guardrail_agent",
+    route_guardrail,
+    {
+        "synthesize": "synthesize_response_agent",
+        "reject": "reject_query",
+    }
+)
+
+# Add end edges
+workflow.add_edge("synthesize_response_agent", END)
+workflow.add_edge("reject_query", END)
+
+# Speculative workflow: guardrail and synthesis in one concurrent step
+speculative_workflow = StateGraph(AgentState)
+speculative_workflow.add_node(SPECULATIVE_NODE, speculative_agent)
+speculative_workflow.add_node("reject_query", reject_query)
+speculative_workflow.add_edge(START, SPECULATIVE_NODE)
+speculative_workflow.add_conditional_edges(
+    SPECULATIVE_NODE,
+    route_speculative,
+    {
+        "done": END,
+        "reject": "reject_query",
+    }
+)
+speculative_workflow.add_edge("reject_query", END)
+
+_agentgraph = None
+
+
+def get_response_node() -> str:
+    """Name of the node that answers in the active workflow."""
+    return SPECULATIVE_NODE if settings.speculative_synthesis else RESPONSE_NODE
+
+
+def get_agent_graph():
+    """
+    Get the agent graph compiled against the active checkpointer.
+    
+    The checkpointer is opened in the application lifespan, so the graph is
+    compiled on first use (and recompiled if the checkpointer was replaced).
+    settings.speculative_synthesis selects the speculative workflow.
+    """
+    global _agentgraph
+    checkpointer = get_checkpointer()
+    graph = speculative_workflow if settings.speculative_synthesis else workflow
+    if _agentgraph is None or _agentgraph.checkpointer is not checkpointer or _agentgraph.builder is not graph:
+        _agentgraph = graph.compile(checkpointer=checkpointer)
+    return _agentgraph
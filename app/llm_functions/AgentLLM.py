@@ -1,32 +1,54 @@
-"""
-Agent LLM - Provides LLM instances for the agent graph
-"""
-
-from app.llm_functions.LLMDefination import get_chat_llm, ModelCapability
-from app.core.utils import get_logger
-
-logger = get_logger(__name__)
-
-
-def get_base_llm():
-    """
-    Get base LLM for general responses.
-    Uses BASIC capability for simple text generation.
-    """
-    logger.info("Initializing Base LLM")
-    return get_chat_llm(capability=ModelCapability.BASIC)
-
-
-def get_reasoning_llm():
-    """
-    Get reasoning LLM for complex logic and validation.
-    Uses REASONING capability for advanced analysis.
-    """
-    logger.info("Initializing Reasoning LLM")
-    return get_chat_llm(capability=ModelCapability.REASONING)
-
-
-
-
-
-
+"""
+Agent LLM - Provides LLM instances for the agent graph
+"""
+
+from app.llm_functions.LLMDefination import get_chat_llm, get_model_registry_stats, ModelCapability
+from app.core.utils import get_logger
+
+logger = get_logger(__name__)
+
+
+def get_base_llm():
+    """
+    Get base LLM for general responses.
+    Uses BASIC capability for simple text generation.
+    """
+    logger.info("Initializing Base LLM")
+    return get_chat_llm(capability=ModelCapability.BASIC)
+
+
+def get_reasoning_llm():
+    """
+    Get reasoning LLM for complex logic and validation.
+    Uses REASONING capability for advanced analysis.
+    """
+    logger.info("Initializing Reasoning LLM")
+    return get_chat_llm(capability=ModelCapability.REASONING)
+
+
+def get_summary_llm():
+    """
+    Get LLM for summarizing older conversation turns.
+    Uses BASIC capability with a low temperature for faithful summaries.
+    """
+    logger.info("Initializing Summary LLM")
+    return get_chat_llm(capability=ModelCapability.BASIC, temperature=0.2)
+
+
+def warmup_agent_llms():
+    """
+    Build the agent graph's chat models ahead of the first request.
+    Clients are cached by the model registry, so later calls reuse them.
+    """
+    for get_llm in (get_base_llm, get_reasoning_llm, get_summary_llm):
+        try:
+            get_llm()
+        except Exception as e:
+            logger.warning(f"Could not warm up {get_llm.__name__}: {str(e)}")
+    logger.info(f"Model registry warmed up: {get_model_registry_stats()}")
+
+
+
+
+
+
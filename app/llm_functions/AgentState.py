@@ -1,14 +1,16 @@
-"""
-Agent State - Type definition for LangGraph state
-"""
-
-from typing import Annotated, TypedDict
-from langchain_core.messages import AnyMessage
-import operator
-
-
-class AgentState(TypedDict):
-    """State dictionary for the agent graph, scoped per chat session."""
-    chat_id: int  # unique identifier for the chat / LangGraph thread
-    messages: Annotated[list[AnyMessage], operator.add]
-    guardrail_status: str
\ No newline at end of file
+"""
+Agent State - Type definition for LangGraph state
+"""
+
+from typing import Annotated, TypedDict
+from langchain_core.messages import AnyMessage
+import operator
+
+
+class AgentState(TypedDict):
+    """State dictionary for the agent graph, scoped per chat session."""
+    chat_id: int  # unique identifier for the chat / LangGraph thread
+    messages: Annotated[list[AnyMessage], operator.add]
+    guardrail_status: str
+    summary: str  # running summary of the messages no longer sent to the model
+    summarized_count: int  # number of leading messages covered by the summary
\ No newline at end of file
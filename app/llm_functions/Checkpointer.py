@@ -0,0 +1,312 @@
+"""
+Checkpointer - Persistent, bounded storage for LangGraph thread state
+
+The agent graph keeps one thread per chat. Two backends are available,
+selected with ``settings.checkpoint_backend``:
+
+- ``sqlite``: checkpoints live in a SQLite file (shared by every worker on
+  the host). Threads idle for longer than the TTL are pruned periodically.
+- ``memory``: checkpoints live in process memory, capped to the most recently
+  used threads (LRU) and pruned by the same TTL.
+
+Both backends keep only the latest checkpoint of a thread (the graph never
+time-travels) and store it through a compressing serializer. A thread that
+has been evicted or pruned is simply rebuilt from the chat history.
+"""
+
+import asyncio
+import os
+import time
+import zlib
+from collections import OrderedDict
+from typing import Any, Optional
+
+from langgraph.checkpoint.base import BaseCheckpointSaver
+from langgraph.checkpoint.memory import InMemorySaver
+from langgraph.checkpoint.serde.base import SerializerProtocol
+from langgraph.checkpoint.serde.jsonplus import JsonPlusSerializer
+from app.core.config import settings
+from app.core.utils import get_logger
+
+logger = get_logger(__name__)
+
+try:
+    import aiosqlite
+    from langgraph.checkpoint.sqlite.aio import AsyncSqliteSaver
+except ImportError:  # langgraph-checkpoint-sqlite is optional
+    aiosqlite = None
+    AsyncSqliteSaver = None
+
+
+class CompactSerializer(SerializerProtocol):
+    """
+    Serializer that zlib-compresses payloads above a size threshold.
+
+    Wraps JsonPlusSerializer (msgpack) the same way LangGraph's
+    EncryptedSerializer does: the compression marker is appended to the
+    type tag, so uncompressed data written earlier still loads.
+    """
+
+    def __init__(self, serde: Optional[SerializerProtocol] = None, min_size: int = 1024, level: int = 6):
+        self.serde = serde or JsonPlusSerializer()
+        self.min_size = min_size
+        self.level = level
+
+    def dumps_typed(self, obj: Any) -> tuple[str, bytes]:
+        typ, data = self.serde.dumps_typed(obj)
+        if len(data) < self.min_size:
+            return typ, data
+        return f"{typ}+zlib", zlib.compress(data, self.level)
+
+    def loads_typed(self, data: tuple[str, bytes]) -> Any:
+        typ, payload = data
+        if typ.endswith("+zlib"):
+            return self.serde.loads_typed((typ[:-len("+zlib")], zlib.decompress(payload)))
+        return self.serde.loads_typed(data)
+
+
+class BoundedInMemorySaver(InMemorySaver):
+    """
+    In-memory checkpointer with LRU eviction and TTL pruning of threads.
+
+    Only the latest root checkpoint of each thread is retained; older
+    checkpoints, their pending writes, unreferenced channel blobs and the
+    namespaces of finished nested agent runs are dropped on every put.
+    """
+
+    def __init__(
+        self,
+        *,
+        max_threads: Optional[int] = None,
+        ttl_seconds: Optional[float] = None,
+        serde: Optional[SerializerProtocol] = None
+    ):
+        super().__init__(serde=serde)
+        self.max_threads = max_threads
+        self.ttl_seconds = ttl_seconds
+        self._last_access: "OrderedDict[str, float]" = OrderedDict()
+
+    def _touch(self, thread_id: str) -> None:
+        self._last_access[thread_id] = time.monotonic()
+        self._last_access.move_to_end(thread_id)
+
+    def _compact(self, thread_id: str, checkpoint_id: str, channel_versions: dict) -> None:
+        """Drop everything of a thread except the given root checkpoint."""
+        namespaces = self.storage[thread_id]
+        for checkpoint_ns in [ns for ns in namespaces if ns != ""]:
+            del namespaces[checkpoint_ns]
+        root = namespaces[""]
+        for old_id in [cid for cid in root if cid != checkpoint_id]:
+            del root[old_id]
+        for key in [k for k in self.writes if k[0] == thread_id and (k[1] != "" or k[2] != checkpoint_id)]:
+            del self.writes[key]
+        for key in [k for k in self.blobs if k[0] == thread_id]:
+            _, checkpoint_ns, channel, version = key
+            if checkpoint_ns != "" or channel_versions.get(channel) != version:
+                del self.blobs[key]
+
+    def _evict(self) -> None:
+        if self.max_threads is None:
+            return
+        while len(self._last_access) > self.max_threads:
+            thread_id, _ = self._last_access.popitem(last=False)
+            super().delete_thread(thread_id)
+
+    def get_tuple(self, config):
+        thread_id = config["configurable"]["thread_id"]
+        if thread_id in self._last_access:
+            self._touch(thread_id)
+        return super().get_tuple(config)
+
+    def put(self, config, checkpoint, metadata, new_versions):
+        next_config = super().put(config, checkpoint, metadata, new_versions)
+        thread_id = config["configurable"]["thread_id"]
+        self._touch(thread_id)
+        if config["configurable"]["checkpoint_ns"] == "":
+            self._compact(thread_id, checkpoint["id"], checkpoint["channel_versions"])
+        self._evict()
+        return next_config
+
+    def delete_thread(self, thread_id: str) -> None:
+        self._last_access.pop(thread_id, None)
+        super().delete_thread(thread_id)
+
+    async def prune_expired(self) -> int:
+        """Delete threads idle for longer than the TTL. Returns the number pruned."""
+        if not self.ttl_seconds:
+            return 0
+        cutoff = time.monotonic() - self.ttl_seconds
+        expired = []
+        for thread_id, last_access in self._last_access.items():
+            if last_access >= cutoff:
+                break
+            expired.append(thread_id)
+        for thread_id in expired:
+            self.delete_thread(thread_id)
+        return len(expired)
+
+
+if AsyncSqliteSaver is not None:
+
+    class BoundedSqliteSaver(AsyncSqliteSaver):
+        """
+        SQLite checkpointer that keeps one checkpoint per thread and prunes
+        idle threads.
+
+        Thread activity is tracked in a ``checkpoint_threads`` side table so
+        that pruning is a single indexed range scan.
+        """
+
+        def __init__(self, conn, *, ttl_seconds: Optional[float] = None, serde: Optional[SerializerProtocol] = None):
+            super().__init__(conn, serde=serde)
+            self.ttl_seconds = ttl_seconds
+            self._threads_ready = False
+
+        async def setup(self) -> None:
+            await super().setup()
+            if self._threads_ready:
+                return
+            async with self.lock:
+                if self._threads_ready:
+                    return
+                await self.conn.execute(
+                    "CREATE TABLE IF NOT EXISTS checkpoint_threads ("
+                    "thread_id TEXT PRIMARY KEY, last_access REAL NOT NULL)"
+                )
+                await self.conn.execute(
+                    "CREATE INDEX IF NOT EXISTS ix_checkpoint_threads_last_access "
+                    "ON checkpoint_threads (last_access)"
+                )
+                await self.conn.commit()
+                self._threads_ready = True
+
+        async def aput(self, config, checkpoint, metadata, new_versions):
+            next_config = await super().aput(config, checkpoint, metadata, new_versions)
+            thread_id = str(config["configurable"]["thread_id"])
+            async with self.lock:
+                await self.conn.execute(
+                    "INSERT INTO checkpoint_threads (thread_id, last_access) VALUES (?, ?) "
+                    "ON CONFLICT(thread_id) DO UPDATE SET last_access = excluded.last_access",
+                    (thread_id, time.time())
+                )
+                if config["configurable"]["checkpoint_ns"] == "":
+                    for table in ("checkpoints", "writes"):
+                        await self.conn.execute(
+                            f"DELETE FROM {table} WHERE thread_id = ? "
+                            "AND (checkpoint_ns != '' OR checkpoint_id != ?)",
+                            (thread_id, checkpoint["id"])
+                        )
+                await self.conn.commit()
+            return next_config
+
+        async def adelete_thread(self, thread_id: str) -> None:
+            await super().adelete_thread(thread_id)
+            async with self.lock:
+                await self.conn.execute(
+                    "DELETE FROM checkpoint_threads WHERE thread_id = ?", (str(thread_id),)
+                )
+                await self.conn.commit()
+
+        async def prune_expired(self) -> int:
+            """Delete threads idle for longer than the TTL. Returns the number pruned."""
+            if not self.ttl_seconds:
+                return 0
+            await self.setup()
+            cutoff = time.time() - self.ttl_seconds
+            expired = "SELECT thread_id FROM checkpoint_threads WHERE last_access < ?"
+            async with self.lock:
+                for table in ("checkpoints", "writes"):
+                    await self.conn.execute(
+                        f"DELETE FROM {table} WHERE thread_id IN ({expired})", (cutoff,)
+                    )
+                cursor = await self.conn.execute(
+                    "DELETE FROM checkpoint_threads WHERE last_access < ?", (cutoff,)
+                )
+                await self.conn.commit()
+            return cursor.rowcount
+
+else:
+    BoundedSqliteSaver = None
+
+
+_checkpointer: Optional[BaseCheckpointSaver] = None
+_prune_task: Optional[asyncio.Task] = None
+
+
+def _build_memory_saver() -> BoundedInMemorySaver:
+    return BoundedInMemorySaver(
+        max_threads=settings.checkpoint_memory_max_threads,
+        ttl_seconds=settings.checkpoint_ttl_seconds,
+        serde=CompactSerializer(min_size=settings.checkpoint_compress_min_bytes)
+    )
+
+
+def get_checkpointer() -> BaseCheckpointSaver:
+    """
+    Get the active checkpointer.
+
+    Falls back to a bounded in-memory checkpointer when init_checkpointer()
+    has not run (scripts, tests).
+    """
+    global _checkpointer
+    if _checkpointer is None:
+        _checkpointer = _build_memory_saver()
+    return _checkpointer
+
+
+async def _prune_periodically(checkpointer, interval: float) -> None:
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            pruned = await checkpointer.prune_expired()
+            if pruned:
+                logger.info(f"Pruned {pruned} expired checkpoint threads")
+        except Exception as e:
+            logger.error(f"Error pruning checkpoints: {str(e)}", exc_info=True)
+
+
+async def init_checkpointer() -> BaseCheckpointSaver:
+    """Open the configured checkpointer and start TTL pruning."""
+    global _checkpointer, _prune_task
+    backend = settings.checkpoint_backend.lower()
+    serde = CompactSerializer(min_size=settings.checkpoint_compress_min_bytes)
+
+    if backend == "sqlite" and BoundedSqliteSaver is None:
+        logger.warning("langgraph-checkpoint-sqlite is not installed, using the in-memory checkpointer")
+        backend = "memory"
+
+    if backend == "sqlite":
+        directory = os.path.dirname(settings.checkpoint_sqlite_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        conn = await aiosqlite.connect(settings.checkpoint_sqlite_path)
+        checkpointer = BoundedSqliteSaver(conn, ttl_seconds=settings.checkpoint_ttl_seconds, serde=serde)
+        await checkpointer.setup()
+        await checkpointer.prune_expired()
+    elif backend == "memory":
+        checkpointer = _build_memory_saver()
+    else:
+        raise ValueError(f"Unsupported checkpoint backend: {settings.checkpoint_backend}")
+
+    _checkpointer = checkpointer
+    if settings.checkpoint_ttl_seconds and settings.checkpoint_prune_interval_seconds:
+        _prune_task = asyncio.create_task(
+            _prune_periodically(checkpointer, settings.checkpoint_prune_interval_seconds)
+        )
+    logger.info(f"Checkpointer initialized ({backend})")
+    return checkpointer
+
+
+async def close_checkpointer() -> None:
+    """Stop pruning and close the checkpointer."""
+    global _checkpointer, _prune_task
+    if _prune_task is not None:
+        _prune_task.cancel()
+        try:
+            await _prune_task
+        except asyncio.CancelledError:
+            pass
+        _prune_task = None
+    if BoundedSqliteSaver is not None and isinstance(_checkpointer, BoundedSqliteSaver):
+        await _checkpointer.conn.close()
+    _checkpointer = None
@@ -0,0 +1,150 @@
+"""
+Context Window - Fits conversation history into a per-model token budget
+
+Older turns that no longer fit are folded into a running summary. The
+summary and the number of messages it covers live in the agent state, so
+they are persisted by the checkpointer and only the newly overflowing
+messages are summarized on later turns.
+"""
+
+from typing import Callable, List, Optional
+from langchain_core.messages import AnyMessage, HumanMessage, SystemMessage
+from app.llm_functions.LLMDefination import ModelCapability
+from app.llm_functions.AgentLLM import get_summary_llm
+from app.llm_functions.Deadline import run_with_deadline
+from app.core.config import settings
+from app.core.utils import get_logger, trace_llm_operation, add_span_attributes
+
+logger = get_logger(__name__)
+
+# Rough token estimate (no tokenizer dependency): ~4 characters per token
+# plus a small per-message overhead for role/formatting.
+CHARS_PER_TOKEN = 4
+MESSAGE_OVERHEAD_TOKENS = 4
+
+
+def estimate_tokens(message) -> int:
+    """Estimate the token count of a message or plain string."""
+    content = message if isinstance(message, str) else message.content
+    if not isinstance(content, str):
+        content = "".join(
+            part if isinstance(part, str) else str(part.get("text", ""))
+            for part in content
+        )
+    return len(content) // CHARS_PER_TOKEN + MESSAGE_OVERHEAD_TOKENS
+
+
+def get_token_budget(capability: ModelCapability) -> int:
+    """Prompt token budget for a model capability (settings.context_token_budgets)."""
+    return settings.context_token_budgets.get(capability.value, settings.context_token_budget_default)
+
+
+def trim_to_budget(messages: List[AnyMessage], budget: int) -> List[AnyMessage]:
+    """Return the newest messages whose estimated size fits in ``budget``."""
+    used = 0
+    start = len(messages)
+    for index in range(len(messages) - 1, -1, -1):
+        used += estimate_tokens(messages[index])
+        if used > budget:
+            break
+        start = index
+    return messages[start:]
+
+
+class ContextWindow:
+    """
+    Selects the prompt messages for a model call.
+
+    When the unsummarized messages overflow the budget, the window is cut
+    back to ``target_ratio`` of the budget (so summarization runs once per
+    several turns rather than on every turn) and the dropped messages are
+    merged into the running summary.
+    """
+
+    def __init__(
+        self,
+        capability: ModelCapability = ModelCapability.BASIC,
+        summarizer: Optional[Callable] = None,
+        budget: Optional[int] = None,
+        target_ratio: Optional[float] = None
+    ):
+        self.capability = capability
+        self.summarizer = summarizer or get_summary_llm
+        self.budget = budget or get_token_budget(capability)
+        self.target_ratio = target_ratio or settings.context_target_ratio
+
+    async def fit(self, messages: List[AnyMessage], summary: str = "", summarized_count: int = 0) -> dict:
+        """
+        Fit messages into the budget.
+
+        Args:
+            messages: Full conversation, oldest first (the last one is the query)
+            summary: Running summary of the first ``summarized_count`` messages
+            summarized_count: Number of messages already covered by the summary
+
+        Returns:
+            Dict with the prompt ``messages``, the updated ``summary`` and
+            ``summarized_count``, and token estimates ``tokens_total`` (full
+            conversation), ``tokens_sent`` and ``tokens_saved``
+        """
+        if summarized_count > len(messages):
+            # State was rebuilt from history; the old summary no longer applies
+            summary, summarized_count = "", 0
+
+        sizes = [estimate_tokens(m) for m in messages]
+        tokens_total = sum(sizes)
+        summary_tokens = estimate_tokens(summary) if summary else 0
+
+        if summary_tokens + sum(sizes[summarized_count:]) > self.budget and len(messages) - summarized_count > 1:
+            # Keep the newest messages within the target, always the query itself
+            target = int(self.budget * self.target_ratio) - summary_tokens
+            keep_start = len(messages) - 1
+            used = sizes[-1]
+            while keep_start > summarized_count and used + sizes[keep_start - 1] <= target:
+                keep_start -= 1
+                used += sizes[keep_start]
+
+            if keep_start > summarized_count:
+                summary = await self.summarize(summary, messages[summarized_count:keep_start])
+                summarized_count = keep_start
+                summary_tokens = estimate_tokens(summary)
+
+        window = messages[summarized_count:]
+        if summary:
+            window = [SystemMessage(content=f"Summary of the earlier conversation:\n{summary}")] + window
+        tokens_sent = summary_tokens + sum(sizes[summarized_count:])
+
+        return {
+            "messages": window,
+            "summary": summary,
+            "summarized_count": summarized_count,
+            "tokens_total": tokens_total,
+            "tokens_sent": tokens_sent,
+            "tokens_saved": max(tokens_total - tokens_sent, 0)
+        }
+
+    async def summarize(self, summary: str, messages: List[AnyMessage]) -> str:
+        """Merge ``messages`` into the running ``summary``."""
+        with trace_llm_operation(
+            "agent.context.summarize",
+            attributes={
+                "context.summarized_messages": len(messages),
+                "context.previous_summary_length": len(summary)
+            }
+        ):
+            transcript = "\n".join(f"{m.type}: {m.content}" for m in messages)
+            prompt = [
+                SystemMessage(
+                    content=f"""You maintain a running summary of a conversation between a user and an assistant.
+                    Update the summary with the new messages. Keep facts, names, decisions and open questions.
+                    Respond with ONLY the updated summary, at most {settings.context_summary_max_tokens * 3 // 4} words."""
+                ),
+                HumanMessage(content=f"Current summary:\n{summary or '(none)'}\n\nNew messages:\n{transcript}")
+            ]
+
+            result = await run_with_deadline(self.summarizer().ainvoke(prompt), "Context summary")
+            updated = result.content.strip() if isinstance(result.content, str) else str(result.content)
+
+            add_span_attributes({"context.summary_length": len(updated)})
+            logger.info(f"Summarized {len(messages)} messages into the running summary")
+            return updated
@@ -0,0 +1,74 @@
+"""
+Deadline - Per-request time budget carried through the agent graph
+
+CallAgentGraph/StreamAgentGraph put an absolute deadline (monotonic clock)
+in ``config["configurable"]``; LangGraph propagates the config to every
+node, nested agent and tool, where LLM and tool calls are bounded by the
+time left instead of each using its own full timeout.
+"""
+
+import asyncio
+import time
+from typing import AsyncIterator, Awaitable, Optional, TypeVar
+from langgraph.config import get_config
+from app.core.config import settings
+from app.core.utils import DeadlineExceededException
+
+DEADLINE_KEY = "deadline"
+
+T = TypeVar("T")
+
+
+def new_deadline(timeout: Optional[float] = None) -> float:
+    """Deadline ``timeout`` seconds from now (default: settings.timeout)."""
+    return time.monotonic() + (timeout if timeout is not None else settings.timeout)
+
+
+def get_deadline() -> Optional[float]:
+    """Deadline of the graph run in progress, if any."""
+    try:
+        config = get_config()
+    except RuntimeError:  # not inside a graph run
+        return None
+    return config.get("configurable", {}).get(DEADLINE_KEY)
+
+
+def time_left(deadline: Optional[float] = None) -> Optional[float]:
+    """Seconds until the (current run's) deadline, or None if there is none."""
+    deadline = deadline if deadline is not None else get_deadline()
+    return None if deadline is None else deadline - time.monotonic()
+
+
+async def run_with_deadline(awaitable: Awaitable[T], operation: str, deadline: Optional[float] = None) -> T:
+    """Await ``awaitable``, cancelling it when the deadline passes."""
+    left = time_left(deadline)
+    if left is None:
+        return await awaitable
+    if left <= 0:
+        if asyncio.iscoroutine(awaitable):
+            awaitable.close()
+        raise DeadlineExceededException(f"{operation} skipped: request deadline already passed")
+    try:
+        return await asyncio.wait_for(awaitable, left)
+    except asyncio.TimeoutError:
+        raise DeadlineExceededException(f"{operation} exceeded the request deadline")
+
+
+async def iterate_with_deadline(items: AsyncIterator[T], operation: str, deadline: Optional[float] = None) -> AsyncIterator[T]:
+    """
+    Iterate ``items``, each step bounded by the time left until the deadline.
+
+    The wait is per step (not around the whole loop) so the timeout never
+    fires while the consumer is suspended between items.
+    """
+    iterator = items.__aiter__()
+    try:
+        while True:
+            try:
+                item = await run_with_deadline(iterator.__anext__(), operation, deadline)
+            except StopAsyncIteration:
+                return
+            yield item
+    finally:
+        if hasattr(iterator, "aclose"):
+            await iterator.aclose()
@@ -0,0 +1,124 @@
+"""
+Guardrail Batcher - Coalesce concurrent guardrail checks
+
+Queries reaching the guardrail model within ``guardrail_batch_window_ms``
+of each other (up to ``guardrail_batch_max_size``) are collected and sent
+together, and the verdicts are fanned back to the waiting graph runs. The
+window bounds the added latency; a full batch is sent at once.
+
+A batch mixes queries of different users, so every query is classified in
+its own request with its own single-item prompt: one user's text never
+shares a prompt with another's and cannot sway its verdict. The batch
+only saves requests for identical queries (a popular question asked by
+many users at once, before the verdict cache has it), which share one.
+"""
+
+import asyncio
+from typing import Callable, Optional
+from app.core.config import settings
+from app.core.utils import get_logger, add_span_attributes
+from app.llm_functions.AgentLLM import get_reasoning_llm
+
+logger = get_logger(__name__)
+
+
+class BatchMetrics:
+    def __init__(self):
+        self.items = 0
+        self.batches = 0
+        self.requests = 0
+
+    def as_dict(self) -> dict:
+        return {
+            "items": self.items,
+            "batches": self.batches,
+            "requests": self.requests,
+            "requests_saved": self.items - self.requests,
+            "avg_batch_size": round(self.items / self.batches, 2) if self.batches else 0.0
+        }
+
+
+class GuardrailBatcher:
+    """Collects guardrail checks into time-windowed, size-bounded batches."""
+
+    def __init__(self, window_ms: float, max_size: int, llm_factory: Callable = get_reasoning_llm):
+        self.window = window_ms / 1000
+        self.max_size = max_size
+        self.llm_factory = llm_factory
+        self.metrics = BatchMetrics()
+        self._pending = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._tasks = set()
+
+    async def check(self, query: str, validation_messages: list) -> str:
+        """Verdict for one query; ``validation_messages`` is its single-item prompt."""
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append((query, validation_messages, future))
+        if len(self._pending) >= self.max_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = asyncio.get_running_loop().call_later(self.window, self._flush)
+        return await future
+
+    def _flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending[:self.max_size], self._pending[self.max_size:]
+        if self._pending:
+            self._timer = asyncio.get_running_loop().call_later(self.window, self._flush)
+        if batch:
+            task = asyncio.create_task(self._run(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, batch) -> None:
+        self.metrics.items += len(batch)
+        self.metrics.batches += 1
+        # Identical queries have identical prompts: one request answers all of them
+        groups = {}
+        for query, messages, future in batch:
+            groups.setdefault(query, (messages, []))[1].append(future)
+        add_span_attributes({"guardrail.batch_size": len(batch), "guardrail.batch_requests": len(groups)})
+        verdicts = await asyncio.gather(
+            *(self._single(messages) for messages, _ in groups.values()),
+            return_exceptions=True
+        )
+        for (_, futures), verdict in zip(groups.values(), verdicts):
+            for future in futures:
+                if future.done():
+                    continue
+                if isinstance(verdict, BaseException):
+                    future.set_exception(verdict)
+                else:
+                    future.set_result(verdict)
+
+    async def _single(self, validation_messages: list) -> str:
+        self.metrics.requests += 1
+        return (await self.llm_factory().ainvoke(validation_messages)).content.strip().lower()
+
+    def stats(self) -> dict:
+        return self.metrics.as_dict()
+
+
+_batcher: Optional[GuardrailBatcher] = None
+
+
+def get_guardrail_batcher() -> Optional[GuardrailBatcher]:
+    """The batcher, or None if guardrail checks are sent one by one."""
+    return _batcher
+
+
+def init_guardrail_batcher() -> None:
+    """Start coalescing guardrail checks (application lifespan)."""
+    global _batcher
+    if settings.guardrail_batch_enabled:
+        _batcher = GuardrailBatcher(settings.guardrail_batch_window_ms, settings.guardrail_batch_max_size)
+        logger.info(
+            f"Guardrail batching enabled (window={settings.guardrail_batch_window_ms}ms, "
+            f"max_size={settings.guardrail_batch_max_size})"
+        )
+
+
+def get_guardrail_batch_stats() -> Optional[dict]:
+    return _batcher.stats() if _batcher is not None else None
@@ -0,0 +1,77 @@
+"""
+Guardrail Cache - Reuse guardrail verdicts for repeated inputs
+
+The guardrail verdict depends only on the user's message, so verdicts are
+cached by a hash of the normalized query ("hi", "thanks", a question
+re-sent after a reconnect) and the reasoning model is only consulted for
+novel inputs. Verdicts live in a bounded in-memory LRU with a TTL, backed
+by a SQLite table so they survive restarts.
+"""
+
+import hashlib
+from typing import Optional
+from app.core.config import settings
+from app.core.utils import get_logger
+from app.core.utils.cache import MISSING, SqliteCache, TieredCache, TTLCache
+from app.llm_functions.ResponseCache import normalize_query
+
+logger = get_logger(__name__)
+
+# Only well-formed verdicts are cached; anything else is re-asked next time
+CACHEABLE_VERDICTS = ("pass", "fail")
+
+
+def verdict_key(query: str) -> str:
+    return f"guardrail:{hashlib.sha256(normalize_query(query).encode()).hexdigest()}"
+
+
+class GuardrailCache:
+    """Verdict cache in front of the guardrail model."""
+
+    def __init__(self, cache: TieredCache):
+        self.cache = cache
+
+    async def get(self, query: str) -> Optional[str]:
+        verdict = await self.cache.get(verdict_key(query))
+        return None if verdict is MISSING else verdict
+
+    async def set(self, query: str, verdict: str) -> None:
+        if verdict in CACHEABLE_VERDICTS:
+            await self.cache.set(verdict_key(query), verdict, settings.guardrail_cache_ttl_seconds)
+
+    def stats(self) -> dict:
+        return self.cache.stats()
+
+
+_guardrail_cache: Optional[GuardrailCache] = None
+
+
+def get_guardrail_cache() -> Optional[GuardrailCache]:
+    """The verdict cache, or None if it was not opened (every input is checked)."""
+    return _guardrail_cache
+
+
+async def init_guardrail_cache() -> None:
+    """Open the verdict cache and its SQLite tier (application lifespan)."""
+    global _guardrail_cache
+    if not settings.guardrail_cache_enabled:
+        return
+    disk = None
+    if settings.guardrail_cache_sqlite_path:
+        disk = SqliteCache(settings.guardrail_cache_sqlite_path, table="guardrail_verdicts")
+        await disk.open()
+        await disk.prune_expired()
+    _guardrail_cache = GuardrailCache(TieredCache(TTLCache(settings.guardrail_cache_max_entries), disk))
+    logger.info("Guardrail verdict cache opened")
+
+
+async def close_guardrail_cache() -> None:
+    global _guardrail_cache
+    if _guardrail_cache is not None and _guardrail_cache.cache.disk is not None:
+        await _guardrail_cache.cache.disk.close()
+    _guardrail_cache = None
+
+
+def get_guardrail_cache_stats() -> Optional[dict]:
+    """Hit counts and hit rate of the verdict cache (None if not opened)."""
+    return _guardrail_cache.stats() if _guardrail_cache is not None else None
@@ -0,0 +1,154 @@
+"""
+Guardrail Classifier - Local fast path in front of the guardrail model
+
+Decides confident cases on the CPU and only escalates ambiguous inputs to
+the reasoning model:
+
+1. Rules: empty input, input without any letters or digits, and input
+   over ``guardrail_max_query_chars`` fail; short greetings/thanks pass.
+2. Blocklist: compiled ``guardrail_blocklist`` patterns fail.
+Everything else goes to the model. Queries it adjudicated are kept as
+hashed character n-gram vectors, and a new query whose nearest neighbours
+(at least ``guardrail_knn_min_votes`` close enough) all failed gets a kNN
+"fail" hint. The n-grams measure wording, not meaning ("make a cake" is a
+one-word edit of "make a bomb"), so the hint never decides: the model
+still does, and the hint's agreement with it is measured.
+
+A sample of local decisions (``guardrail_shadow_rate``) is re-checked by
+the model in the background to measure per-tier agreement.
+"""
+
+import random
+import re
+import zlib
+from typing import Optional, Tuple
+import numpy as np
+from app.core.config import settings
+from app.core.utils import get_logger
+from app.llm_functions.ResponseCache import normalize_query
+
+logger = get_logger(__name__)
+
+LOCAL_TIERS = ("rules", "blocklist")
+
+GREETING = re.compile(
+    r"^(hi|hello|hey|good (morning|afternoon|evening)|thanks|thank you|thx|ok|okay|bye|goodbye)( there)?$"
+)
+
+
+def featurize(text: str, dim: int) -> np.ndarray:
+    """L2-normalized hashed character trigram counts."""
+    vector = np.zeros(dim, dtype=np.float32)
+    padded = f"  {text} "
+    for i in range(len(padded) - 2):
+        vector[zlib.crc32(padded[i:i + 3].encode()) % dim] += 1.0
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+
+class GuardrailMetrics:
+    """Decisions per tier and agreement of local tiers and kNN hints with the model."""
+
+    def __init__(self):
+        self.decisions = {tier: 0 for tier in ("cache",) + LOCAL_TIERS + ("llm",)}
+        self.shadow_checks = {tier: 0 for tier in LOCAL_TIERS}
+        self.agreements = {tier: 0 for tier in LOCAL_TIERS}
+        self.knn_hints = 0
+        self.knn_hint_agreements = 0
+
+    def record(self, tier: str) -> None:
+        self.decisions[tier] += 1
+
+    def record_agreement(self, tier: str, agreed: bool) -> None:
+        self.shadow_checks[tier] += 1
+        self.agreements[tier] += int(agreed)
+
+    def record_hint(self, agreed: bool) -> None:
+        self.knn_hints += 1
+        self.knn_hint_agreements += int(agreed)
+
+    def as_dict(self) -> dict:
+        total = sum(self.decisions.values())
+        checks = sum(self.shadow_checks.values())
+        return {
+            "decisions": dict(self.decisions),
+            "hit_rates": {tier: round(count / total, 4) if total else 0.0 for tier, count in self.decisions.items()},
+            "local_rate": round(sum(self.decisions[t] for t in LOCAL_TIERS) / total, 4) if total else 0.0,
+            "shadow_checks": checks,
+            "agreement_rate": round(sum(self.agreements.values()) / checks, 4) if checks else None,
+            "knn_hints": self.knn_hints,
+            "knn_hint_agreement_rate": round(self.knn_hint_agreements / self.knn_hints, 4) if self.knn_hints else None
+        }
+
+
+class GuardrailClassifier:
+    """Rules and blocklist tiers, with nearest-neighbour hints over adjudicated queries."""
+
+    def __init__(self, dim: int = 512, max_examples: int = 5000):
+        self.dim = dim
+        self.max_examples = max_examples
+        self.blocklist = re.compile("|".join(f"(?:{p})" for p in settings.guardrail_blocklist), re.IGNORECASE) \
+            if settings.guardrail_blocklist else None
+        self._vectors = np.zeros((max_examples, dim), dtype=np.float32)
+        self._labels = np.zeros(max_examples, dtype=bool)  # True = pass
+        self._count = 0
+        self._next = 0
+        self.metrics = GuardrailMetrics()
+
+    def classify(self, query: str) -> Tuple[Optional[str], Optional[str]]:
+        """(verdict, tier) for a confident local decision, else (None, None)."""
+        text = normalize_query(query)
+        if not text or not any(c.isalnum() for c in text) or len(query) > settings.guardrail_max_query_chars:
+            return "fail", "rules"
+        if GREETING.match(text):
+            return "pass", "rules"
+        if self.blocklist is not None and self.blocklist.search(text):
+            return "fail", "blocklist"
+        return None, None
+
+    def hint(self, query: str) -> Optional[str]:
+        """"fail" if the close nearest neighbours all failed, else None; never a decision."""
+        if self._count < settings.guardrail_knn_min_votes:
+            return None
+        k = min(settings.guardrail_knn_neighbors, self._count)
+        scores = self._vectors[:self._count] @ featurize(normalize_query(query), self.dim)
+        top = np.argpartition(scores, -k)[-k:]
+        close = top[scores[top] >= settings.guardrail_knn_min_similarity]
+        if len(close) < settings.guardrail_knn_min_votes:
+            return None
+        return None if self._labels[close].any() else "fail"
+
+    def learn(self, query: str, verdict: str) -> None:
+        """Add a model-adjudicated query to the neighbour index (ring buffer)."""
+        if verdict not in ("pass", "fail"):
+            return
+        self._vectors[self._next] = featurize(normalize_query(query), self.dim)
+        self._labels[self._next] = verdict == "pass"
+        self._next = (self._next + 1) % self.max_examples
+        self._count = min(self._count + 1, self.max_examples)
+
+    def should_shadow(self) -> bool:
+        return random.random() < settings.guardrail_shadow_rate
+
+    def stats(self) -> dict:
+        return {**self.metrics.as_dict(), "examples": self._count}
+
+
+_classifier: Optional[GuardrailClassifier] = None
+
+
+def get_guardrail_classifier() -> Optional[GuardrailClassifier]:
+    """The local classifier, or None if it was not started (every input goes to the model)."""
+    return _classifier
+
+
+def init_guardrail_classifier() -> None:
+    """Build the local classifier (application lifespan)."""
+    global _classifier
+    if settings.guardrail_local_enabled:
+        _classifier = GuardrailClassifier(max_examples=settings.guardrail_knn_max_examples)
+        logger.info("Local guardrail classifier enabled")
+
+
+def get_guardrail_classifier_stats() -> Optional[dict]:
+    return _classifier.stats() if _classifier is not None else None
@@ -1,111 +1,373 @@
-"""
-LLM Call - Functions to call LLM and Agent Graph
-"""
-
-from typing import List, Optional
-from langchain_core.messages import HumanMessage, AnyMessage
-from app.llm_functions.LLMDefination import ModelCapability, get_chat_llm
-from app.llm_functions.AgentGraph import agentgraph
-from app.core.utils import get_logger, trace_llm_call, add_span_attributes
-
-logger = get_logger(__name__)
-
-
-@trace_llm_call(operation_name="llm.direct_call", capture_args=True)
-def CallLLM(query: str, capability: ModelCapability = ModelCapability.BASIC, mcp_tools=None):
-    """
-    Direct LLM call without agent graph.
-    
-    Args:
-        query: User query string
-        capability: Model capability type
-        mcp_tools: Optional tools for MCP
-        
-    Returns:
-        LLM response
-    """
-    logger.info(f"Calling LLM with query: {query}")
-    
-    # Add capability to trace
-    add_span_attributes({
-        "llm.capability": capability.value,
-        "llm.query_length": len(query),
-        "llm.has_mcp_tools": mcp_tools is not None
-    })
-    
-    llm = get_chat_llm(capability)
-    response = llm.invoke(query)
-    
-    # Add response metadata
-    add_span_attributes({
-        "llm.response_length": len(response.content) if hasattr(response, 'content') else 0
-    })
-    
-    return response
-
-
-@trace_llm_call(operation_name="llm.agent_graph", capture_args=True)
-async def CallAgentGraph(
-    query: str,
-    chat_id: int,
-    history: Optional[List[AnyMessage]] = None
-):
-    """
-    Call agent graph with user query and chat context.
-    Processes query through guardrail and synthesis agents.
-    
-    Args:
-        query: User query string
-        chat_id: Unique chat identifier (used as LangGraph thread_id)
-        history: Optional list of previous messages for context
-        
-    Returns:
-        Final response from the agent graph
-    """
-    logger.info(f"Calling Agent Graph with query: {query}, chat_id: {chat_id}")
-    
-    # Add query metadata to trace
-    add_span_attributes({
-        "agent.query_length": len(query),
-        "agent.chat_id": chat_id,
-        "agent.thread_id": str(chat_id),
-        "agent.history_length": len(history) if history else 0
-    })
-    
-    # Use chat_id as the unique thread identifier for LangGraph
-    config = {"configurable": {"thread_id": str(chat_id)}}
-    
-    # Build inputs: if history is provided, use it; otherwise start fresh
-    if history:
-        # Append the new query to the existing history
-        inputs = {
-            "chat_id": chat_id,
-            "messages": history + [HumanMessage(content=query)]
-        }
-    else:
-        # Start a new conversation
-        inputs = {
-            "chat_id": chat_id,
-            "messages": [HumanMessage(content=query)]
-        }
-    
-    try:
-        response = await agentgraph.ainvoke(inputs, config=config)
-        final_response = response['messages'][-1].content.strip()
-        
-        # Add response metadata
-        add_span_attributes({
-            "agent.response_length": len(final_response),
-            "agent.message_count": len(response['messages']),
-            "agent.status": "success"
-        })
-        
-        logger.info(f"Agent Graph response for chat {chat_id}: {final_response}")
-        return final_response
-    except Exception as e:
-        add_span_attributes({
-            "agent.status": "error",
-            "agent.error": str(e)
-        })
-        logger.error(f"Error in Agent Graph for chat {chat_id}: {str(e)}", exc_info=True)
-        raise
+"""
+LLM Call - Functions to call LLM and Agent Graph
+"""
+
+import asyncio
+from typing import AsyncIterator, Awaitable, Callable, Dict, List, Optional
+from langchain_core.messages import HumanMessage, AnyMessage, AIMessage, AIMessageChunk
+from app.llm_functions.LLMDefination import ModelCapability, get_chat_llm
+from app.llm_functions.AgentGraph import get_agent_graph, get_response_node, check_guardrail, SYNTHESIS_STREAM_TAG
+from app.llm_functions.ResponseCache import CacheLookup, get_response_cache
+from app.llm_functions.Deadline import DEADLINE_KEY, new_deadline, run_with_deadline, iterate_with_deadline
+from app.core.config import settings
+from app.core.utils import get_logger, trace_llm_call, trace_llm_operation, add_span_attributes
+
+logger = get_logger(__name__)
+
+
+@trace_llm_call(operation_name="llm.direct_call", capture_args=True)
+def CallLLM(query: str, capability: ModelCapability = ModelCapability.BASIC, mcp_tools=None):
+    """
+    Direct LLM call without agent graph.
+    
+    Args:
+        query: User query string
+        capability: Model capability type
+        mcp_tools: Optional tools for MCP
+        
+    Returns:
+        LLM response
+    """
+    logger.info(f"Calling LLM with query: {query}")
+    
+    # Add capability to trace
+    add_span_attributes({
+        "llm.capability": capability.value,
+        "llm.query_length": len(query),
+        "llm.has_mcp_tools": mcp_tools is not None
+    })
+    
+    llm = get_chat_llm(capability)
+    response = llm.invoke(query)
+    
+    # Add response metadata
+    add_span_attributes({
+        "llm.response_length": len(response.content) if hasattr(response, 'content') else 0
+    })
+    
+    return response
+
+
+@trace_llm_call(operation_name="llm.agent_graph", capture_args=True)
+async def CallAgentGraph(
+    query: str,
+    chat_id: int,
+    history: Optional[List[AnyMessage]] = None,
+    history_loader: Optional[Callable[[], Awaitable[List[AnyMessage]]]] = None,
+    use_cache: bool = False,
+    timeout: Optional[float] = None
+):
+    """
+    Call agent graph with user query and chat context.
+    Processes query through guardrail and synthesis agents.
+    
+    Args:
+        query: User query string
+        chat_id: Unique chat identifier (used as LangGraph thread_id)
+        history: Optional list of previous messages, used if the thread is cold
+        history_loader: Optional coroutine function loading the history, only
+            awaited if the thread is cold
+        use_cache: Answer repeated questions from the response cache
+        timeout: Seconds the whole run may take (default: settings.timeout);
+            the deadline is carried in the run config to every LLM and tool call
+        
+    Returns:
+        Final response from the agent graph
+    """
+    logger.info(f"Calling Agent Graph with query: {query}, chat_id: {chat_id}")
+    
+    # Add query metadata to trace
+    add_span_attributes({
+        "agent.query_length": len(query),
+        "agent.chat_id": chat_id,
+        "agent.thread_id": str(chat_id)
+    })
+    
+    # Use chat_id as the unique thread identifier for LangGraph
+    config = BuildRunConfig(chat_id, timeout)
+    agentgraph = get_agent_graph()
+    
+    try:
+        inputs = await PrepareGraphInputs(agentgraph, config, query, chat_id, history, history_loader)
+        lookup = await LookupCachedResponse(agentgraph, config, query, inputs, use_cache)
+        if lookup is not None and lookup.answer is not None:
+            await RecordCachedTurn(agentgraph, config, inputs, lookup.answer)
+            add_span_attributes({
+                "agent.response_length": len(lookup.answer),
+                "agent.status": "success"
+            })
+            return lookup.answer
+        
+        response = await run_with_deadline(
+            agentgraph.ainvoke(inputs, config=config),
+            "Agent graph",
+            config["configurable"][DEADLINE_KEY]
+        )
+        final_response = response['messages'][-1].content.strip()
+        if lookup is not None:
+            get_response_cache().store(lookup, final_response)
+        
+        # Add response metadata
+        add_span_attributes({
+            "agent.response_length": len(final_response),
+            "agent.message_count": len(response['messages']),
+            "agent.status": "success"
+        })
+        
+        logger.info(f"Agent Graph response for chat {chat_id}: {final_response}")
+        return final_response
+    except asyncio.CancelledError:
+        add_span_attributes({"agent.status": "cancelled"})
+        logger.info(f"Agent Graph run cancelled for chat {chat_id}")
+        raise
+    except Exception as e:
+        add_span_attributes({
+            "agent.status": "error",
+            "agent.error": str(e)
+        })
+        logger.error(f"Error in Agent Graph for chat {chat_id}: {str(e)}", exc_info=True)
+        raise
+
+
+def BuildRunConfig(chat_id: int, timeout: Optional[float] = None) -> dict:
+    """
+    Run config of one agent graph turn.
+    
+    The chat_id is the LangGraph thread_id. The absolute deadline travels in
+    ``configurable`` so nested agents, LLM and tool calls can bound themselves
+    by the time left; the recursion limit caps the graph's own steps.
+    """
+    return {
+        "configurable": {"thread_id": str(chat_id), DEADLINE_KEY: new_deadline(timeout)},
+        "recursion_limit": settings.max_iterations
+    }
+
+
+def BuildGraphInputs(query: str, chat_id: int, history: Optional[List[AnyMessage]] = None) -> dict:
+    """
+    Build the agent graph inputs for a user query.
+    
+    Args:
+        query: User query string
+        chat_id: Unique chat identifier
+        history: Optional list of previous messages for context
+        
+    Returns:
+        Graph input dictionary
+    """
+    if history:
+        # Append the new query to the existing history
+        return {
+            "chat_id": chat_id,
+            "messages": history + [HumanMessage(content=query)]
+        }
+    # Start a new conversation
+    return {
+        "chat_id": chat_id,
+        "messages": [HumanMessage(content=query)]
+    }
+
+
+async def PrepareGraphInputs(
+    graph,
+    config: dict,
+    query: str,
+    chat_id: int,
+    history: Optional[List[AnyMessage]] = None,
+    history_loader: Optional[Callable[[], Awaitable[List[AnyMessage]]]] = None
+) -> dict:
+    """
+    Build the graph inputs for one turn of a chat thread.
+    
+    AgentState.messages is append-only and the checkpointer already holds the
+    conversation of a warm thread, so only the new HumanMessage is sent.
+    History is only used to hydrate a cold thread (new chat, or a thread
+    evicted/pruned from the checkpointer).
+    
+    Args:
+        graph: Compiled agent graph
+        config: Run config carrying the thread_id
+        query: User query string
+        chat_id: Unique chat identifier
+        history: Optional list of previous messages
+        history_loader: Optional coroutine function loading the history
+        
+    Returns:
+        Graph input dictionary
+    """
+    if await graph.checkpointer.aget_tuple(config) is not None:
+        add_span_attributes({"agent.thread_warm": True, "agent.history_length": 0})
+        return BuildGraphInputs(query, chat_id)
+    
+    if history is None and history_loader is not None:
+        history = await history_loader()
+    add_span_attributes({
+        "agent.thread_warm": False,
+        "agent.history_length": len(history) if history else 0
+    })
+    return BuildGraphInputs(query, chat_id, history)
+
+
+async def LookupCachedResponse(graph, config: dict, query: str, inputs: dict, use_cache: bool) -> Optional[CacheLookup]:
+    """
+    Look the query up in the response cache, keyed on the whole prior
+    conversation of the thread. Semantic hits are only served if the new
+    wording passes the guardrail.
+    
+    Returns:
+        The lookup (with ``answer`` set on a hit), or None if caching is off
+    """
+    if not (use_cache and settings.response_cache_enabled):
+        return None
+    state = await graph.aget_state(config)
+    context = state.values.get("messages") or inputs["messages"][:-1]
+    lookup = await get_response_cache().lookup(query, context, validate=PassesGuardrail)
+    add_span_attributes({"response_cache.tier": lookup.tier})
+    return lookup
+
+
+async def PassesGuardrail(query: str) -> bool:
+    """Guardrail check for a paraphrase before it is answered from the semantic tier."""
+    verdict, _ = await check_guardrail(HumanMessage(content=query))
+    return verdict == "pass"
+
+
+async def RecordCachedTurn(graph, config: dict, inputs: dict, answer: str) -> None:
+    """Append a cached answer to the thread as if the answering agent had produced it."""
+    await graph.aupdate_state(
+        config,
+        {**inputs, "messages": inputs["messages"] + [AIMessage(content=answer)], "guardrail_status": "pass"},
+        as_node=get_response_node()
+    )
+
+
+def GetChunkText(message) -> str:
+    """Extract the plain text of a (possibly multi-part) message chunk."""
+    content = message.content
+    if isinstance(content, str):
+        return content
+    parts = []
+    for part in content:
+        if isinstance(part, str):
+            parts.append(part)
+        elif isinstance(part, dict) and part.get("type") == "text":
+            parts.append(part.get("text", ""))
+    return "".join(parts)
+
+
+async def StreamAgentGraph(
+    query: str,
+    chat_id: int,
+    history: Optional[List[AnyMessage]] = None,
+    history_loader: Optional[Callable[[], Awaitable[List[AnyMessage]]]] = None,
+    use_cache: bool = False,
+    timeout: Optional[float] = None
+) -> AsyncIterator[Dict[str, str]]:
+    """
+    Stream the agent graph for a user query, token by token.
+    
+    Runs the same graph as CallAgentGraph but through ``astream`` so that
+    tokens generated by the synthesis agent are forwarded as soon as the
+    model produces them. Guardrail verdicts and tool-calling turns are not
+    forwarded. In speculative mode the synthesis tokens arrive as custom
+    stream events, released once the guardrail has passed.
+    
+    Args:
+        query: User query string
+        chat_id: Unique chat identifier (used as LangGraph thread_id)
+        history: Optional list of previous messages, used if the thread is cold
+        history_loader: Optional coroutine function loading the history, only
+            awaited if the thread is cold
+        use_cache: Answer repeated questions from the response cache
+        timeout: Seconds the whole run may take (default: settings.timeout)
+        
+    Yields:
+        ``{"type": "delta", "content": ...}`` for every synthesized token chunk
+        (a cached answer is sent as a single delta), then a single
+        ``{"type": "final", "content": ...}`` with the full response
+    """
+    logger.info(f"Streaming Agent Graph with query: {query}, chat_id: {chat_id}")
+    
+    with trace_llm_operation(
+        "llm.agent_graph.stream",
+        attributes={
+            "agent.query_length": len(query),
+            "agent.chat_id": chat_id,
+            "agent.thread_id": str(chat_id)
+        }
+    ):
+        config = BuildRunConfig(chat_id, timeout)
+        agentgraph = get_agent_graph()
+        
+        final_state = None
+        delta_count = 0
+        try:
+            inputs = await PrepareGraphInputs(agentgraph, config, query, chat_id, history, history_loader)
+            lookup = await LookupCachedResponse(agentgraph, config, query, inputs, use_cache)
+            if lookup is not None and lookup.answer is not None:
+                await RecordCachedTurn(agentgraph, config, inputs, lookup.answer)
+                add_span_attributes({
+                    "agent.response_length": len(lookup.answer),
+                    "agent.delta_count": 1,
+                    "agent.status": "success"
+                })
+                yield {"type": "delta", "content": lookup.answer}
+                yield {"type": "final", "content": lookup.answer}
+                return
+            
+            # subgraphs=True is required: the synthesis model runs inside the
+            # tool-calling agent, which is a nested graph.
+            async for namespace, mode, data in iterate_with_deadline(
+                agentgraph.astream(
+                    inputs,
+                    config=config,
+                    stream_mode=["messages", "values", "custom"],
+                    subgraphs=True
+                ),
+                "Agent graph",
+                config["configurable"][DEADLINE_KEY]
+            ):
+                if mode == "values":
+                    if not namespace:
+                        final_state = data
+                    continue
+                if mode == "custom":
+                    if isinstance(data, dict) and data.get("type") == "delta":
+                        delta_count += 1
+                        yield data
+                    continue
+                
+                chunk, metadata = data
+                if SYNTHESIS_STREAM_TAG not in (metadata.get("tags") or []):
+                    continue
+                if not isinstance(chunk, (AIMessageChunk, AIMessage)) or chunk.tool_calls:
+                    continue
+                
+                text = GetChunkText(chunk)
+                if text:
+                    delta_count += 1
+                    yield {"type": "delta", "content": text}
+            
+            final_response = final_state['messages'][-1].content.strip()
+            if lookup is not None:
+                get_response_cache().store(lookup, final_response)
+            
+            add_span_attributes({
+                "agent.response_length": len(final_response),
+                "agent.delta_count": delta_count,
+                "agent.status": "success"
+            })
+            
+            logger.info(f"Agent Graph streamed response for chat {chat_id}: {final_response}")
+            yield {"type": "final", "content": final_response}
+        except asyncio.CancelledError:
+            add_span_attributes({"agent.status": "cancelled"})
+            logger.info(f"Agent Graph stream cancelled for chat {chat_id}")
+            raise
+        except Exception as e:
+            add_span_attributes({
+                "agent.status": "error",
+                "agent.error": str(e)
+            })
+            logger.error(f"Error streaming Agent Graph for chat {chat_id}: {str(e)}", exc_info=True)
+            raise
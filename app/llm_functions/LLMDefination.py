@@ -1,101 +1,164 @@
-from enum import Enum
-import httpx
-from langchain_openai import ChatOpenAI, OpenAIEmbeddings
-from openai import OpenAI
-from langchain_google_genai import ChatGoogleGenerativeAI
-from app.core.config import settings
-
-# Global Configuration
-# We use settings for configuration, but keep the HTTP client global for reuse
-HTTP_CLIENT = httpx.Client(verify=False)
-
-class ModelCapability(Enum):
-    BASIC = "basic"           # For simple queries, summaries
-    MODERATE = "moderate"
-    REASONING = "reasoning"   # For complex logic, math (DeepSeek R1)
-    VISION = "vision"         # For image analysis
-    HIGH_PERF = "high_perf"   # For code gen, complex nuance
-    EMBEDDING = "embedding"   # For RAG/Vector Stores
-    AUDIO = "audio"           # For Speech-to-text
-
-def get_model_name(capability: ModelCapability):
-    """Maps capability to the specific model string from settings"""
-    mapping = {
-        ModelCapability.BASIC: settings.MODEL_CHAT_BASIC,
-        ModelCapability.MODERATE: settings.MODEL_CHAT_MOD,
-        ModelCapability.HIGH_PERF: settings.MODEL_CHAT_OPEN,
-        ModelCapability.REASONING: settings.MODEL_REASONING,
-        ModelCapability.VISION: settings.MODEL_VISION,
-        ModelCapability.EMBEDDING: settings.MODEL_EMBEDDING,
-        ModelCapability.AUDIO: settings.MODEL_AUDIO,
-    }
-    return mapping.get(capability)
-
-def get_chat_llm(capability: ModelCapability = ModelCapability.BASIC, temperature: float = 0.7):
-    """
-    Returns a Chat Model instance (OpenAI or Google) based on configuration.
-    """
-    from app.core.utils import trace_llm_operation
-    
-    model_name = get_model_name(capability)
-    
-    # Validation: Ensure we don't pass Embedding/Audio models to the Chat client
-    if capability in [ModelCapability.EMBEDDING, ModelCapability.AUDIO]:
-        raise ValueError(f"Capability {capability.name} cannot be used with get_chat_llm")
-
-    # DeepSeek R1 (Reasoning) usually benefits from lower temperature
-    if capability == ModelCapability.REASONING:
-        temperature = 0.1
-    
-    # Trace model initialization
-    with trace_llm_operation(
-        "llm.model.initialize",
-        attributes={
-            "llm.model": model_name or "default",
-            "llm.capability": capability.value,
-            "llm.temperature": temperature,
-            "llm.provider": "ChatOpenAI"
-        }
-    ):
-
-            return ChatGoogleGenerativeAI(
-                model=model_name or "gemini-2.5-flash",
-                google_api_key="",
-                temperature=temperature,
-                convert_system_message_to_human=True
-            )
-            # Default to OpenAI-compatible (works for OpenAI, DeepSeek, etc.)
-            # return ChatOpenAI(
-            #     base_url=settings.API_ENDPOINT,
-            #     model=model_name or settings.default_model,
-            #     api_key=settings.API_KEY,
-            #     http_client=HTTP_CLIENT,
-            #     temperature=temperature
-            # )
-
-def get_embeddings():
-    """
-    Returns the OpenAIEmbeddings client specifically for Vector operations.
-    """
-    model_name = get_model_name(ModelCapability.EMBEDDING)
-    print(f"Initializing Embeddings: {model_name}")
-    
-    return OpenAIEmbeddings(
-        base_url=settings.API_ENDPOINT,
-        model=model_name or settings.embedding_model,
-        api_key=settings.API_KEY,
-        http_client=HTTP_CLIENT
-    )
-
-def get_audio_client():
-    """
-    LangChain ChatOpenAI does not support Whisper natively for transcription.
-    We return the raw OpenAI client wrapper for this.
-    """
-    print(f"Initializing Audio Client")
-    return OpenAI(
-        base_url=settings.API_ENDPOINT,
-        api_key=settings.API_KEY,
-        http_client=HTTP_CLIENT
-    )
-
+from enum import Enum
+from typing import Any, Callable
+import threading
+from langchain_openai import ChatOpenAI, OpenAIEmbeddings
+from openai import OpenAI
+from langchain_google_genai import ChatGoogleGenerativeAI
+from app.core.config import settings
+from app.core.utils.http_pool import get_http_client, get_async_http_client
+
+# Global Configuration
+# We use settings for configuration; HTTP clients come from the shared,
+# lifespan-managed connection pool (app.core.utils.http_pool)
+
+class ModelCapability(Enum):
+    BASIC = "basic"           # For simple queries, summaries
+    MODERATE = "moderate"
+    REASONING = "reasoning"   # For complex logic, math (DeepSeek R1)
+    VISION = "vision"         # For image analysis
+    HIGH_PERF = "high_perf"   # For code gen, complex nuance
+    EMBEDDING = "embedding"   # For RAG/Vector Stores
+    AUDIO = "audio"           # For Speech-to-text
+
+def get_model_name(capability: ModelCapability):
+    """Maps capability to the specific model string from settings"""
+    mapping = {
+        ModelCapability.BASIC: settings.MODEL_CHAT_BASIC,
+        ModelCapability.MODERATE: settings.MODEL_CHAT_MOD,
+        ModelCapability.HIGH_PERF: settings.MODEL_CHAT_OPEN,
+        ModelCapability.REASONING: settings.MODEL_REASONING,
+        ModelCapability.VISION: settings.MODEL_VISION,
+        ModelCapability.EMBEDDING: settings.MODEL_EMBEDDING,
+        ModelCapability.AUDIO: settings.MODEL_AUDIO,
+    }
+    return mapping.get(capability)
+
+class ModelRegistry:
+    """
+    Process-wide cache of model clients.
+
+    Each client is built once per key and reused across requests, together
+    with its underlying connection pool.
+    """
+
+    def __init__(self):
+        self._models = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: tuple, factory: Callable[[], Any]) -> Any:
+        """Return the client cached under ``key``, building it with ``factory`` on a miss."""
+        model = self._models.get(key)
+        if model is not None:
+            self.hits += 1
+            return model
+        with self._lock:
+            model = self._models.get(key)
+            if model is None:
+                model = factory()
+                self._models[key] = model
+                self.misses += 1
+            else:
+                self.hits += 1
+        return model
+
+    def stats(self) -> dict:
+        return {"size": len(self._models), "hits": self.hits, "misses": self.misses}
+
+    def clear(self):
+        with self._lock:
+            self._models.clear()
+            self.hits = 0
+            self.misses = 0
+
+
+MODEL_REGISTRY = ModelRegistry()
+
+# Provider used by get_chat_llm, part of the registry key
+CHAT_PROVIDER = "google"
+
+
+def get_chat_llm(capability: ModelCapability = ModelCapability.BASIC, temperature: float = 0.7):
+    """
+    Returns a Chat Model instance (OpenAI or Google) based on configuration.
+    Instances are cached per (capability, temperature, provider).
+    """
+    # Validation: Ensure we don't pass Embedding/Audio models to the Chat client
+    if capability in [ModelCapability.EMBEDDING, ModelCapability.AUDIO]:
+        raise ValueError(f"Capability {capability.name} cannot be used with get_chat_llm")
+
+    # DeepSeek R1 (Reasoning) usually benefits from lower temperature
+    if capability == ModelCapability.REASONING:
+        temperature = 0.1
+
+    return MODEL_REGISTRY.get(
+        (capability, temperature, CHAT_PROVIDER),
+        lambda: _build_chat_llm(capability, temperature)
+    )
+
+
+def _build_chat_llm(capability: ModelCapability, temperature: float):
+    """Construct a new chat model client (registry miss)."""
+    from app.core.utils import trace_llm_operation
+    
+    model_name = get_model_name(capability)
+    
+    # Trace model initialization
+    with trace_llm_operation(
+        "llm.model.initialize",
+        attributes={
+            "llm.model": model_name or "default",
+            "llm.capability": capability.value,
+            "llm.temperature": temperature,
+            "llm.provider": "ChatOpenAI"
+        }
+    ):
+
+            return ChatGoogleGenerativeAI(
+                model=model_name or "gemini-2.5-flash",
+                google_api_key="",
+                temperature=temperature,
+                convert_system_message_to_human=True
+            )
+            # Default to OpenAI-compatible (works for OpenAI, DeepSeek, etc.)
+            # return ChatOpenAI(
+            #     base_url=settings.API_ENDPOINT,
+            #     model=model_name or settings.default_model,
+            #     api_key=settings.API_KEY,
+            #     http_client=get_http_client(),
+            #     http_async_client=get_async_http_client(),
+            #     temperature=temperature
+            # )
+
+def get_model_registry_stats() -> dict:
+    """Hit/miss counters and size of the model registry."""
+    return MODEL_REGISTRY.stats()
+
+def get_embeddings():
+    """
+    Returns the OpenAIEmbeddings client specifically for Vector operations.
+    """
+    model_name = get_model_name(ModelCapability.EMBEDDING)
+    print(f"Initializing Embeddings: {model_name}")
+    
+    return OpenAIEmbeddings(
+        base_url=settings.API_ENDPOINT,
+        model=model_name or settings.embedding_model,
+        api_key=settings.API_KEY,
+        http_client=get_http_client(),
+        http_async_client=get_async_http_client()
+    )
+
+def get_audio_client():
+    """
+    LangChain ChatOpenAI does not support Whisper natively for transcription.
+    We return the raw OpenAI client wrapper for this.
+    """
+    print(f"Initializing Audio Client")
+    return OpenAI(
+        base_url=settings.API_ENDPOINT,
+        api_key=settings.API_KEY,
+        http_client=get_http_client()
+    )
+
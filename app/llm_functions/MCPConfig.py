@@ -0,0 +1,118 @@
+"""
+MCP Config - Parsed, validated MCP server configuration
+
+mcp_config.json is read and validated once and then served from memory,
+so callers on the request path do no file I/O. refresh() re-reads the file
+only when its mtime or size changed and reparses only when its content
+hash changed; it reports which servers were added, removed or modified so
+the connection manager can reconnect just those.
+"""
+
+import hashlib
+import json
+import os
+from typing import Dict, Optional, Set
+from app.core.config import settings
+from app.core.utils import get_logger
+from app.core.utils.exceptions import ValidationException
+from app.llm_functions.MCPInProcess import INPROCESS_TRANSPORT
+
+logger = get_logger(__name__)
+
+# Field each transport needs to locate its server
+REQUIRED_FIELDS = {
+    "stdio": "command",
+    "sse": "url",
+    "streamable_http": "url",
+    "streamable-http": "url",
+    "http": "url",
+    "websocket": "url",
+    INPROCESS_TRANSPORT: "module"
+}
+
+
+def validate_mcp_config(config) -> Dict[str, dict]:
+    """Check the shape of an MCP config; raise ValidationException if invalid."""
+    if not isinstance(config, dict):
+        raise ValidationException("MCP config must be an object of server name -> connection")
+    for name, connection in config.items():
+        if not isinstance(connection, dict):
+            raise ValidationException(f"MCP server '{name}' must be an object")
+        transport = connection.get("transport")
+        if transport not in REQUIRED_FIELDS:
+            raise ValidationException(f"MCP server '{name}' has unknown transport '{transport}'")
+        if not connection.get(REQUIRED_FIELDS[transport]):
+            raise ValidationException(f"MCP server '{name}' ({transport}) needs '{REQUIRED_FIELDS[transport]}'")
+    return config
+
+
+class MCPConfigLoader:
+    """Caches one config file, reloading it only when it changes."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.config: Optional[Dict[str, dict]] = None
+        self.digest: Optional[str] = None
+        self.reloads = 0
+        self._stat = None
+
+    def get(self) -> Dict[str, dict]:
+        """The cached config, loaded on first use."""
+        if self.config is None:
+            self.refresh()
+        return self.config
+
+    def refresh(self) -> Set[str]:
+        """
+        Reload the file if it changed.
+
+        Returns the names of servers that were added, removed or modified
+        (empty if nothing changed). An invalid file is logged and ignored
+        once a valid config has been loaded.
+        """
+        stat = os.stat(self.path)
+        signature = (stat.st_mtime_ns, stat.st_size)
+        if self.config is not None and signature == self._stat:
+            return set()
+        self._stat = signature
+
+        with open(self.path, "rb") as f:
+            raw = f.read()
+        digest = hashlib.sha256(raw).hexdigest()
+        if digest == self.digest:
+            return set()
+
+        try:
+            config = validate_mcp_config(json.loads(raw))
+        except (ValueError, ValidationException) as e:
+            if self.config is None:
+                raise
+            logger.error(f"Ignoring invalid MCP config {self.path}: {str(e)}")
+            return set()
+
+        previous = self.config or {}
+        changed = {
+            name for name in previous.keys() | config.keys()
+            if previous.get(name) != config.get(name)
+        }
+        self.config = config
+        self.digest = digest
+        self.reloads += 1
+        if self.reloads > 1:
+            logger.info(f"MCP config reloaded, changed servers: {sorted(changed)}")
+        return changed
+
+
+_loader: Optional[MCPConfigLoader] = None
+
+
+def get_mcp_config_loader() -> MCPConfigLoader:
+    global _loader
+    if _loader is None or _loader.path != settings.mcp_config_path:
+        _loader = MCPConfigLoader(settings.mcp_config_path)
+    return _loader
+
+
+def get_mcp_config() -> Dict[str, dict]:
+    """The current MCP config, served from memory."""
+    return get_mcp_config_loader().get()
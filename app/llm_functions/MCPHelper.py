@@ -1,64 +1,88 @@
-import asyncio
-import json
-from app.core.utils import trace_llm_operation, add_span_attributes
-
-async def GetMCPConfig():
-    f=open('./app/llm_functions/mcp_config.json')
-    content=f.read()
-    return content
-
-async def InvokeLLMWithMCP(llm,messages,mcpconfig):
-    """Invoke LLM with MCP tools integration."""
-    with trace_llm_operation(
-        "llm.mcp.invoke",
-        attributes={
-            "mcp.enabled": True,
-            "mcp.config_loaded": mcpconfig is not None
-        }
-    ):
-        loop = asyncio.get_event_loop()
-        executeTask = loop.create_task(
-            InvokeLLMWithMCPInner(llm,messages,mcpconfig)
-        )
-        response = await executeTask
-        return response
-
-def GetResponseValue(response):
-    if isinstance(response, str):
-        return response
-    elif hasattr(response, "content"):
-        return response.content
-    else:
-        return response
-        
-async def InvokeLLMWithMCPInner(llm,messages,mcpconfig):
-    """Inner function to create and invoke React agent with MCP tools."""
-    with trace_llm_operation(
-        "llm.mcp.react_agent",
-        attributes={
-            "agent.type": "react",
-            "mcp.tools_enabled": True
-        }
-    ):
-        from langchain_mcp_adapters.client import MultiServerMCPClient
-        from langgraph.prebuilt import create_react_agent
-        mcpconfig=json.loads(mcpconfig)
-        client= MultiServerMCPClient( mcpconfig )
-        tools = await client.get_tools()
-        
-        add_span_attributes({
-            "mcp.tool_count": len(tools),
-            "mcp.servers": list(mcpconfig.keys()) if isinstance(mcpconfig, dict) else []
-        })
-        
-        agent = create_react_agent(llm,tools,debug=True)
-        resp =await agent.ainvoke(
-               messages
-                )
-        responeMessage=GetResponseValue(resp['messages'][-1])
-        
-        add_span_attributes({
-            "mcp.response_length": len(str(responeMessage))
-        })
-        
+import asyncio
+from langgraph.errors import GraphRecursionError
+from app.core.config import settings
+from app.core.utils import AgentException, trace_llm_operation, add_span_attributes
+from app.llm_functions.Deadline import run_with_deadline
+from app.llm_functions.MCPConfig import get_mcp_config
+from app.llm_functions.MCPManager import get_mcp_manager
+from app.llm_functions.MCPInProcess import is_inprocess, create_inprocess_session, load_inprocess_tools
+
+async def GetMCPConfig():
+    """The parsed MCP server config (cached, reloaded by the manager on change)."""
+    return get_mcp_config()
+
+async def InvokeLLMWithMCP(llm,messages,mcpconfig):
+    """Invoke LLM with MCP tools integration."""
+    with trace_llm_operation(
+        "llm.mcp.invoke",
+        attributes={
+            "mcp.enabled": True,
+            "mcp.config_loaded": mcpconfig is not None
+        }
+    ):
+        loop = asyncio.get_event_loop()
+        executeTask = loop.create_task(
+            InvokeLLMWithMCPInner(llm,messages,mcpconfig)
+        )
+        response = await executeTask
+        return response
+
+def GetResponseValue(response):
+    if isinstance(response, str):
+        return response
+    elif hasattr(response, "content"):
+        return response.content
+    else:
+        return response
+        
+async def InvokeLLMWithMCPInner(llm,messages,mcpconfig):
+    """Inner function to create and invoke React agent with MCP tools."""
+    with trace_llm_operation(
+        "llm.mcp.react_agent",
+        attributes={
+            "agent.type": "react",
+            "mcp.tools_enabled": True
+        }
+    ):
+        from langgraph.prebuilt import create_react_agent
+        manager = get_mcp_manager()
+        if manager is not None:
+            # Tools bound to the persistent sessions opened at startup
+            tools = await manager.get_tools()
+            servers = list(manager.servers.keys())
+        else:
+            # No connection manager running (e.g. scripts): connect per call
+            from langchain_mcp_adapters.client import MultiServerMCPClient
+            inprocess={name: conn for name, conn in mcpconfig.items() if is_inprocess(conn)}
+            remote={name: conn for name, conn in mcpconfig.items() if not is_inprocess(conn)}
+            tools = []
+            for name, conn in inprocess.items():
+                async with create_inprocess_session(conn) as session:
+                    tools.extend(await load_inprocess_tools(session, name))
+            if remote:
+                client= MultiServerMCPClient( remote )
+                tools.extend(await client.get_tools())
+            servers = list(mcpconfig.keys()) if isinstance(mcpconfig, dict) else []
+        
+        add_span_attributes({
+            "mcp.tool_count": len(tools),
+            "mcp.servers": servers,
+            "mcp.pooled": manager is not None
+        })
+        
+        agent = create_react_agent(llm,tools,debug=True)
+        # Bounded by max_iterations model turns and the request deadline
+        try:
+            resp =await run_with_deadline(
+                agent.ainvoke(messages, config={"recursion_limit": 2*settings.max_iterations+1}),
+                "MCP agent"
+            )
+        except GraphRecursionError:
+            raise AgentException(f"MCP tool loop exceeded {settings.max_iterations} iterations")
+        responeMessage=GetResponseValue(resp['messages'][-1])
+        
+        add_span_attributes({
+            "mcp.response_length": len(str(responeMessage))
+        })
+        
         return responeMessage
\ No newline at end of file
@@ -0,0 +1,92 @@
+"""
+MCP In-Process - Mount first-party FastMCP servers inside the application
+
+A server entry with ``"transport": "inprocess"`` names the module and
+attribute of a FastMCP app instead of a command to spawn:
+
+    "current_date": {
+        "transport": "inprocess",
+        "module": "app.llm_functions.tools.current_date",
+        "attr": "mcp"
+    }
+
+Its tools keep the schema FastMCP publishes and are converted by the same
+adapter as stdio tools, but a call is a direct function dispatch instead
+of a JSON-RPC round trip to a subprocess. Synchronous tools run inline on
+the event loop; set ``"threaded": true`` for servers whose synchronous
+tools block (network or disk I/O) to run each call in a worker thread.
+"""
+
+import asyncio
+import importlib
+from contextlib import asynccontextmanager
+from typing import List
+from langchain_core.tools import BaseTool
+from langchain_mcp_adapters.tools import convert_mcp_tool_to_langchain_tool
+from mcp.server.fastmcp.exceptions import ToolError
+from mcp.types import CallToolResult, EmptyResult, ListToolsResult, TextContent
+
+INPROCESS_TRANSPORT = "inprocess"
+
+
+def is_inprocess(connection: dict) -> bool:
+    return connection.get("transport") == INPROCESS_TRANSPORT
+
+
+class InProcessSession:
+    """
+    The subset of the MCP ClientSession API used by the tool adapter and the
+    connection manager, answered directly by a FastMCP app.
+    """
+
+    def __init__(self, server, threaded: bool = False):
+        self.server = server
+        self.threaded = threaded
+
+    async def initialize(self) -> None:
+        return None
+
+    async def send_ping(self) -> EmptyResult:
+        return EmptyResult()
+
+    async def list_tools(self) -> ListToolsResult:
+        return ListToolsResult(tools=await self.server.list_tools())
+
+    async def call_tool(self, name: str, arguments: dict, **kwargs) -> CallToolResult:
+        try:
+            if self.threaded:
+                # Blocking tools get their own loop in a worker thread
+                result = await asyncio.to_thread(asyncio.run, self.server.call_tool(name, arguments or {}))
+            else:
+                result = await self.server.call_tool(name, arguments or {})
+        except ToolError as e:
+            return CallToolResult(content=[TextContent(type="text", text=str(e))], isError=True)
+
+        # Same result shapes the low-level MCP server accepts from FastMCP
+        if isinstance(result, tuple):
+            content, structured = result
+            return CallToolResult(content=list(content), structuredContent=structured)
+        if isinstance(result, dict):
+            return CallToolResult(content=[], structuredContent=result)
+        return CallToolResult(content=list(result))
+
+
+def load_server(connection: dict):
+    """Import the FastMCP app named by an in-process connection."""
+    module = importlib.import_module(connection["module"])
+    return getattr(module, connection.get("attr", "mcp"))
+
+
+@asynccontextmanager
+async def create_inprocess_session(connection: dict):
+    """In-process counterpart of langchain_mcp_adapters.sessions.create_session."""
+    yield InProcessSession(load_server(connection), threaded=connection.get("threaded", False))
+
+
+async def load_inprocess_tools(session: InProcessSession, server_name: str) -> List[BaseTool]:
+    """LangChain tools for every tool of an in-process server."""
+    listed = await session.list_tools()
+    return [
+        convert_mcp_tool_to_langchain_tool(session, tool, server_name=server_name)
+        for tool in listed.tools
+    ]
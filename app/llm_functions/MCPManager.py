@@ -0,0 +1,254 @@
+"""
+MCP Manager - Persistent MCP server sessions shared across requests
+
+Each server from mcp_config.json is started once and owned by one
+background task that keeps its session open (the MCP transports must be
+entered and exited in the same task). The server's tools are listed once
+and bound to that session, so a tool call is a single request on an open
+connection instead of a subprocess spawn and handshake. A server whose
+session fails a health check is restarted with backoff. In-process servers
+(see MCPInProcess) are managed the same way, without a subprocess.
+
+While running, the manager polls the config (see MCPConfig) and
+reconnects only the servers whose entries changed: a replacement is
+started and swapped in once ready, and the old session is closed after a
+drain period so in-flight tool calls can finish.
+"""
+
+import asyncio
+import sys
+import time
+from typing import Dict, List, Optional
+from langchain_core.tools import BaseTool
+from langchain_mcp_adapters.sessions import create_session
+from langchain_mcp_adapters.tools import load_mcp_tools
+from app.llm_functions.MCPConfig import get_mcp_config, get_mcp_config_loader
+from app.llm_functions.MCPInProcess import is_inprocess, create_inprocess_session, load_inprocess_tools
+from app.core.config import settings
+from app.core.utils import get_logger
+
+if sys.version_info < (3, 11):
+    from exceptiongroup import BaseExceptionGroup
+
+logger = get_logger(__name__)
+
+
+class MCPServerConnection:
+    """One MCP server: its session, cached tools and restart loop."""
+
+    def __init__(self, name: str, connection: dict):
+        self.name = name
+        self.connection = connection
+        self.session = None
+        self.tools: List[BaseTool] = []
+        self.ready = asyncio.Event()
+        self.starts = 0
+        self.last_error: Optional[str] = None
+        self._stop = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        self._task = asyncio.create_task(self._run(), name=f"mcp:{self.name}")
+
+    async def stop(self) -> None:
+        self._stop.set()
+        if self._task is not None:
+            try:
+                await asyncio.wait_for(self._task, settings.mcp_shutdown_timeout_seconds)
+            except (asyncio.TimeoutError, asyncio.CancelledError):
+                self._task.cancel()
+            self._task = None
+
+    async def _run(self) -> None:
+        backoff = settings.mcp_restart_backoff_seconds
+        while not self._stop.is_set():
+            try:
+                async with self._open_session() as session:
+                    await session.initialize()
+                    self.tools = await self._load_tools(session)
+                    self.session = session
+                    self.starts += 1
+                    self.ready.set()
+                    backoff = settings.mcp_restart_backoff_seconds
+                    logger.info(f"MCP server '{self.name}' ready with {len(self.tools)} tools")
+                    await self._serve(session)
+            except Exception as e:
+                # Transport failures surface as task group errors; report the cause
+                while isinstance(e, BaseExceptionGroup) and e.exceptions:
+                    e = e.exceptions[0]
+                self.last_error = f"{type(e).__name__}: {str(e)}"
+                logger.error(f"MCP server '{self.name}' failed: {self.last_error}")
+            finally:
+                self.ready.clear()
+                self.session = None
+                self.tools = []
+
+            if not self._stop.is_set():
+                # Restart with exponential backoff, unless asked to stop
+                try:
+                    await asyncio.wait_for(self._stop.wait(), backoff)
+                except asyncio.TimeoutError:
+                    pass
+                backoff = min(backoff * 2, settings.mcp_restart_backoff_max_seconds)
+
+    def _open_session(self):
+        if is_inprocess(self.connection):
+            return create_inprocess_session(self.connection)
+        return create_session(self.connection)
+
+    async def _load_tools(self, session) -> List[BaseTool]:
+        if is_inprocess(self.connection):
+            return await load_inprocess_tools(session, self.name)
+        return await load_mcp_tools(session, server_name=self.name)
+
+    async def _serve(self, session) -> None:
+        """Hold the session open until stopped; raise if a health check fails."""
+        while not self._stop.is_set():
+            try:
+                await asyncio.wait_for(self._stop.wait(), settings.mcp_health_check_interval_seconds)
+            except asyncio.TimeoutError:
+                await asyncio.wait_for(session.send_ping(), settings.mcp_health_check_timeout_seconds)
+
+    def stats(self) -> dict:
+        return {
+            "ready": self.ready.is_set(),
+            "tools": len(self.tools),
+            "transport": self.connection.get("transport"),
+            "starts": self.starts,
+            "last_error": self.last_error
+        }
+
+
+class MCPConnectionManager:
+    """Owns one MCPServerConnection per configured server."""
+
+    def __init__(self, config: Dict[str, dict]):
+        self.servers = {name: MCPServerConnection(name, connection) for name, connection in config.items()}
+        self.reconfigurations = 0
+        self._retiring = set()
+        self._watcher: Optional[asyncio.Task] = None
+
+    async def start(self) -> None:
+        """Start every server and wait (bounded) for them to become ready."""
+        for server in self.servers.values():
+            server.start()
+        await self.wait_ready(self.servers.keys(), settings.mcp_startup_timeout_seconds)
+
+    async def stop(self) -> None:
+        if self._watcher is not None:
+            self._watcher.cancel()
+            self._watcher = None
+        for task in list(self._retiring):
+            task.cancel()
+        await asyncio.gather(
+            *(server.stop() for server in self.servers.values()),
+            *self._retiring,
+            return_exceptions=True
+        )
+
+    async def reconfigure(self, config: Dict[str, dict]) -> None:
+        """Apply a new config, reconnecting only added, removed or changed servers."""
+        started = []
+        for name, connection in config.items():
+            current = self.servers.get(name)
+            if current is None or current.connection != connection:
+                replacement = MCPServerConnection(name, connection)
+                replacement.start()
+                started.append(replacement)
+        await asyncio.gather(
+            *(asyncio.wait_for(s.ready.wait(), settings.mcp_startup_timeout_seconds) for s in started),
+            return_exceptions=True
+        )
+
+        retired = [server for name, server in self.servers.items() if name not in config]
+        for replacement in started:
+            previous = self.servers.get(replacement.name)
+            if previous is not None:
+                retired.append(previous)
+            self.servers[replacement.name] = replacement
+        for name in [name for name in self.servers if name not in config]:
+            del self.servers[name]
+
+        for server in retired:
+            task = asyncio.create_task(self._retire(server))
+            self._retiring.add(task)
+            task.add_done_callback(self._retiring.discard)
+        self.reconfigurations += 1
+        logger.info(
+            f"MCP servers reconfigured: started {[s.name for s in started]}, "
+            f"retiring {[s.name for s in retired]}"
+        )
+
+    async def _retire(self, server: MCPServerConnection) -> None:
+        """Close a replaced session once in-flight calls have had time to finish."""
+        await asyncio.sleep(settings.mcp_reload_drain_seconds)
+        await server.stop()
+
+    def watch_config(self) -> None:
+        """Start polling the config file for changes."""
+        self._watcher = asyncio.create_task(self._watch_config(), name="mcp:config")
+
+    async def _watch_config(self) -> None:
+        loader = get_mcp_config_loader()
+        while True:
+            await asyncio.sleep(settings.mcp_config_poll_interval_seconds)
+            try:
+                if loader.refresh():
+                    await self.reconfigure(loader.get())
+            except Exception as e:
+                logger.error(f"MCP config reload failed: {str(e)}")
+
+    async def wait_ready(self, names, timeout: float) -> None:
+        waits = [self.servers[name].ready.wait() for name in names if name in self.servers]
+        if not waits:
+            return
+        try:
+            await asyncio.wait_for(asyncio.gather(*waits), timeout)
+        except asyncio.TimeoutError:
+            pending = [name for name in names if name in self.servers and not self.servers[name].ready.is_set()]
+            logger.warning(f"MCP servers not ready after {timeout}s: {pending}")
+
+    async def get_tools(self, server_names: Optional[List[str]] = None) -> List[BaseTool]:
+        """
+        Tools of the given (default: all) servers, bound to their open sessions.
+        Servers that are restarting are waited for briefly, then skipped.
+        """
+        names = list(server_names or self.servers.keys())
+        await self.wait_ready(names, settings.mcp_tool_wait_timeout_seconds)
+        tools = []
+        for name in names:
+            server = self.servers.get(name)
+            if server is not None and server.ready.is_set():
+                tools.extend(server.tools)
+        return tools
+
+    def stats(self) -> dict:
+        return {name: server.stats() for name, server in self.servers.items()}
+
+
+_manager: Optional[MCPConnectionManager] = None
+
+
+def get_mcp_manager() -> Optional[MCPConnectionManager]:
+    """The running connection manager, or None if MCP pooling is not started."""
+    return _manager
+
+
+async def init_mcp_manager(config: Optional[Dict[str, dict]] = None) -> MCPConnectionManager:
+    """Start the persistent MCP sessions (application lifespan)."""
+    global _manager
+    started = time.perf_counter()
+    _manager = MCPConnectionManager(config if config is not None else get_mcp_config())
+    await _manager.start()
+    if config is None and settings.mcp_config_poll_interval_seconds > 0:
+        _manager.watch_config()
+    logger.info(f"MCP connection manager started in {(time.perf_counter() - started) * 1000:.0f}ms")
+    return _manager
+
+
+async def close_mcp_manager() -> None:
+    """Stop all MCP sessions and their server processes."""
+    global _manager
+    if _manager is not None:
+        await _manager.stop()
+        _manager = None
@@ -0,0 +1,191 @@
+"""
+Response Cache - Reuse agent answers for repeated questions
+
+Sits in front of the agent graph so a repeated question skips the
+guardrail and synthesis LLM calls:
+
+1. Exact tier: normalized query + hash of the whole prior conversation.
+   The cache is shared by all users, so an answer is only reused for a
+   thread whose model input is identical (in practice: opening questions),
+   never one that merely shares its last turns.
+2. Semantic tier: the query embedding is compared (cosine similarity) with
+   cached queries asked in the same conversation; an answer is reused above
+   ``response_cache_similarity_threshold``. A paraphrase was never seen by
+   the guardrail, so callers pass ``validate`` and the answer is only reused
+   if the new wording passes it.
+
+Both tiers expire entries after ``response_cache_ttl_seconds`` and evict
+least recently used entries beyond their size limit. If the embeddings
+model fails, the semantic tier is off for
+``response_cache_embedding_retry_seconds``.
+"""
+
+import hashlib
+import json
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Awaitable, Callable, List, Optional
+import numpy as np
+from langchain_core.messages import AnyMessage
+from app.core.config import settings
+from app.core.utils import get_logger
+from app.core.utils.cache import MISSING, TTLCache
+from app.llm_functions.LLMDefination import get_embeddings
+
+logger = get_logger(__name__)
+
+
+def normalize_query(query: str) -> str:
+    return " ".join(query.split()).casefold().rstrip("?!. ")
+
+
+def context_hash(messages: List[AnyMessage]) -> str:
+    """Hash of all prior turns of the conversation (the answer may depend on any of them)."""
+    turns = [(message.type, message.content) for message in messages]
+    return hashlib.sha256(json.dumps(turns, default=str).encode()).hexdigest()[:16]
+
+
+@dataclass
+class CacheLookup:
+    """Result of a lookup; passed back to store() on a miss."""
+    key: str
+    context: str
+    vector: Optional[np.ndarray] = None
+    answer: Optional[str] = None
+    tier: str = "miss"
+
+
+class SemanticIndex:
+    """Normalized query embeddings with their answers, LRU + TTL bounded."""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: OrderedDict = OrderedDict()
+
+    def search(self, vector: np.ndarray, context: str, threshold: float) -> Optional[str]:
+        now = time.time()
+        best_key, best_score = None, threshold
+        for key, (entry_context, entry_vector, _, expires_at) in list(self._entries.items()):
+            if expires_at <= now:
+                del self._entries[key]
+                continue
+            if entry_context != context:
+                continue
+            score = float(np.dot(vector, entry_vector))
+            if score >= best_score:
+                best_key, best_score = key, score
+        if best_key is None:
+            return None
+        self._entries.move_to_end(best_key)
+        return self._entries[best_key][2]
+
+    def add(self, key: str, context: str, vector: np.ndarray, answer: str, ttl: float) -> None:
+        self._entries[key] = (context, vector, answer, time.time() + ttl)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class ResponseCache:
+    """Exact and semantic answer cache with hit counters."""
+
+    def __init__(self, embeddings_factory=get_embeddings):
+        self.exact = TTLCache(settings.response_cache_max_entries)
+        self.semantic = SemanticIndex(settings.response_cache_semantic_max_entries)
+        self._embeddings_factory = embeddings_factory
+        self._embeddings = None
+        self._embed_retry_at = 0.0
+        self.exact_hits = 0
+        self.semantic_hits = 0
+        self.semantic_rejected = 0
+        self.misses = 0
+
+    async def _embed(self, query: str) -> Optional[np.ndarray]:
+        if not settings.response_cache_semantic_enabled or time.monotonic() < self._embed_retry_at:
+            return None
+        try:
+            if self._embeddings is None:
+                self._embeddings = self._embeddings_factory()
+            vector = np.asarray(await self._embeddings.aembed_query(query), dtype=np.float32)
+        except Exception as e:
+            # Back off instead of failing (and logging) on every message
+            self._embed_retry_at = time.monotonic() + settings.response_cache_embedding_retry_seconds
+            logger.warning(
+                f"Response cache embedding failed, exact tier only for "
+                f"{settings.response_cache_embedding_retry_seconds}s: {str(e)}"
+            )
+            return None
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else None
+
+    async def lookup(
+        self,
+        query: str,
+        context: List[AnyMessage],
+        validate: Optional[Callable[[str], Awaitable[bool]]] = None
+    ) -> CacheLookup:
+        """
+        Look ``query`` up in the exact, then the semantic tier.
+        
+        ``validate`` is awaited for a semantic candidate; the answer is only
+        reused if it returns True.
+        """
+        normalized = normalize_query(query)
+        lookup = CacheLookup(key=f"{context_hash(context)}:{normalized}", context=context_hash(context))
+
+        answer = self.exact.get(lookup.key)
+        if answer is not MISSING:
+            self.exact_hits += 1
+            lookup.answer, lookup.tier = answer, "exact"
+            return lookup
+
+        lookup.vector = await self._embed(normalized)
+        if lookup.vector is not None:
+            answer = self.semantic.search(lookup.vector, lookup.context, settings.response_cache_similarity_threshold)
+            if answer is not None and validate is not None and not await validate(query):
+                self.semantic_rejected += 1
+                answer = None
+            if answer is not None:
+                self.semantic_hits += 1
+                lookup.answer, lookup.tier = answer, "semantic"
+                return lookup
+
+        self.misses += 1
+        return lookup
+
+    def store(self, lookup: CacheLookup, answer: str) -> None:
+        ttl = settings.response_cache_ttl_seconds
+        self.exact.set(lookup.key, answer, ttl)
+        if lookup.vector is not None:
+            self.semantic.add(lookup.key, lookup.context, lookup.vector, answer, ttl)
+
+    def stats(self) -> dict:
+        lookups = self.exact_hits + self.semantic_hits + self.misses
+        return {
+            "exact_entries": len(self.exact),
+            "semantic_entries": len(self.semantic),
+            "exact_hits": self.exact_hits,
+            "semantic_hits": self.semantic_hits,
+            "semantic_rejected": self.semantic_rejected,
+            "misses": self.misses,
+            "hit_rate": round((self.exact_hits + self.semantic_hits) / lookups, 4) if lookups else 0.0
+        }
+
+
+_response_cache: Optional[ResponseCache] = None
+
+
+def get_response_cache() -> ResponseCache:
+    global _response_cache
+    if _response_cache is None:
+        _response_cache = ResponseCache()
+    return _response_cache
+
+
+def get_response_cache_stats() -> dict:
+    """Hit counts per tier and hit rate of the response cache."""
+    return get_response_cache().stats()
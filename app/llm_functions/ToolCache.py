@@ -0,0 +1,94 @@
+"""
+Tool Cache - Result cache for external tools (web search, ...)
+
+Results are keyed by tool name and normalized arguments (whitespace
+collapsed, case folded, keys sorted), so the same question asked by many
+users within a tool's TTL is answered from cache instead of the external
+API. Only successful results are cached; failures always go to the tool.
+"""
+
+import hashlib
+import json
+from typing import Any, Awaitable, Callable, Optional
+from app.core.config import settings
+from app.core.utils import get_logger, add_span_attributes
+from app.core.utils.cache import MISSING, SqliteCache, TieredCache, TTLCache
+
+logger = get_logger(__name__)
+
+
+def normalize_args(args: Any) -> Any:
+    """Argument values with insignificant differences removed."""
+    if isinstance(args, str):
+        return " ".join(args.split()).casefold()
+    if isinstance(args, dict):
+        return {key: normalize_args(value) for key, value in args.items()}
+    if isinstance(args, (list, tuple)):
+        return [normalize_args(value) for value in args]
+    return args
+
+
+def tool_cache_key(tool_name: str, args: dict) -> str:
+    normalized = json.dumps(normalize_args(args), sort_keys=True, separators=(",", ":"), default=str)
+    return f"tool:{tool_name}:{hashlib.sha256(normalized.encode()).hexdigest()}"
+
+
+class ToolCache:
+    """Tiered result cache with per-tool hit counters."""
+
+    def __init__(self, cache: TieredCache):
+        self.cache = cache
+        self.by_tool = {}
+
+    async def get_or_call(self, tool_name: str, args: dict, ttl: float, call: Callable[[], Awaitable[Any]]) -> Any:
+        key = tool_cache_key(tool_name, args)
+        counters = self.by_tool.setdefault(tool_name, {"hits": 0, "misses": 0})
+        result = await self.cache.get(key)
+        if result is not MISSING:
+            counters["hits"] += 1
+            add_span_attributes({"tool.name": tool_name, "tool.cache_hit": True})
+            return result
+
+        counters["misses"] += 1
+        add_span_attributes({"tool.name": tool_name, "tool.cache_hit": False})
+        result = await call()
+        await self.cache.set(key, result, ttl)
+        return result
+
+    def stats(self) -> dict:
+        return {**self.cache.stats(), "by_tool": {name: dict(c) for name, c in self.by_tool.items()}}
+
+
+_tool_cache: Optional[ToolCache] = None
+
+
+def get_tool_cache() -> ToolCache:
+    """Get the tool cache (memory-only until init_tool_cache opens the disk tier)."""
+    global _tool_cache
+    if _tool_cache is None:
+        _tool_cache = ToolCache(TieredCache(TTLCache(settings.tool_cache_max_entries)))
+    return _tool_cache
+
+
+async def init_tool_cache() -> None:
+    """Open the tool cache with its SQLite tier (application lifespan)."""
+    global _tool_cache
+    disk = None
+    if settings.tool_cache_sqlite_path:
+        disk = SqliteCache(settings.tool_cache_sqlite_path, table="tool_cache")
+        await disk.open()
+        pruned = await disk.prune_expired()
+        logger.info(f"Tool cache opened at {settings.tool_cache_sqlite_path} ({pruned} expired entries pruned)")
+    _tool_cache = ToolCache(TieredCache(TTLCache(settings.tool_cache_max_entries), disk))
+
+
+async def close_tool_cache() -> None:
+    global _tool_cache
+    if _tool_cache is not None and _tool_cache.cache.disk is not None:
+        await _tool_cache.cache.disk.close()
+    _tool_cache = None
+
+
+def get_tool_cache_stats() -> dict:
+    """Hit counts and hit rate of the tool cache."""
+    return get_tool_cache().stats()
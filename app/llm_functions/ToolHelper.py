@@ -1,12 +1,131 @@
 
 import asyncio
 import json
-from app.core.utils import trace_llm_operation, add_span_attributes
+from collections import OrderedDict
+from langchain_core.tools import StructuredTool, ToolException
+from langgraph.errors import GraphRecursionError
+from app.core.config import settings
+from app.core.utils import AgentException, get_logger, trace_llm_operation, add_span_attributes
+from app.llm_functions.Deadline import run_with_deadline, time_left
+from app.llm_functions.ToolCache import get_tool_cache
+from app.llm_functions.ToolOutputPruner import prune_tool_output
 from .tools2.toolsconfig import toolsConfig
 from langchain.agents import create_agent
 
-async def InvokeLLMWithTool(llm,messages,toolnames):
-    """Invoke LLM with tools integration."""
+logger = get_logger(__name__)
+
+# Upper bound on cached agents (one per model instance and tool set)
+AGENT_CACHE_SIZE = 32
+
+
+def WithTimeout(tool, timeout):
+    """
+    Wrap a tool so each call is bounded by ``timeout`` seconds, or by the
+    time left until the request deadline if that is shorter.
+
+    A timed out call is reported back to the model as a tool error instead of
+    failing the whole agent run.
+    """
+    async def run(**kwargs):
+        left=time_left()
+        limit=timeout if left is None else max(min(timeout, left), 0)
+        try:
+            return await asyncio.wait_for(tool.ainvoke(kwargs), limit)
+        except asyncio.TimeoutError:
+            raise ToolException(f"{tool.name} timed out after {round(limit, 2)}s")
+
+    return StructuredTool.from_function(
+        coroutine=run,
+        name=tool.name,
+        description=tool.description,
+        args_schema=tool.args_schema,
+        handle_tool_error=True
+    )
+
+
+def WithCache(tool, ttl):
+    """
+    Wrap a tool so its results are cached for ``ttl`` seconds, keyed by its
+    normalized arguments. Errors propagate and are not cached.
+    """
+    async def run(**kwargs):
+        return await get_tool_cache().get_or_call(tool.name, kwargs, ttl, lambda: tool.ainvoke(kwargs))
+
+    return StructuredTool.from_function(
+        coroutine=run,
+        name=tool.name,
+        description=tool.description,
+        args_schema=tool.args_schema
+    )
+
+
+def WithPruning(tool, budget):
+    """
+    Wrap a tool so its output is reduced to the useful fields and truncated
+    to ``budget`` tokens before it reaches the model.
+    """
+    async def run(**kwargs):
+        return prune_tool_output(tool.name, await tool.ainvoke(kwargs), budget)
+
+    return StructuredTool.from_function(
+        coroutine=run,
+        name=tool.name,
+        description=tool.description,
+        args_schema=tool.args_schema
+    )
+
+
+def BuildTool(data):
+    """Tool from a toolsConfig entry, with output pruning, result cache and timeout."""
+    # Pruned before caching, so cache hits are already small
+    tool=WithPruning(data['value'], data.get('token_budget', settings.tool_output_token_budget))
+    ttl=data.get('cache_ttl', 0)
+    if ttl and settings.tool_cache_enabled:
+        tool=WithCache(tool,ttl)
+    return WithTimeout(tool, data.get('timeout', settings.tool_timeout_seconds))
+
+
+# Tool lookup by config key
+toolsByName={data['key']: BuildTool(data) for data in toolsConfig}
+
+# (id(llm), frozenset(toolnames)) -> (llm, agent); the llm is kept so its id
+# cannot be reused by another model while the entry exists
+_agentCache=OrderedDict()
+
+
+def GetAgent(llm,toolnames):
+    """
+    Get the tool-calling agent for a model and tool set, compiling it once.
+
+    Tool calls issued in the same model turn run concurrently (ToolNode
+    gathers them when the agent is invoked asynchronously).
+    """
+    key=(id(llm),frozenset(toolnames))
+    cached=_agentCache.get(key)
+    if cached is not None and cached[0] is llm:
+        _agentCache.move_to_end(key)
+        add_span_attributes({"agent.cache_hit": True})
+        return cached[1]
+
+    tools=[toolsByName[name] for name in toolnames if name in toolsByName]
+    agent= create_agent(llm,tools)
+    _agentCache[key]=(llm,agent)
+    if len(_agentCache)>AGENT_CACHE_SIZE:
+        _agentCache.popitem(last=False)
+    add_span_attributes({"agent.cache_hit": False})
+    return agent
+
+
+async def InvokeLLMWithTool(llm,messages,toolnames,config=None):
+    """
+    Invoke LLM with tools integration.
+
+    ``config`` is forwarded to the agent run so callers can attach tags
+    (used to pick the synthesis tokens out of a streamed graph run).
+
+    The tool loop is limited to ``settings.max_iterations`` model turns and
+    to the request deadline of the enclosing graph run.
+    """
     with trace_llm_operation(
         "llm.mcp.invoke",
         attributes={
@@ -14,13 +133,16 @@ async def InvokeLLMWithTool(llm,messages,toolnames):
             "mcp.config_loaded": toolnames is not None
         }
     ):
-        tools=[data['value'] for data in toolsConfig if data['key'] in toolnames]
-        agent= create_agent(llm,tools)
-        response = agent.invoke({"messages":messages})
+        agent=GetAgent(llm,toolnames)
+        # One model step and one tools step per iteration, plus the final answer
+        config={**(config or {}), "recursion_limit": 2*settings.max_iterations+1}
+        try:
+            response = await run_with_deadline(agent.ainvoke({"messages":messages},config=config), "Tool agent")
+        except GraphRecursionError:
+            raise AgentException(f"Tool loop exceeded {settings.max_iterations} iterations")
         finalResponse=response['messages'][-1].content
-        print(finalResponse)
         if isinstance(finalResponse,list):
             finalResponse=finalResponse[0]['text']
+        logger.debug(f"Tool agent response: {finalResponse}")
 
-
-        return finalResponse.strip().lower()
+        return finalResponse.strip()
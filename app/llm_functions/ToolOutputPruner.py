@@ -0,0 +1,135 @@
+"""
+Tool Output Pruner - Shrink tool results before they reach the model
+
+Raw tool output (e.g. the full Serper JSON with knowledge graph, sitelinks
+and people-also-ask) is reduced to the fields the model uses, duplicate
+snippets are dropped, and the result is truncated to the tool's token
+budget before it becomes a ToolMessage. Tokens saved are recorded per tool.
+"""
+
+import json
+from typing import Callable, Dict
+from app.core.config import settings
+from app.core.utils import get_logger, add_span_attributes
+from app.llm_functions.ContextWindow import CHARS_PER_TOKEN, estimate_tokens
+
+logger = get_logger(__name__)
+
+# Organic results kept from a search response
+SEARCH_MAX_RESULTS = 6
+
+
+def _dedupe_key(text: str) -> str:
+    return " ".join(text.split()).casefold()
+
+
+def prune_search(output: str) -> str:
+    """Keep the answer box, knowledge graph summary and organic results of a Serper response."""
+    try:
+        data = json.loads(output)
+    except ValueError:
+        return output
+    if not isinstance(data, dict):
+        return output
+
+    lines = []
+    seen = set()
+
+    def add(text, prefix=""):
+        if not text:
+            return
+        key = _dedupe_key(str(text))
+        if key in seen:
+            return
+        seen.add(key)
+        lines.append(f"{prefix}{text}")
+
+    answer = data.get("answerBox") or {}
+    add(answer.get("answer") or answer.get("snippet"), "Answer: ")
+
+    graph = data.get("knowledgeGraph") or {}
+    if graph:
+        title = " - ".join(str(part) for part in (graph.get("title"), graph.get("type")) if part)
+        add(title, "Entity: ")
+        add(graph.get("description"))
+        for name, value in list((graph.get("attributes") or {}).items())[:5]:
+            add(f"{name}: {value}")
+
+    for result in (data.get("organic") or [])[:SEARCH_MAX_RESULTS]:
+        snippet = result.get("snippet")
+        if not snippet or _dedupe_key(snippet) in seen:
+            continue
+        seen.add(_dedupe_key(snippet))
+        date = f" ({result['date']})" if result.get("date") else ""
+        lines.append(f"- {result.get('title', '')}{date}: {snippet} [{result.get('link', '')}]")
+
+    for story in (data.get("topStories") or [])[:3]:
+        add(f"{story.get('title', '')} ({story.get('source', '')}, {story.get('date', '')})", "News: ")
+
+    return "\n".join(lines) if lines else output
+
+
+# Field extraction per tool name; other tools are only truncated
+PRUNERS: Dict[str, Callable[[str], str]] = {
+    "search": prune_search
+}
+
+
+def truncate_to_tokens(text: str, budget: int) -> str:
+    """Cut text to roughly ``budget`` tokens, on a line boundary when possible."""
+    limit = budget * CHARS_PER_TOKEN
+    if len(text) <= limit:
+        return text
+    cut = text.rfind("\n", 0, limit)
+    return text[:cut if cut > limit // 2 else limit] + "\n[truncated]"
+
+
+class PruneMetrics:
+    """Per-tool token counts before and after pruning."""
+
+    def __init__(self):
+        self.by_tool = {}
+
+    def record(self, tool_name: str, tokens_raw: int, tokens_sent: int) -> None:
+        counters = self.by_tool.setdefault(tool_name, {"calls": 0, "tokens_raw": 0, "tokens_sent": 0})
+        counters["calls"] += 1
+        counters["tokens_raw"] += tokens_raw
+        counters["tokens_sent"] += tokens_sent
+
+    def as_dict(self) -> dict:
+        return {
+            name: {**c, "tokens_saved": c["tokens_raw"] - c["tokens_sent"]}
+            for name, c in self.by_tool.items()
+        }
+
+
+_metrics = PruneMetrics()
+
+
+def prune_tool_output(tool_name: str, output, budget: int = 0):
+    """Extract, deduplicate and truncate a tool's string output to its token budget."""
+    if not isinstance(output, str):
+        return output
+    budget = budget or settings.tool_output_token_budget
+    pruner = PRUNERS.get(tool_name)
+    try:
+        pruned = pruner(output) if pruner else output
+    except Exception as e:
+        logger.warning(f"Pruning {tool_name} output failed, sending it unpruned: {str(e)}")
+        pruned = output
+    pruned = truncate_to_tokens(pruned, budget)
+
+    tokens_raw = estimate_tokens(output)
+    tokens_sent = estimate_tokens(pruned)
+    _metrics.record(tool_name, tokens_raw, tokens_sent)
+    add_span_attributes({
+        "tool.tokens_raw": tokens_raw,
+        "tool.tokens_sent": tokens_sent,
+        "tool.tokens_saved": tokens_raw - tokens_sent
+    })
+    return pruned
+
+
+def get_tool_pruning_stats() -> dict:
+    """Tokens received, sent and saved per tool."""
+    return _metrics.as_dict()
@@ -0,0 +1,94 @@
+# tests for agent admission control (concurrency limit, wait queue, per-user quotas)
+import asyncio
+import pytest
+from app.core.utils import OverloadedException
+from app.llm_functions.AdmissionControl import AdmissionController
+
+
+async def hold(controller, user_id, release: asyncio.Event, order: list):
+    async with controller.admit(user_id):
+        order.append(user_id)
+        await release.wait()
+
+
+# ----------------------------------------------------
+# Test Case 1: Runs beyond the limit wait and are admitted in FIFO order
+# ----------------------------------------------------
+@pytest.mark.asyncio
+async def test_limit_and_fifo_queue():
+    controller = AdmissionController(max_concurrent=2, max_queue=4, per_user_limit=2, queue_timeout=5)
+    release, order = asyncio.Event(), []
+    tasks = [asyncio.create_task(hold(controller, user, release, order)) for user in ("a", "b", "c", "d")]
+    await asyncio.sleep(0.01)
+
+    # ASSERT 1: two runs execute, two wait
+    assert order == ["a", "b"]
+    assert controller.stats()["active"] == 2
+    assert controller.stats()["queue_depth"] == 2
+
+    release.set()
+    await asyncio.gather(*tasks)
+
+    # ASSERT 2: waiters were admitted in arrival order and every slot was returned
+    assert order == ["a", "b", "c", "d"]
+    stats = controller.stats()
+    assert stats["active"] == 0 and stats["queue_depth"] == 0
+    assert stats["admitted"] == 4 and stats["queued"] == 2 and stats["max_queue_depth"] == 2
+    assert stats["avg_wait_ms"] > 0
+
+
+# ----------------------------------------------------
+# Test Case 2: A full queue and an exhausted user quota are rejected at once
+# ----------------------------------------------------
+@pytest.mark.asyncio
+async def test_fast_rejection():
+    controller = AdmissionController(max_concurrent=1, max_queue=1, per_user_limit=1, queue_timeout=5)
+    release, order = asyncio.Event(), []
+    tasks = [asyncio.create_task(hold(controller, user, release, order)) for user in ("a", "b")]
+    await asyncio.sleep(0.01)
+
+    # ASSERT 1: no room left in the queue
+    with pytest.raises(OverloadedException) as overloaded:
+        await controller.acquire("c")
+    assert overloaded.value.status_code == 503
+    assert overloaded.value.retry_after >= 1
+
+    # ASSERT 2: user "a" already holds its only slot, even though it is running
+    with pytest.raises(OverloadedException, match="this user"):
+        await controller.acquire("a")
+
+    release.set()
+    await asyncio.gather(*tasks)
+    assert controller.stats()["rejected"] == {"queue_full": 1, "user_limit": 1, "queue_timeout": 0}
+
+
+# ----------------------------------------------------
+# Test Case 3: Timed out and cancelled waiters leave the queue without leaking slots
+# ----------------------------------------------------
+@pytest.mark.asyncio
+async def test_queue_timeout_and_cancellation():
+    controller = AdmissionController(max_concurrent=1, max_queue=4, per_user_limit=2, queue_timeout=0.05)
+    release, order = asyncio.Event(), []
+    running = asyncio.create_task(hold(controller, "a", release, order))
+    await asyncio.sleep(0.01)
+
+    # ASSERT 1: a waiter gives up after queue_timeout
+    with pytest.raises(OverloadedException, match="No capacity"):
+        await controller.acquire("b")
+
+    # ASSERT 2: a cancelled waiter (client disconnected) frees its queue entry and quota
+    waiting = asyncio.create_task(controller.acquire("b"))
+    await asyncio.sleep(0.01)
+    waiting.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await waiting
+    assert controller.stats()["queue_depth"] == 0
+
+    release.set()
+    await running
+    # ASSERT 3: the slot is free again for a new run
+    await asyncio.wait_for(controller.acquire("b"), 1)
+    controller.release("b")
+    stats = controller.stats()
+    assert stats["active"] == 0 and stats["rejected"]["queue_timeout"] == 1
+    assert controller._per_user == {}
@@ -0,0 +1,97 @@
+# tests for the bounded LangGraph checkpointers
+import time
+import aiosqlite
+import pytest
+from unittest.mock import patch
+from app.llm_functions.Checkpointer import BoundedInMemorySaver, BoundedSqliteSaver, CompactSerializer
+from app.llm_functions.AgentGraph import get_agent_graph
+from app.llm_functions.LLMCall import CallAgentGraph
+from app.llm_functions.test_llm_call import fake_llm
+
+
+async def run_turn(checkpointer, chat_id, query="hi"):
+    with patch('app.llm_functions.AgentGraph.get_checkpointer', return_value=checkpointer), \
+         patch('app.llm_functions.AgentGraph.get_reasoning_llm', return_value=fake_llm("pass")), \
+         patch('app.llm_functions.AgentGraph.get_base_llm', return_value=fake_llm("hello")):
+        return await CallAgentGraph(query, chat_id=chat_id)
+
+
+# ----------------------------------------------------
+# Test Case 1: Memory backend keeps one checkpoint per thread, LRU-bounded
+# ----------------------------------------------------
+@pytest.mark.asyncio
+async def test_memory_saver_compacts_and_evicts():
+    saver = BoundedInMemorySaver(max_threads=2, serde=CompactSerializer())
+
+    await run_turn(saver, 1)
+    await run_turn(saver, 1)
+    # ASSERT 1: only the latest root checkpoint survives, nested agent runs are dropped
+    assert list(saver.storage["1"].keys()) == [""]
+    assert len(saver.storage["1"][""]) == 1
+    assert all(key[2] in saver.storage["1"][""] for key in saver.writes if key[0] == "1")
+
+    await run_turn(saver, 2)
+    await run_turn(saver, 3)
+    # ASSERT 2: the least recently used thread was evicted
+    assert set(saver.storage.keys()) == {"2", "3"}
+    assert not any(key[0] == "1" for key in saver.blobs)
+
+
+# ----------------------------------------------------
+# Test Case 2: State survives compaction and TTL pruning drops idle threads
+# ----------------------------------------------------
+@pytest.mark.asyncio
+async def test_memory_saver_prunes_expired_threads():
+    saver = BoundedInMemorySaver(ttl_seconds=60)
+    await run_turn(saver, 1, "first")
+
+    with patch('app.llm_functions.AgentGraph.get_checkpointer', return_value=saver):
+        state = await get_agent_graph().aget_state({"configurable": {"thread_id": "1"}})
+    assert "first" in [m.content for m in state.values["messages"]]
+
+    await run_turn(saver, 2)
+
+    saver._last_access["1"] -= 120
+    assert await saver.prune_expired() == 1
+    assert "1" not in saver.storage and "2" in saver.storage
+
+
+# ----------------------------------------------------
+# Test Case 3: SQLite backend keeps one checkpoint per thread and prunes by TTL
+# ----------------------------------------------------
+@pytest.mark.asyncio
+async def test_sqlite_saver_compacts_and_prunes(tmp_path):
+    async with aiosqlite.connect(str(tmp_path / "checkpoints.db")) as conn:
+        saver = BoundedSqliteSaver(conn, ttl_seconds=60, serde=CompactSerializer(min_size=64))
+        await run_turn(saver, 1)
+        await run_turn(saver, 1)
+        await run_turn(saver, 2)
+
+        async with conn.execute("SELECT thread_id, COUNT(*) FROM checkpoints GROUP BY thread_id") as cursor:
+            # ASSERT 1: one checkpoint per thread
+            assert dict(await cursor.fetchall()) == {"1": 1, "2": 1}
+        async with conn.execute("SELECT COUNT(*) FROM checkpoints WHERE type LIKE '%+zlib'") as cursor:
+            # ASSERT 2: checkpoints are stored compressed
+            assert (await cursor.fetchone())[0] == 2
+
+        await conn.execute("UPDATE checkpoint_threads SET last_access = ? WHERE thread_id = '1'", (time.time() - 120,))
+        await conn.commit()
+        # ASSERT 3: only the idle thread is pruned
+        assert await saver.prune_expired() == 1
+        assert await saver.aget_tuple({"configurable": {"thread_id": "1"}}) is None
+        assert await saver.aget_tuple({"configurable": {"thread_id": "2"}}) is not None
+
+
+# ----------------------------------------------------
+# Test Case 4: CompactSerializer round-trips small and large payloads
+# ----------------------------------------------------
+def test_compact_serializer_round_trip():
+    serde = CompactSerializer(min_size=100)
+    small = {"messages": ["hi"]}
+    large = {"messages": ["hello world " * 100]}
+
+    assert not serde.dumps_typed(small)[0].endswith("+zlib")
+    typ, data = serde.dumps_typed(large)
+    assert typ.endswith("+zlib") and len(data) < len("hello world " * 100)
+    assert serde.loads_typed(serde.dumps_typed(small)) == small
+    assert serde.loads_typed((typ, data)) == large
@@ -0,0 +1,117 @@
+# tests for the token-budgeted context window
+import pytest
+from unittest.mock import patch
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage
+from langgraph.checkpoint.memory import InMemorySaver
+from app.llm_functions.AgentGraph import get_agent_graph
+from app.llm_functions.ContextWindow import ContextWindow, estimate_tokens, trim_to_budget
+from app.llm_functions.LLMCall import CallAgentGraph
+from app.llm_functions.test_llm_call import fake_llm
+
+
+def conversation(turns, size=200):
+    messages = []
+    for turn in range(turns):
+        messages.append(HumanMessage(content=f"q{turn} " + "x" * size))
+        messages.append(AIMessage(content=f"a{turn} " + "y" * size))
+    return messages
+
+
+class CountingSummarizer:
+    """Summarizer factory that records the messages it was asked to fold in."""
+
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self):
+        summarizer = self
+
+        class Model:
+            async def ainvoke(self, prompt):
+                summarizer.calls.append(prompt[-1].content)
+                return AIMessage(content=f"summary {len(summarizer.calls)}")
+
+        return Model()
+
+
+# ----------------------------------------------------
+# Test Case 1: Conversations within the budget are sent unchanged
+# ----------------------------------------------------
+@pytest.mark.asyncio
+async def test_fit_within_budget_is_unchanged():
+    summarizer = CountingSummarizer()
+    messages = conversation(2) + [HumanMessage(content="now")]
+
+    context = await ContextWindow(summarizer=summarizer, budget=10_000).fit(messages)
+
+    assert context["messages"] == messages
+    assert context["tokens_saved"] == 0
+    assert summarizer.calls == []
+
+
+# ----------------------------------------------------
+# Test Case 2: Overflow is summarized once, then incrementally
+# ----------------------------------------------------
+@pytest.mark.asyncio
+async def test_fit_summarizes_overflow_incrementally():
+    summarizer = CountingSummarizer()
+    window = ContextWindow(summarizer=summarizer, budget=600, target_ratio=0.5)
+    messages = conversation(6) + [HumanMessage(content="now")]
+
+    first = await window.fit(messages)
+
+    # ASSERT 1: older turns were folded into the summary, the query is kept
+    assert len(summarizer.calls) == 1
+    assert isinstance(first["messages"][0], SystemMessage) and "summary 1" in first["messages"][0].content
+    assert first["messages"][-1].content == "now"
+    assert sum(estimate_tokens(m) for m in first["messages"]) <= 600
+    assert first["tokens_saved"] > 0
+
+    # ASSERT 2: the next turn reuses the summary while it still fits
+    messages += [AIMessage(content="ok"), HumanMessage(content="next")]
+    second = await window.fit(messages, first["summary"], first["summarized_count"])
+    assert len(summarizer.calls) == 1
+    assert second["summarized_count"] == first["summarized_count"]
+
+    # ASSERT 3: once it overflows again only the new overflow is summarized
+    messages += conversation(4)[1:] + [HumanMessage(content="later")]
+    third = await window.fit(messages, second["summary"], second["summarized_count"])
+    assert len(summarizer.calls) == 2
+    assert "summary 1" in summarizer.calls[1]
+    assert "q0 " not in summarizer.calls[1]
+    assert third["summarized_count"] > second["summarized_count"]
+
+
+# ----------------------------------------------------
+# Test Case 3: History trimming keeps the newest messages within the budget
+# ----------------------------------------------------
+def test_trim_to_budget_keeps_newest():
+    messages = conversation(5)
+    trimmed = trim_to_budget(messages, 250)
+
+    assert trimmed == messages[-len(trimmed):]
+    assert 0 < len(trimmed) < len(messages)
+    assert sum(estimate_tokens(m) for m in trimmed) <= 250
+
+
+# ----------------------------------------------------
+# Test Case 4: The running summary is persisted in the thread state
+# ----------------------------------------------------
+@pytest.mark.asyncio
+@patch('app.llm_functions.AgentGraph.get_summary_llm')
+@patch('app.llm_functions.AgentGraph.get_base_llm')
+@patch('app.llm_functions.AgentGraph.get_reasoning_llm')
+async def test_summary_persisted_in_thread_state(MockReasoningLLM, MockBaseLLM, MockSummaryLLM):
+    MockReasoningLLM.side_effect = lambda: fake_llm("pass")
+    MockBaseLLM.side_effect = lambda: fake_llm("answer " + "z" * 400)
+    MockSummaryLLM.side_effect = lambda: fake_llm("the running summary")
+    config = {"configurable": {"thread_id": "2001"}}
+
+    with patch('app.llm_functions.AgentGraph.get_checkpointer', return_value=InMemorySaver()), \
+         patch.dict('app.llm_functions.ContextWindow.settings.context_token_budgets', {"basic": 300}):
+        for turn in range(4):
+            await CallAgentGraph(f"question {turn} " + "w" * 400, chat_id=2001)
+        state = await get_agent_graph().aget_state(config)
+
+    assert state.values["summary"] == "the running summary"
+    assert 0 < state.values["summarized_count"] < len(state.values["messages"])
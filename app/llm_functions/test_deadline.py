@@ -0,0 +1,67 @@
+# tests for per-request deadlines and tool loop step budgets
+import asyncio
+import itertools
+import time
+import pytest
+from unittest.mock import patch
+from langchain_core.messages import AIMessage, HumanMessage
+from app.core.utils import AgentException, DeadlineExceededException
+from app.llm_functions.Deadline import new_deadline, run_with_deadline, time_left
+from app.llm_functions.LLMCall import CallAgentGraph, StreamAgentGraph
+from app.llm_functions.ToolHelper import InvokeLLMWithTool
+from app.llm_functions.test_llm_call import FakeToolChatModel
+from app.llm_functions.test_speculative import slow_llm
+
+
+# ----------------------------------------------------
+# Test Case 1: Awaitables are bounded by the deadline, if there is one
+# ----------------------------------------------------
+@pytest.mark.asyncio
+async def test_run_with_deadline():
+    # ASSERT 1: outside a graph run there is no deadline
+    assert time_left() is None
+    assert await run_with_deadline(asyncio.sleep(0.01, result="done"), "sleep") == "done"
+
+    # ASSERT 2: a slow call is cancelled when the deadline passes
+    started = time.perf_counter()
+    with pytest.raises(DeadlineExceededException):
+        await run_with_deadline(asyncio.sleep(5), "sleep", new_deadline(0.05))
+    assert time.perf_counter() - started < 1
+
+    # ASSERT 3: nothing is started once the deadline has passed
+    with pytest.raises(DeadlineExceededException):
+        await run_with_deadline(asyncio.sleep(0), "sleep", time.monotonic() - 1)
+
+
+# ----------------------------------------------------
+# Test Case 2: A graph run stops at its deadline, streamed or not
+# ----------------------------------------------------
+@pytest.mark.asyncio
+@patch('app.llm_functions.AgentGraph.get_reasoning_llm')
+async def test_agent_graph_deadline(MockReasoningLLM):
+    MockReasoningLLM.side_effect = lambda: slow_llm("pass", delay=5)
+
+    started = time.perf_counter()
+    with pytest.raises(DeadlineExceededException):
+        await CallAgentGraph("hi", chat_id=7001, timeout=0.1)
+    with pytest.raises(DeadlineExceededException):
+        [event async for event in StreamAgentGraph("hi", chat_id=7002, timeout=0.1)]
+
+    # ASSERT: the slow guardrail call did not run to completion
+    assert time.perf_counter() - started < 2
+
+
+# ----------------------------------------------------
+# Test Case 3: The tool loop is capped at max_iterations model turns
+# ----------------------------------------------------
+@pytest.mark.asyncio
+async def test_tool_loop_step_budget():
+    calls = (
+        AIMessage(content="", tool_calls=[{"name": "currentDate", "args": {}, "id": f"call_{i}"}])
+        for i in itertools.count()
+    )
+    llm = FakeToolChatModel(messages=calls)
+
+    with patch('app.llm_functions.ToolHelper.settings.max_iterations', 2):
+        with pytest.raises(AgentException, match="2 iterations"):
+            await InvokeLLMWithTool(llm, [HumanMessage(content="what day is it?")], ['CurrentDate'])
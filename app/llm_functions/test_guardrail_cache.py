@@ -0,0 +1,53 @@
+# tests for the guardrail verdict cache
+import pytest
+from unittest.mock import patch
+from langgraph.checkpoint.memory import InMemorySaver
+from app.core.utils.cache import SqliteCache, TieredCache, TTLCache
+from app.llm_functions.GuardrailCache import GuardrailCache
+from app.llm_functions.LLMCall import CallAgentGraph
+from app.llm_functions.test_llm_call import fake_llm
+
+
+# ----------------------------------------------------
+# Test Case 1: Repeated inputs skip the reasoning model
+# ----------------------------------------------------
+@pytest.mark.asyncio
+@patch('app.llm_functions.AgentGraph.get_base_llm')
+@patch('app.llm_functions.AgentGraph.get_reasoning_llm')
+async def test_repeated_input_reuses_verdict(MockReasoningLLM, MockBaseLLM):
+    MockReasoningLLM.side_effect = lambda: fake_llm("pass")
+    MockBaseLLM.side_effect = lambda: fake_llm("hello")
+    verdicts = GuardrailCache(TieredCache(TTLCache(16)))
+
+    with patch('app.llm_functions.AgentGraph.get_guardrail_cache', return_value=verdicts), \
+         patch('app.llm_functions.AgentGraph.get_checkpointer', return_value=InMemorySaver()):
+        await CallAgentGraph("Hi", chat_id=4001)
+        await CallAgentGraph("hi ", chat_id=4002)
+        await CallAgentGraph("thanks", chat_id=4001)
+
+    # ASSERT: "hi" was checked once, "thanks" is new
+    assert MockReasoningLLM.call_count == 2
+    assert verdicts.stats()["memory_hits"] == 1
+
+
+# ----------------------------------------------------
+# Test Case 2: Verdicts persist across restarts; malformed ones are not cached
+# ----------------------------------------------------
+@pytest.mark.asyncio
+async def test_verdicts_persist(tmp_path):
+    path = str(tmp_path / "guardrail.db")
+    disk = SqliteCache(path, table="guardrail_verdicts")
+    await disk.open()
+    verdicts = GuardrailCache(TieredCache(TTLCache(16), disk))
+    await verdicts.set("drop table users", "fail")
+    await verdicts.set("hello", "maybe")
+    await disk.close()
+
+    disk = SqliteCache(path, table="guardrail_verdicts")
+    await disk.open()
+    try:
+        verdicts = GuardrailCache(TieredCache(TTLCache(16), disk))
+        assert await verdicts.get("DROP TABLE users") == "fail"
+        assert await verdicts.get("hello") is None
+    finally:
+        await disk.close()
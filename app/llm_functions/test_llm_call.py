@@ -0,0 +1,81 @@
+# tests for the agent graph entry points in LLMCall
+import pytest
+from unittest.mock import AsyncMock, patch
+from langchain_core.language_models.fake_chat_models import GenericFakeChatModel
+from langchain_core.messages import AIMessage, HumanMessage
+from langgraph.checkpoint.memory import InMemorySaver
+from app.llm_functions.AgentGraph import get_agent_graph
+from app.llm_functions.LLMCall import CallAgentGraph, StreamAgentGraph
+
+
+class FakeToolChatModel(GenericFakeChatModel):
+    """Fake chat model that accepts tools (create_agent binds them)."""
+
+    def bind_tools(self, tools, **kwargs):
+        return self
+
+
+def fake_llm(*responses):
+    return FakeToolChatModel(messages=iter([AIMessage(content=r) for r in responses]))
+
+
+# ----------------------------------------------------
+# Test Case 1: Synthesis tokens are streamed as deltas
+# ----------------------------------------------------
+@pytest.mark.asyncio
+@patch('app.llm_functions.AgentGraph.get_base_llm')
+@patch('app.llm_functions.AgentGraph.get_reasoning_llm')
+async def test_stream_agent_graph_yields_deltas(MockReasoningLLM, MockBaseLLM):
+    MockReasoningLLM.return_value = fake_llm("pass")
+    MockBaseLLM.return_value = fake_llm("Hello there friend")
+
+    events = [event async for event in StreamAgentGraph("hi", chat_id=1001)]
+
+    deltas = [e["content"] for e in events if e["type"] == "delta"]
+    # ASSERT 1: guardrail verdict is not forwarded, synthesis tokens are
+    assert "pass" not in deltas
+    assert "".join(deltas) == "Hello there friend"
+    # ASSERT 2: the stream ends with exactly one final event, the text the client was shown
+    assert events[-1] == {"type": "final", "content": "".join(deltas)}
+    assert [e["type"] for e in events].count("final") == 1
+
+
+# ----------------------------------------------------
+# Test Case 2: Rejected queries produce no deltas
+# ----------------------------------------------------
+@pytest.mark.asyncio
+@patch('app.llm_functions.AgentGraph.get_reasoning_llm')
+async def test_stream_agent_graph_rejected_query(MockReasoningLLM):
+    MockReasoningLLM.return_value = fake_llm("fail")
+
+    events = [event async for event in StreamAgentGraph("???", chat_id=1002)]
+
+    assert [e["type"] for e in events] == ["final"]
+    assert "did not pass validation" in events[-1]["content"]
+
+
+# ----------------------------------------------------
+# Test Case 3: Warm threads only receive the new message (linear state growth)
+# ----------------------------------------------------
+@pytest.mark.asyncio
+@patch('app.llm_functions.AgentGraph.get_base_llm')
+@patch('app.llm_functions.AgentGraph.get_reasoning_llm')
+async def test_agent_graph_state_grows_linearly(MockReasoningLLM, MockBaseLLM):
+    MockReasoningLLM.side_effect = lambda: fake_llm("pass")
+    MockBaseLLM.side_effect = lambda: fake_llm("answer")
+    loader = AsyncMock(return_value=[HumanMessage(content="earlier"), AIMessage(content="reply")])
+    config = {"configurable": {"thread_id": "1003"}}
+
+    with patch('app.llm_functions.AgentGraph.get_checkpointer', return_value=InMemorySaver()):
+        sizes = []
+        for turn in range(5):
+            await CallAgentGraph(f"question {turn}", chat_id=1003, history_loader=loader)
+            state = await get_agent_graph().aget_state(config)
+            sizes.append(len(state.values["messages"]))
+
+    # ASSERT 1: history is hydrated once (cold thread), then each turn adds one exchange
+    loader.assert_awaited_once()
+    assert sizes == [4, 6, 8, 10, 12]
+    # ASSERT 2: the thread holds each question exactly once
+    contents = [m.content for m in state.values["messages"]]
+    assert [c for c in contents if c.startswith("question")] == [f"question {t}" for t in range(5)]
@@ -0,0 +1,135 @@
+# tests for the persistent MCP connection manager
+import asyncio
+import json
+import os
+import pytest
+from unittest.mock import patch
+from app.llm_functions.MCPConfig import MCPConfigLoader
+from app.llm_functions.MCPManager import MCPConnectionManager
+
+INPROCESS_DATE_SERVER = {
+    "transport": "inprocess",
+    "module": "app.llm_functions.tools.current_date",
+    "attr": "mcp"
+}
+
+CURRENT_DATE_SERVER = {
+    "current_date": {
+        "command": "python",
+        "args": ["./app/llm_functions/tools/current_date.py"],
+        "transport": "stdio",
+        "env": {"FASTMCP_LOG_LEVEL": "WARNING"}
+    }
+}
+
+
+# ----------------------------------------------------
+# Test Case 1: Servers start once and tools reuse the open session
+# ----------------------------------------------------
+@pytest.mark.asyncio
+async def test_manager_reuses_sessions():
+    manager = MCPConnectionManager(CURRENT_DATE_SERVER)
+    await manager.start()
+    try:
+        server = manager.servers["current_date"]
+        session = server.session
+
+        for _ in range(3):
+            tools = await manager.get_tools()
+            assert [t.name for t in tools] == ["currentDate"]
+            result = await tools[0].ainvoke({})
+            assert "timestamp" in json.loads(result[0]["text"])
+
+        # ASSERT: one server start, one session for every call
+        assert server.session is session
+        assert manager.stats()["current_date"]["starts"] == 1
+    finally:
+        await manager.stop()
+
+    assert manager.stats()["current_date"]["ready"] is False
+    # ASSERT: unknown servers are ignored rather than failing the call
+    assert await manager.get_tools(["missing"]) == []
+
+
+# ----------------------------------------------------
+# Test Case 2: In-process servers expose the same tools without a subprocess
+# ----------------------------------------------------
+@pytest.mark.asyncio
+async def test_inprocess_transport_matches_stdio_tool():
+    manager = MCPConnectionManager({
+        "current_date": INPROCESS_DATE_SERVER,
+        "google_search": {
+            "transport": "inprocess",
+            "module": "app.llm_functions.tools.google_search",
+            "attr": "mcp",
+            "threaded": True
+        }
+    })
+    await manager.start()
+    try:
+        tools = {t.name: t for t in await manager.get_tools()}
+        assert set(tools) == {"currentDate", "search"}
+
+        # ASSERT 1: same result format as the stdio tool
+        result = await tools["currentDate"].ainvoke({})
+        assert "timestamp" in json.loads(result[0]["text"])
+
+        # ASSERT 2: the published schema is kept and tool errors reach the model
+        assert "searchstatement" in tools["search"].args
+        with patch.dict(os.environ, {}, clear=True):
+            error = await tools["search"].ainvoke({"searchstatement": "x"})
+        assert "Serper API key is not defined" in str(error)
+        assert manager.stats()["google_search"]["transport"] == "inprocess"
+    finally:
+        await manager.stop()
+
+
+# ----------------------------------------------------
+# Test Case 3: Config is parsed once and reloaded only on real changes
+# ----------------------------------------------------
+def test_config_loader_detects_changes(tmp_path):
+    path = tmp_path / "mcp_config.json"
+    path.write_text(json.dumps({"current_date": INPROCESS_DATE_SERVER}))
+    loader = MCPConfigLoader(str(path))
+
+    assert loader.get() == {"current_date": INPROCESS_DATE_SERVER}
+    # ASSERT 1: unchanged file (even if touched) is not reparsed
+    assert loader.refresh() == set()
+    os.utime(path, ns=(1, 1))
+    assert loader.refresh() == set() and loader.reloads == 1
+
+    # ASSERT 2: only the servers whose entries changed are reported
+    path.write_text(json.dumps({"current_date": {**INPROCESS_DATE_SERVER, "threaded": True}, "other": INPROCESS_DATE_SERVER}))
+    assert loader.refresh() == {"current_date", "other"}
+
+    # ASSERT 3: an invalid edit keeps the last good config
+    path.write_text(json.dumps({"broken": {"transport": "stdio"}}))
+    assert loader.refresh() == set()
+    assert set(loader.get()) == {"current_date", "other"}
+
+
+# ----------------------------------------------------
+# Test Case 4: Reconfiguring reconnects only the changed servers
+# ----------------------------------------------------
+@pytest.mark.asyncio
+async def test_reconfigure_swaps_changed_servers():
+    manager = MCPConnectionManager({"current_date": INPROCESS_DATE_SERVER, "date_copy": INPROCESS_DATE_SERVER})
+    await manager.start()
+    try:
+        unchanged = manager.servers["current_date"]
+        changed = manager.servers["date_copy"]
+
+        with patch('app.llm_functions.MCPManager.settings.mcp_reload_drain_seconds', 0):
+            await manager.reconfigure({
+                "current_date": INPROCESS_DATE_SERVER,
+                "date_threaded": {**INPROCESS_DATE_SERVER, "threaded": True}
+            })
+            await asyncio.gather(*manager._retiring)
+
+        # ASSERT: untouched server kept its session, removed one was closed
+        assert manager.servers["current_date"] is unchanged
+        assert set(manager.servers) == {"current_date", "date_threaded"}
+        assert not changed.ready.is_set()
+        assert len(await manager.get_tools()) == 2
+    finally:
+        await manager.stop()
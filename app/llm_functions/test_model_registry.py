@@ -0,0 +1,23 @@
+# tests for the chat model registry in LLMDefination
+from unittest.mock import patch
+from app.llm_functions.LLMDefination import ModelRegistry, ModelCapability, get_chat_llm
+
+
+# ----------------------------------------------------
+# Test Case 1: Models are built once per (capability, temperature, provider)
+# ----------------------------------------------------
+@patch('app.llm_functions.LLMDefination._build_chat_llm', side_effect=lambda c, t: object())
+def test_get_chat_llm_reuses_instances(MockBuild):
+    with patch('app.llm_functions.LLMDefination.MODEL_REGISTRY', ModelRegistry()) as registry:
+        basic = get_chat_llm(ModelCapability.BASIC)
+
+        # ASSERT 1: same key, same instance
+        assert get_chat_llm(ModelCapability.BASIC) is basic
+        # ASSERT 2: a different temperature or capability is a different client
+        assert get_chat_llm(ModelCapability.BASIC, temperature=0.2) is not basic
+        reasoning = get_chat_llm(ModelCapability.REASONING)
+        # ASSERT 3: reasoning always runs at 0.1, whatever temperature is asked for
+        assert get_chat_llm(ModelCapability.REASONING, temperature=0.9) is reasoning
+
+        assert MockBuild.call_count == 3
+        assert registry.stats() == {"size": 3, "hits": 2, "misses": 3}
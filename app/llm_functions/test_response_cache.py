@@ -0,0 +1,179 @@
+# tests for the exact + semantic response cache
+import asyncio
+import hashlib
+import pytest
+from unittest.mock import patch
+from langchain_core.messages import AIMessage, HumanMessage
+from langgraph.checkpoint.memory import InMemorySaver
+from app.llm_functions.AgentGraph import get_agent_graph
+from app.llm_functions.LLMCall import CallAgentGraph, StreamAgentGraph
+from app.llm_functions.ResponseCache import ResponseCache
+from app.llm_functions.test_llm_call import fake_llm
+
+SYNONYMS = {"hours": "open", "opening": "open", "times": "open"}
+
+
+class FakeEmbeddings:
+    """Bag-of-words embeddings, with a few synonyms mapped together."""
+
+    async def aembed_query(self, text):
+        vector = [0.0] * 64
+        for word in text.lower().split():
+            word = SYNONYMS.get(word, word)
+            vector[int(hashlib.md5(word.encode()).hexdigest(), 16) % 64] += 1.0
+        return vector
+
+
+def new_cache():
+    return ResponseCache(embeddings_factory=FakeEmbeddings)
+
+
+# ----------------------------------------------------
+# Test Case 1: Exact and semantic tiers, scoped to the conversation context
+# ----------------------------------------------------
+@pytest.mark.asyncio
+async def test_exact_and_semantic_tiers():
+    cache = new_cache()
+    with patch('app.llm_functions.ResponseCache.settings.response_cache_similarity_threshold', 0.9):
+        miss = await cache.lookup("When is the store open?", [])
+        assert miss.tier == "miss"
+        cache.store(miss, "9 to 5")
+
+        # ASSERT 1: normalization makes trivial variants exact hits
+        assert (await cache.lookup("  when is the STORE open ", [])).tier == "exact"
+        # ASSERT 2: paraphrases above the threshold are semantic hits
+        paraphrase = await cache.lookup("when is the store opening", [])
+        assert (paraphrase.tier, paraphrase.answer) == ("semantic", "9 to 5")
+        # ASSERT 3: unrelated questions and other conversations miss
+        assert (await cache.lookup("what is the refund policy", [])).tier == "miss"
+        context = [HumanMessage(content="hi"), AIMessage(content="hello")]
+        assert (await cache.lookup("When is the store open?", context)).tier == "miss"
+
+    assert cache.stats()["exact_hits"] == 1 and cache.stats()["semantic_hits"] == 1
+
+
+# ----------------------------------------------------
+# Test Case 2: Entries expire after the TTL
+# ----------------------------------------------------
+@pytest.mark.asyncio
+async def test_entries_expire():
+    cache = new_cache()
+    with patch('app.llm_functions.ResponseCache.settings.response_cache_ttl_seconds', -1):
+        cache.store(await cache.lookup("question", []), "answer")
+    assert (await cache.lookup("question", [])).tier == "miss"
+    assert cache.stats()["semantic_entries"] == 0
+
+
+# ----------------------------------------------------
+# Test Case 3: A cache hit skips the graph but still records the turn
+# ----------------------------------------------------
+@pytest.mark.asyncio
+@patch('app.llm_functions.AgentGraph.get_base_llm')
+@patch('app.llm_functions.AgentGraph.get_reasoning_llm')
+async def test_cache_hit_skips_llms_and_updates_thread(MockReasoningLLM, MockBaseLLM):
+    MockReasoningLLM.side_effect = lambda: fake_llm("pass")
+    MockBaseLLM.side_effect = lambda: fake_llm("We open at nine")
+
+    with patch('app.llm_functions.LLMCall.get_response_cache', return_value=new_cache()), \
+         patch('app.llm_functions.LLMCall.settings.response_cache_enabled', True), \
+         patch('app.llm_functions.AgentGraph.get_checkpointer', return_value=InMemorySaver()):
+        first = await CallAgentGraph("When do you open?", chat_id=3001, use_cache=True)
+        calls = MockReasoningLLM.call_count + MockBaseLLM.call_count
+        events = [e async for e in StreamAgentGraph("when do you open", chat_id=3002, use_cache=True)]
+        calls_after_hit = MockReasoningLLM.call_count + MockBaseLLM.call_count
+        uncached = await CallAgentGraph("When do you open?", chat_id=3003)
+        state = await get_agent_graph().aget_state({"configurable": {"thread_id": "3002"}})
+
+    # ASSERT 1: the second chat was answered from cache in one delta
+    assert first == "We open at nine"
+    assert events == [{"type": "delta", "content": first}, {"type": "final", "content": first}]
+    # ASSERT 2: no LLM was called for the hit, but opting out runs the graph
+    assert calls_after_hit == calls
+    assert MockReasoningLLM.call_count + MockBaseLLM.call_count > calls
+    assert uncached == first
+    # ASSERT 3: the cached turn is part of the conversation
+    assert [m.content for m in state.values["messages"]] == ["when do you open", "We open at nine"]
+
+
+# ----------------------------------------------------
+# Test Case 4: Paraphrases must pass the guardrail; embedding failures back off
+# ----------------------------------------------------
+@pytest.mark.asyncio
+async def test_semantic_tier_validation_and_embedding_backoff():
+    cache = new_cache()
+    with patch('app.llm_functions.ResponseCache.settings.response_cache_similarity_threshold', 0.9):
+        cache.store(await cache.lookup("When is the store open?", []), "9 to 5")
+
+        async def reject(query):
+            return False
+
+        # ASSERT 1: a paraphrase failing validation is not answered from cache
+        lookup = await cache.lookup("when is the store opening", [], validate=reject)
+        assert (lookup.tier, lookup.answer) == ("miss", None)
+        assert cache.stats()["semantic_rejected"] == 1
+
+    calls = []
+
+    def broken_embeddings():
+        calls.append(1)
+        raise RuntimeError("embeddings offline")
+
+    broken = ResponseCache(embeddings_factory=broken_embeddings)
+    with patch('app.llm_functions.ResponseCache.settings.response_cache_embedding_retry_seconds', 0.05):
+        await broken.lookup("first question", [])
+        await broken.lookup("second question", [])
+        # ASSERT 2: the failing factory is not retried on every message...
+        assert len(calls) == 1
+        # ...only once the backoff has expired
+        await asyncio.sleep(0.06)
+        await broken.lookup("third question", [])
+    assert len(calls) == 2
+
+
+# ----------------------------------------------------
+# Test Case 5: A paraphrase that fails the guardrail runs the graph
+# ----------------------------------------------------
+@pytest.mark.asyncio
+@patch('app.llm_functions.AgentGraph.get_base_llm')
+@patch('app.llm_functions.AgentGraph.get_reasoning_llm')
+async def test_semantic_hit_requires_guardrail(MockReasoningLLM, MockBaseLLM):
+    MockReasoningLLM.side_effect = [fake_llm("pass"), fake_llm("fail"), fake_llm("fail")]
+    MockBaseLLM.side_effect = lambda: fake_llm("We open at nine")
+
+    cache = new_cache()
+    with patch('app.llm_functions.LLMCall.get_response_cache', return_value=cache), \
+         patch('app.llm_functions.LLMCall.settings.response_cache_enabled', True), \
+         patch('app.llm_functions.ResponseCache.settings.response_cache_similarity_threshold', 0.85), \
+         patch('app.llm_functions.AgentGraph.get_checkpointer', return_value=InMemorySaver()):
+        await CallAgentGraph("When do you open?", chat_id=3101, use_cache=True)
+        paraphrase = await CallAgentGraph("When do you open today?", chat_id=3102, use_cache=True)
+
+    # ASSERT: the similar answer was found but not reused; the graph rejected the query
+    assert cache.stats()["semantic_rejected"] == 1
+    assert paraphrase != "We open at nine"
+    assert "did not pass validation" in paraphrase
+
+
+# ----------------------------------------------------
+# Test Case 6: Follow-ups are only shared between identical conversations
+# ----------------------------------------------------
+@pytest.mark.asyncio
+@patch('app.llm_functions.AgentGraph.get_base_llm')
+@patch('app.llm_functions.AgentGraph.get_reasoning_llm')
+async def test_follow_up_keyed_on_whole_thread(MockReasoningLLM, MockBaseLLM):
+    MockReasoningLLM.side_effect = lambda: fake_llm("pass")
+    MockBaseLLM.side_effect = lambda: fake_llm("It depends")
+
+    cache = new_cache()
+    with patch('app.llm_functions.LLMCall.get_response_cache', return_value=cache), \
+         patch('app.llm_functions.LLMCall.settings.response_cache_enabled', True), \
+         patch('app.llm_functions.AgentGraph.get_checkpointer', return_value=InMemorySaver()):
+        for chat_id, opening in ((3201, "What is my balance?"), (3202, "Who is the CEO?"), (3203, "Who is the CEO?")):
+            await CallAgentGraph("Hello", chat_id=chat_id, use_cache=True)
+            await CallAgentGraph(opening, chat_id=chat_id, use_cache=True)
+            await CallAgentGraph("And last year?", chat_id=chat_id, use_cache=True)
+
+    # ASSERT: "Hello" is shared by all three threads, the rest only by the two identical ones
+    stats = cache.stats()
+    assert stats["exact_hits"] == 4
+    assert stats["misses"] == 5
@@ -0,0 +1,127 @@
+# tests for speculative guardrail + synthesis execution
+import asyncio
+import time
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+from langchain_core.messages import AIMessage
+from langgraph.checkpoint.memory import InMemorySaver
+from app.llm_functions.AgentGraph import SpeculationMetrics, get_agent_graph
+from app.llm_functions.LLMCall import CallAgentGraph, StreamAgentGraph
+from app.llm_functions.test_llm_call import FakeToolChatModel
+
+
+class SlowFakeModel(FakeToolChatModel):
+    """Fake chat model that takes ``delay`` seconds before answering."""
+
+    delay: float = 0.2
+
+    async def _agenerate(self, *args, **kwargs):
+        await asyncio.sleep(self.delay)
+        return await super()._agenerate(*args, **kwargs)
+
+    async def _astream(self, *args, **kwargs):
+        await asyncio.sleep(self.delay)
+        async for chunk in super()._astream(*args, **kwargs):
+            yield chunk
+
+
+def slow_llm(response, delay=0.2):
+    return SlowFakeModel(messages=iter([AIMessage(content=response)]), delay=delay)
+
+
+def usage_llm(*messages, delay=0.01):
+    # Not streamed, so the usage metadata of the messages reaches the callbacks
+    return SlowFakeModel(messages=iter(messages), delay=delay, disable_streaming=True)
+
+
+def usage(total):
+    return {"input_tokens": total - 20, "output_tokens": 20, "total_tokens": total}
+
+
+def speculative():
+    return patch.multiple(
+        'app.llm_functions.AgentGraph.settings',
+        speculative_synthesis=True
+    )
+
+
+# ----------------------------------------------------
+# Test Case 1: Passing queries take max(guardrail, synthesis), not the sum
+# ----------------------------------------------------
+@pytest.mark.asyncio
+@patch('app.llm_functions.AgentGraph.get_base_llm')
+@patch('app.llm_functions.AgentGraph.get_reasoning_llm')
+async def test_speculative_pass_runs_concurrently(MockReasoningLLM, MockBaseLLM):
+    MockReasoningLLM.side_effect = lambda: slow_llm("pass")
+    MockBaseLLM.side_effect = lambda: slow_llm("Speculative hello there")
+
+    with speculative(), patch('app.llm_functions.AgentGraph.get_checkpointer', return_value=InMemorySaver()):
+        started = time.perf_counter()
+        response = await CallAgentGraph("hi", chat_id=6001)
+        elapsed = time.perf_counter() - started
+        events = [e async for e in StreamAgentGraph("hi again", chat_id=6002)]
+
+    assert response == "Speculative hello there"
+    assert elapsed < 0.35
+    # ASSERT: buffered tokens are released as deltas once the guardrail passed
+    deltas = "".join(e["content"] for e in events if e["type"] == "delta")
+    assert events[-1] == {"type": "final", "content": deltas}
+    assert deltas == "Speculative hello there"
+
+
+# ----------------------------------------------------
+# Test Case 2: Failing queries cancel synthesis and stream nothing
+# ----------------------------------------------------
+@pytest.mark.asyncio
+@patch('app.llm_functions.AgentGraph.get_base_llm')
+@patch('app.llm_functions.AgentGraph.get_reasoning_llm')
+async def test_speculative_fail_cancels_synthesis(MockReasoningLLM, MockBaseLLM):
+    MockReasoningLLM.side_effect = lambda: slow_llm("fail", delay=0.3)
+    MockBaseLLM.side_effect = lambda: usage_llm(AIMessage(content="This answer " * 40, usage_metadata=usage(170)))
+    metrics = SpeculationMetrics()
+
+    with speculative(), patch('app.llm_functions.AgentGraph._speculation', metrics), \
+         patch('app.llm_functions.AgentGraph.get_checkpointer', return_value=InMemorySaver()):
+        events = [e async for e in StreamAgentGraph("bad query", chat_id=6003)]
+        state = await get_agent_graph().aget_state({"configurable": {"thread_id": "6003"}})
+
+    assert [e["type"] for e in events] == ["final"]
+    assert "did not pass validation" in events[-1]["content"]
+    # ASSERT: the speculative answer was never persisted, its reported usage was counted
+    assert all("This answer" not in m.content for m in state.values["messages"])
+    assert metrics.cancelled == 1 and metrics.wasted_tokens == 170
+
+
+# ----------------------------------------------------
+# Test Case 3: Tool calls wait for the guardrail verdict
+# ----------------------------------------------------
+@pytest.mark.asyncio
+@patch('app.llm_functions.AgentGraph.get_base_llm')
+@patch('app.llm_functions.AgentGraph.get_reasoning_llm')
+async def test_speculative_tool_calls_wait_for_verdict(MockReasoningLLM, MockBaseLLM):
+    search = AIMessage(
+        content="",
+        tool_calls=[{"name": "search", "args": {"searchstatement": "weather"}, "id": "call_1"}],
+        usage_metadata=usage(60)
+    )
+    MockBaseLLM.side_effect = lambda: usage_llm(search, AIMessage(content="Sunny", usage_metadata=usage(80)))
+    tool_cache = MagicMock()
+    tool_cache.get_or_call = AsyncMock(return_value="sunny all day")
+    metrics = SpeculationMetrics()
+
+    with speculative(), patch('app.llm_functions.AgentGraph._speculation', metrics), \
+         patch('app.llm_functions.ToolHelper.get_tool_cache', return_value=tool_cache), \
+         patch('app.llm_functions.AgentGraph.get_checkpointer', return_value=InMemorySaver()):
+        MockReasoningLLM.side_effect = lambda: slow_llm("fail", delay=0.3)
+        rejected = await CallAgentGraph("weather?", chat_id=6004)
+        # ASSERT 1: a rejected query never reaches the (paid, shared) search tool
+        assert "did not pass validation" in rejected
+        tool_cache.get_or_call.assert_not_called()
+        assert metrics.wasted_tokens == 60
+
+        MockReasoningLLM.side_effect = lambda: slow_llm("pass", delay=0.1)
+        answer = await CallAgentGraph("weather?", chat_id=6005)
+
+    # ASSERT 2: once the query passed, the held tool call ran
+    assert answer == "Sunny"
+    tool_cache.get_or_call.assert_awaited_once()
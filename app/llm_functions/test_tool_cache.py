@@ -0,0 +1,75 @@
+# tests for the tool result cache
+import pytest
+from unittest.mock import patch
+from langchain_core.tools import tool, ToolException
+from app.core.utils.cache import MISSING, SqliteCache, TieredCache, TTLCache
+from app.llm_functions.ToolCache import ToolCache, tool_cache_key
+from app.llm_functions.ToolHelper import WithCache, WithTimeout
+
+calls = []
+
+
+@tool
+async def lookup(query: str) -> str:
+    """Look something up."""
+    calls.append(query)
+    if query == "fail":
+        raise ToolException("upstream error")
+    return f"result for {query}"
+
+
+# ----------------------------------------------------
+# Test Case 1: Equivalent arguments share a cache entry
+# ----------------------------------------------------
+def test_cache_key_normalizes_arguments():
+    assert tool_cache_key("search", {"q": "Who won  the Cup?"}) == tool_cache_key("search", {"q": " who won the cup? "})
+    assert tool_cache_key("search", {"a": 1, "b": "x"}) == tool_cache_key("search", {"b": "x", "a": 1})
+    assert tool_cache_key("search", {"q": "x"}) != tool_cache_key("other", {"q": "x"})
+
+
+# ----------------------------------------------------
+# Test Case 2: Repeated calls are served from cache, errors are not cached
+# ----------------------------------------------------
+@pytest.mark.asyncio
+async def test_cached_tool_skips_repeated_calls():
+    calls.clear()
+    cache = ToolCache(TieredCache(TTLCache(16)))
+    cached = WithTimeout(WithCache(lookup, 60), 5)
+
+    with patch('app.llm_functions.ToolHelper.get_tool_cache', return_value=cache):
+        assert await cached.ainvoke({"query": "News today"}) == "result for News today"
+        assert await cached.ainvoke({"query": "news  today"}) == "result for News today"
+        assert "upstream error" in await cached.ainvoke({"query": "fail"})
+        assert "upstream error" in await cached.ainvoke({"query": "fail"})
+
+    assert calls == ["News today", "fail", "fail"]
+    stats = cache.stats()
+    assert stats["by_tool"]["lookup"] == {"hits": 1, "misses": 3}
+    assert stats["hit_rate"] == 0.25
+
+
+# ----------------------------------------------------
+# Test Case 3: The SQLite tier survives a restart and honours the TTL
+# ----------------------------------------------------
+@pytest.mark.asyncio
+async def test_sqlite_tier_persists_entries(tmp_path):
+    path = str(tmp_path / "tool_cache.db")
+    disk = SqliteCache(path)
+    await disk.open()
+    cache = TieredCache(TTLCache(16), disk)
+    await cache.set("live", {"a": [1, 2]}, ttl=60)
+    await cache.set("expired", "old", ttl=-1)
+    await disk.close()
+
+    # a fresh process: empty memory tier, same file
+    disk = SqliteCache(path)
+    await disk.open()
+    cache = TieredCache(TTLCache(16), disk)
+    try:
+        assert await cache.get("live") == {"a": [1, 2]}
+        assert await cache.get("live") == {"a": [1, 2]}
+        assert await cache.get("expired") is MISSING
+        assert await disk.prune_expired() == 1
+        assert (cache.disk_hits, cache.memory_hits, cache.misses) == (1, 1, 1)
+    finally:
+        await disk.close()
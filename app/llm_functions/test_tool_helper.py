@@ -0,0 +1,63 @@
+# tests for the tool-calling agent helpers in ToolHelper
+import asyncio
+import time
+import pytest
+from unittest.mock import patch
+from langchain_core.messages import AIMessage, HumanMessage
+from langchain_core.tools import tool
+from app.llm_functions.ToolHelper import GetAgent, InvokeLLMWithTool, WithTimeout
+from app.llm_functions.test_llm_call import FakeToolChatModel, fake_llm
+
+
+@tool
+async def slowLookup(item: str) -> str:
+    """Look an item up slowly."""
+    await asyncio.sleep(0.2)
+    return f"found {item}"
+
+
+# ----------------------------------------------------
+# Test Case 1: The agent is compiled once per model and tool set
+# ----------------------------------------------------
+def test_get_agent_is_cached_per_model_and_toolset():
+    with patch.dict('app.llm_functions.ToolHelper._agentCache', clear=True):
+        llm = fake_llm("hi")
+        agent = GetAgent(llm, ['CurrentDate', 'Search'])
+
+        assert GetAgent(llm, ['Search', 'CurrentDate']) is agent
+        assert GetAgent(llm, ['CurrentDate']) is not agent
+        assert GetAgent(fake_llm("hi"), ['CurrentDate', 'Search']) is not agent
+
+
+# ----------------------------------------------------
+# Test Case 2: A tool call exceeding its timeout becomes a tool error
+# ----------------------------------------------------
+@pytest.mark.asyncio
+async def test_tool_timeout_is_reported_as_error():
+    result = await WithTimeout(slowLookup, 0.05).ainvoke({"item": "x"})
+    assert "timed out" in result
+
+
+# ----------------------------------------------------
+# Test Case 3: Tool calls from one model turn run concurrently
+# ----------------------------------------------------
+@pytest.mark.asyncio
+async def test_tool_calls_run_concurrently():
+    llm = FakeToolChatModel(messages=iter([
+        AIMessage(content="", tool_calls=[
+            {"name": "slowLookup", "args": {"item": "a"}, "id": "1"},
+            {"name": "slowLookup", "args": {"item": "b"}, "id": "2"},
+            {"name": "slowLookup", "args": {"item": "c"}, "id": "3"},
+        ]),
+        AIMessage(content="Done"),
+    ]))
+
+    with patch.dict('app.llm_functions.ToolHelper.toolsByName', {"Lookup": WithTimeout(slowLookup, 5)}), \
+         patch.dict('app.llm_functions.ToolHelper._agentCache', clear=True):
+        started = time.perf_counter()
+        response = await InvokeLLMWithTool(llm, [HumanMessage(content="look up a, b and c")], ['Lookup'])
+        elapsed = time.perf_counter() - started
+
+    assert response == "Done"
+    # three 0.2s calls in parallel, not 0.6s in sequence
+    assert elapsed < 0.5
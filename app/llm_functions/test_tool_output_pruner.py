@@ -0,0 +1,68 @@
+# tests for tool output pruning
+import json
+import pytest
+from unittest.mock import patch
+from langchain_core.tools import tool
+from app.llm_functions.ContextWindow import estimate_tokens
+from app.llm_functions.ToolHelper import WithPruning
+from app.llm_functions.ToolOutputPruner import PruneMetrics, prune_search, prune_tool_output
+
+SERPER_RESPONSE = json.dumps({
+    "searchParameters": {"q": "python release", "type": "search", "engine": "google"},
+    "answerBox": {"title": "Python", "answer": "Python 3.13"},
+    "knowledgeGraph": {
+        "title": "Python", "type": "Programming language",
+        "description": "Python is a high-level programming language.",
+        "attributes": {"Designed by": "Guido van Rossum", "First appeared": "1991"},
+        "imageUrl": "https://example.com/python.png"
+    },
+    "organic": [
+        {"title": f"Result {i}", "link": f"https://example.com/{i}",
+         "snippet": "Python 3.13 was released in October." if i % 2 else f"Distinct snippet {i}.",
+         "sitelinks": [{"title": "Downloads", "link": "https://example.com/dl"}] * 5, "position": i}
+        for i in range(10)
+    ],
+    "peopleAlsoAsk": [{"question": f"Question {i}?", "snippet": "x" * 300, "link": "https://example.com"} for i in range(4)],
+    "relatedSearches": [{"query": f"related {i}"} for i in range(8)]
+})
+
+
+@tool
+async def search(searchstatement: str) -> str:
+    """Search the web."""
+    return SERPER_RESPONSE
+
+
+# ----------------------------------------------------
+# Test Case 1: Search output keeps the useful fields, deduplicated
+# ----------------------------------------------------
+def test_prune_search_extracts_and_dedupes():
+    pruned = prune_search(SERPER_RESPONSE)
+
+    assert "Answer: Python 3.13" in pruned
+    assert "Designed by: Guido van Rossum" in pruned
+    assert pruned.count("Python 3.13 was released in October.") == 1
+    assert "sitelinks" not in pruned and "Question 0" not in pruned and "related 0" not in pruned
+    assert estimate_tokens(pruned) < estimate_tokens(SERPER_RESPONSE) / 3
+
+    # ASSERT: non-JSON output is passed through
+    assert prune_search("plain text") == "plain text"
+
+
+# ----------------------------------------------------
+# Test Case 2: Tool output is truncated to its budget and savings recorded
+# ----------------------------------------------------
+@pytest.mark.asyncio
+async def test_pruned_tool_respects_budget_and_records_savings():
+    metrics = PruneMetrics()
+    with patch('app.llm_functions.ToolOutputPruner._metrics', metrics):
+        result = await WithPruning(search, 50).ainvoke({"searchstatement": "python release"})
+        untouched = prune_tool_output("other", "short output", 50)
+
+    assert estimate_tokens(result) <= 60
+    assert result.startswith("Answer: Python 3.13") and result.endswith("[truncated]")
+    assert untouched == "short output"
+    stats = metrics.as_dict()
+    assert stats["search"]["calls"] == 1
+    assert stats["search"]["tokens_saved"] > 500
+    assert stats["other"]["tokens_saved"] == 0
@@ -1,16 +1,17 @@
 
 from langchain.tools import tool
-import requests
+from langchain_core.tools import ToolException
 import json
 import os
 from datetime import datetime
+from app.core.utils.http_pool import get_async_http_client
 url = "https://google.serper.dev/search"
 from dotenv import load_dotenv
 
 load_dotenv()
 
 @tool()
-def search(searchstatement:str) -> str:
+async def search(searchstatement:str) -> str:
     """Used to search the web to get information 
         args:
         searchstatement: The information being searched for in the web
@@ -26,7 +27,11 @@ def search(searchstatement:str) -> str:
          'X-API-KEY':os.environ["SERPER_API_KEY"],
          'Content-Type': 'application/json'
      }
-    response = requests.request("POST", url, headers=headers, data=payload)
+    # Shared keep-alive pool; per-host timeout comes from settings.http_host_timeouts
+    response = await get_async_http_client().post(url, headers=headers, content=payload)
+    if response.status_code >= 400:
+        # Raised (not returned) so the error reaches the model but is never cached
+        raise ToolException(f"Search failed with status {response.status_code}: {response.text[:200]}")
     return response.text
 
     # response = f'Todays date is {datetime.utcnow().strftime("%Y-%m-%d %H:%M:%S")}'
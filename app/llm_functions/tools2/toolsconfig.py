@@ -1,11 +1,18 @@
 from .current_date import currentDate
 from .google_search import search
 
+# "timeout" (seconds) bounds each call of the tool; defaults to settings.tool_timeout_seconds
+# "cache_ttl" (seconds) caches the tool's results by normalized arguments; 0/absent disables
+# "token_budget" caps the tool's output sent to the model; defaults to settings.tool_output_token_budget
 toolsConfig=[{
     "key":"CurrentDate",
-    "value":currentDate
+    "value":currentDate,
+    "timeout":5
 },
 {
     "key":"Search",
-    "value":search
+    "value":search,
+    "timeout":15,
+    "cache_ttl":600,
+    "token_budget":600
 }]
\ No newline at end of file
@@ -1,7 +1,8 @@
-"""
-Middleware Module - Global middleware
-"""
-
-from .auth_middleware import AuthMiddleware
-
-__all__ = ["AuthMiddleware"]
+"""
+Middleware Module - Global middleware
+"""
+
+from .auth_middleware import AuthMiddleware
+from .unit_of_work_middleware import UnitOfWorkMiddleware
+
+__all__ = ["AuthMiddleware", "UnitOfWorkMiddleware"]
@@ -0,0 +1,28 @@
+"""
+Unit of work middleware
+"""
+
+from starlette.types import ASGIApp, Receive, Scope, Send
+from app.core.database import async_unit_of_work
+
+
+class UnitOfWorkMiddleware:
+    """
+    Middleware that opens one unit of work per HTTP request.
+
+    All repositories used while handling the request (including the ones built
+    by AuthMiddleware) share its sessions, which are closed when the response
+    is finished. WebSocket connections are long-lived, so they open a unit of
+    work per message instead.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        async with async_unit_of_work():
+            await self.app(scope, receive, send)
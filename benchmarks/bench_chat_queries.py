@@ -0,0 +1,165 @@
+"""
+Chat Query Benchmark
+====================
+Seeds a throwaway SQLite database with chat messages and compares the query
+plans and latency of the chat_messages hot paths with the legacy
+single-column indexes against the composite (chat_id, created_at) and
+(user_id, created_at) indexes.
+
+Usage:
+    python -m benchmarks.bench_chat_queries                    # 10M messages
+    python -m benchmarks.bench_chat_queries --messages 1000000 --chats 50000
+"""
+
+import argparse
+import os
+import random
+import sqlite3
+import statistics
+import tempfile
+import time
+from datetime import datetime, timedelta
+from sqlalchemy import create_engine, select, text
+from sqlalchemy.orm import Session
+from app.features.chat.chat_entity import ChatMessage
+
+# Index sets compared by the benchmark
+INDEX_SETS = {
+    "single-column": [
+        "CREATE INDEX ix_bench_chat_id ON chat_messages (chat_id)",
+        "CREATE INDEX ix_bench_user_id ON chat_messages (user_id)",
+    ],
+    "composite": [
+        "CREATE INDEX ix_bench_chat_id_created_at ON chat_messages (chat_id, created_at)",
+        "CREATE INDEX ix_bench_user_id_created_at ON chat_messages (user_id, created_at)",
+    ],
+}
+
+
+def hot_queries(chat_id: int, user_id: int) -> dict:
+    """The chat_messages queries issued on every message / history load."""
+    return {
+        "get_chat_messages": select(ChatMessage)
+            .filter(ChatMessage.chat_id == chat_id)
+            .order_by(ChatMessage.created_at.asc())
+            .limit(100),
+        "load_history (last 20)": select(ChatMessage.message_type, ChatMessage.content)
+            .filter(ChatMessage.chat_id == chat_id)
+            .order_by(ChatMessage.created_at.desc())
+            .limit(20),
+        "user recent messages": select(ChatMessage.id, ChatMessage.chat_id)
+            .filter(ChatMessage.user_id == user_id)
+            .order_by(ChatMessage.created_at.desc())
+            .limit(20),
+    }
+
+
+def seed(path: str, messages: int, chats: int, users: int):
+    """Bulk insert messages interleaved across chats, as real traffic would be."""
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA journal_mode=OFF")
+    conn.execute("PRAGMA synchronous=OFF")
+    conn.execute("""
+        CREATE TABLE chat_messages (
+            id INTEGER PRIMARY KEY,
+            chat_id INTEGER NOT NULL,
+            user_id INTEGER NOT NULL,
+            message_type VARCHAR(50) NOT NULL,
+            content TEXT NOT NULL,
+            metadata_info JSON,
+            created_at DATETIME NOT NULL,
+            updated_at DATETIME NOT NULL
+        )
+    """)
+    start = datetime(2024, 1, 1)
+    rng = random.Random(42)
+
+    def rows():
+        for i in range(messages):
+            chat_id = rng.randrange(1, chats + 1)
+            created = (start + timedelta(milliseconds=i * 250)).isoformat(sep=" ")
+            yield (
+                chat_id,
+                chat_id % users + 1,
+                "user" if i % 2 else "bot",
+                "lorem ipsum dolor sit amet " * 4,
+                "{}",
+                created,
+                created,
+            )
+
+    began = time.perf_counter()
+    conn.executemany(
+        "INSERT INTO chat_messages (chat_id, user_id, message_type, content, metadata_info, created_at, updated_at) "
+        "VALUES (?, ?, ?, ?, ?, ?, ?)",
+        rows(),
+    )
+    conn.commit()
+    conn.close()
+    print(f"Seeded {messages:,} messages in {time.perf_counter() - began:.1f}s")
+
+
+def use_indexes(engine, name: str):
+    """Drop every benchmark index and create the given index set."""
+    with engine.begin() as conn:
+        for index_set in INDEX_SETS.values():
+            for ddl in index_set:
+                conn.execute(text(f"DROP INDEX IF EXISTS {ddl.split()[2]}"))
+        began = time.perf_counter()
+        for ddl in INDEX_SETS[name]:
+            conn.execute(text(ddl))
+        conn.execute(text("ANALYZE"))
+    print(f"Built {name} indexes in {time.perf_counter() - began:.1f}s")
+
+
+def run(engine, chats: int, users: int, repeats: int):
+    """Print the plan and latency of each hot query."""
+    rng = random.Random(7)
+    samples = [(rng.randrange(1, chats + 1), rng.randrange(1, users + 1)) for _ in range(repeats)]
+
+    with Session(engine) as db:
+        for name in hot_queries(1, 1):
+            statement = hot_queries(*samples[0])[name]
+            sql = str(statement.compile(engine, compile_kwargs={"literal_binds": True}))
+            plan = db.execute(text(f"EXPLAIN QUERY PLAN {sql}")).all()
+
+            timings = []
+            for chat_id, user_id in samples:
+                began = time.perf_counter()
+                db.execute(hot_queries(chat_id, user_id)[name]).all()
+                timings.append((time.perf_counter() - began) * 1000)
+
+            print(f"  {name}")
+            for row in plan:
+                print(f"    plan: {row[-1]}")
+            timings.sort()
+            print(
+                f"    p50={statistics.median(timings):.3f}ms "
+                f"p95={timings[int(len(timings) * 0.95) - 1]:.3f}ms"
+            )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark chat_messages hot-path queries")
+    parser.add_argument("--messages", type=int, default=10_000_000, help="Messages to seed (default: 10M)")
+    parser.add_argument("--chats", type=int, default=200_000, help="Distinct chats")
+    parser.add_argument("--users", type=int, default=20_000, help="Distinct users")
+    parser.add_argument("--repeats", type=int, default=200, help="Timed executions per query")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.db")
+        seed(path, args.messages, args.chats, args.users)
+        engine = create_engine(f"sqlite:///{path}")
+
+        for name in INDEX_SETS:
+            print()
+            print(f"=== {name} indexes ===")
+            use_indexes(engine, name)
+            run(engine, args.chats, args.users, args.repeats)
+
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""
+MCP Pool Benchmark
+==================
+Compares the cost of getting the MCP tools and making one tool call per
+message the old way (a new MultiServerMCPClient per invocation, which
+spawns every stdio server, handshakes and lists tools, and spawns again
+for the tool call) against the persistent MCPConnectionManager, with the
+first-party servers reached over stdio and mounted in-process.
+
+No LLM is involved: the numbers are the MCP overhead paid before and
+around the model call.
+
+Usage:
+    python -m benchmarks.bench_mcp_pool                 # 20 iterations
+    python -m benchmarks.bench_mcp_pool --iterations 50 --tool currentDate
+"""
+
+import argparse
+import asyncio
+import importlib.util
+import json
+import statistics
+import time
+from langchain_mcp_adapters.client import MultiServerMCPClient
+from app.core.config import settings
+from app.llm_functions.MCPInProcess import is_inprocess
+from app.llm_functions.MCPManager import MCPConnectionManager
+
+
+def load_config() -> dict:
+    with open(settings.mcp_config_path) as f:
+        return json.load(f)
+
+
+def stdio_config(config: dict) -> dict:
+    """The config with in-process servers run as stdio subprocesses instead."""
+    return {
+        name: {
+            "command": "python",
+            "args": [importlib.util.find_spec(conn["module"]).origin],
+            "transport": "stdio",
+            "env": {}
+        } if is_inprocess(conn) else conn
+        for name, conn in config.items()
+    }
+
+
+async def cold_invocation(config: dict, tool_name: str):
+    """What InvokeLLMWithMCPInner did per message before pooling."""
+    client = MultiServerMCPClient(config)
+    tools = await client.get_tools()
+    tool = next(t for t in tools if t.name == tool_name)
+    return await tool.ainvoke({})
+
+
+async def pooled_invocation(manager: MCPConnectionManager, tool_name: str):
+    tools = await manager.get_tools()
+    tool = next(t for t in tools if t.name == tool_name)
+    return await tool.ainvoke({})
+
+
+async def measure(label: str, iterations: int, invoke) -> list:
+    timings = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        await invoke()
+        timings.append((time.perf_counter() - started) * 1000)
+    timings.sort()
+    p50 = statistics.median(timings)
+    p95 = timings[min(len(timings) - 1, int(len(timings) * 0.95))]
+    print(f"  {label:<16} p50 {p50:9.2f}ms   p95 {p95:9.2f}ms")
+    return timings
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=20)
+    parser.add_argument("--tool", default="currentDate", help="Tool to call (must take no arguments)")
+    args = parser.parse_args()
+
+    config = load_config()
+    print(f"MCP servers: {', '.join(config)}  |  tool: {args.tool}  |  iterations: {args.iterations}")
+
+    stdio = stdio_config(config)
+    cold = await measure("cold", args.iterations, lambda: cold_invocation(stdio, args.tool))
+
+    results = {}
+    for label, pool_config in (("pooled stdio", stdio), ("pooled inprocess", config)):
+        manager = MCPConnectionManager(pool_config)
+        started = time.perf_counter()
+        await manager.start()
+        print(f"  ({label} startup {(time.perf_counter() - started) * 1000:.0f}ms, paid once per process)")
+        try:
+            results[label] = await measure(label, args.iterations, lambda: pooled_invocation(manager, args.tool))
+        finally:
+            await manager.stop()
+
+    for label, timings in results.items():
+        print(f"  speedup vs cold ({label}, p50): {statistics.median(cold) / statistics.median(timings):.0f}x")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -1,18 +1,18 @@
-"""
-Main entry point for the application
-"""
-
-import uvicorn
-from app.app import create_app
-from app.core.config import settings
-
-app = create_app()
-
-if __name__ == "__main__":
-    uvicorn.run(
-        "main:app",
-        host="0.0.0.0",
-        port=8001,
-        reload=settings.debug,
-        log_level="info",
-    )
+"""
+Main entry point for the application
+"""
+
+import uvicorn
+from app.app import create_app
+from app.core.config import settings
+
+app = create_app()
+
+if __name__ == "__main__":
+    uvicorn.run(
+        "main:app",
+        host="0.0.0.0",
+        port=8001,
+        reload=settings.debug,
+        log_level="info",
+    )